@@ -0,0 +1,70 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Limites do tamanho de lote do modal de grupos
+LOTE_INICIAL = 50
+LOTE_MINIMO = 10
+LOTE_MAXIMO = 200
+
+# Salvamentos abaixo deste tempo (segundos) permitem aumentar o lote
+SALVAMENTO_RAPIDO_S = 6.0
+
+
+class AdaptiveBatcher:
+    """Ajusta o tamanho do lote conforme a latência e o resultado de cada salvamento"""
+
+    def __init__(self, initial=LOTE_INICIAL, minimum=LOTE_MINIMO, maximum=LOTE_MAXIMO,
+                 fast_save_s=SALVAMENTO_RAPIDO_S, growth=1.5):
+        """
+        Args:
+            initial (int): tamanho do primeiro lote
+            minimum (int): menor lote permitido
+            maximum (int): maior lote permitido
+            fast_save_s (float): tempo de salvamento considerado rápido
+            growth (float): fator de crescimento após um salvamento rápido
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(max(initial, self.minimum), self.maximum)
+        self.fast_save_s = fast_save_s
+        self.growth = growth
+        self.last_clean = False
+        self.history = []
+
+    def batches(self, items):
+        """Gera lotes consecutivos de items usando o tamanho atual a cada iteração"""
+        start = 0
+        while start < len(items):
+            batch = items[start:start + self.size]
+            start += len(batch)
+            yield start, batch
+
+    def record(self, saved, clean, save_s, batch_len):
+        """
+        Registra o resultado do último salvamento e recalcula o tamanho do lote
+
+        Args:
+            saved (bool): o servidor aceitou o lote
+            clean (bool): o modal fechou na primeira espera, sem tempo adicional
+            save_s (float): duração do salvamento em segundos
+            batch_len (int): quantidade de itens do lote salvo
+        """
+        self.history.append((batch_len, save_s, saved, clean))
+        self.last_clean = saved and clean
+        previous = self.size
+
+        if not saved:
+            self.size = max(self.minimum, self.size // 2)
+        elif not clean or save_s > self.fast_save_s * 2:
+            self.size = max(self.minimum, int(self.size * 0.75))
+        elif save_s <= self.fast_save_s and batch_len >= self.size:
+            # Só cresce quando o lote estava cheio; lotes finais menores não dizem nada
+            self.size = min(self.maximum, int(self.size * self.growth))
+
+        if self.size != previous:
+            logger.info(f"Tamanho do lote ajustado: {previous} -> {self.size} (salvamento em {save_s:.1f}s)")
+
+    def needs_reload(self):
+        """Indica se a página deve ser recarregada antes do próximo lote"""
+        return not self.last_clean
@@ -1,14 +1,38 @@
-import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import time
 import logging
 import os
 
+from adaptive_batcher import AdaptiveBatcher, LOTE_INICIAL, LOTE_MINIMO, LOTE_MAXIMO
+from checkpoint_journal import open_journal
+from group_modal_index import GroupModalIndex
+from group_modal_locators import ESTRATEGIAS_BOTAO_SALVAR, estrategias_checkbox_contexto, pagina_grupos_aberta
+from locator_cache import registry as localizadores
+from session_vault import open_vault
+from sheet_ingest import read_code_column
+from driver_factory import create_chrome, handoff_to_headless
+from mzone_transport import MzoneHttpTransport, TransportError
+from run_telemetry import timed, note_retry, export_metrics
+from batch_mode import ask, confirm, pause, wait_for_login, batch_requested
+
+# Adiciona todos os chassis com uma única requisição à API antes de recorrer à interface
+USAR_MODO_EM_MASSA = True
+
+# Marca as checkboxes do lote a partir de um índice montado no navegador (uma chamada JS)
+USAR_INDICE_MODAL = True
+
+# Lê o grupo uma vez antes de começar e só processa os chassis que ainda não são membros
+USAR_DIFERENCA_PREVIA = True
+
+URL_GRUPOS = "https://live.mzoneweb.net/mzonex/maintenance/vehiclegroups"
+
+# Sessão do login manual guardada no cofre (a conta do cliente é confirmada pelo usuário)
+SESSAO_SITE = "mzone"
+SESSAO_CLIENTE = "grupos"
+
 
 class CarAdditionAutomation:
     def __init__(self, webdriver_path=None):
@@ -27,7 +51,13 @@ class CarAdditionAutomation:
         self.carros_adicionados = []
         self.carros_nao_encontrados = []
         self.carros_ja_no_grupo = []
+        self.carros_com_falha = []  # Localizados no modal, mas a checkbox não mudou
+        self.transporte = None  # Transporte da API aberto na diferença prévia
+        self.situacao_api = None  # (grupo_id, veiculos, membros) lidos na diferença prévia
         self.total_processados = 0
+        self.journal = None
+        self.salvamento_limpo = False  # Modal fechou na primeira espera do último salvamento
+        self.ultimo_salvamento = (False, False, 0.0)  # (salvo, limpo, duração em segundos)
         
         # Configurar logging
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,19 +65,22 @@ class CarAdditionAutomation:
     
     def setup_driver(self):
         """Configura o WebDriver do Chrome"""
-        chrome_options = Options()
-        # chrome_options.add_argument("--headless")  # Descomente para executar sem interface gráfica
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        if self.webdriver_path:
-            self.driver = webdriver.Chrome(executable_path=self.webdriver_path, options=chrome_options)
-        else:
-            self.driver = webdriver.Chrome(options=chrome_options)
-        
+        # Janela visível só para o login manual; depois a execução segue headless (continuar_headless)
+        self.driver = create_chrome(extra_args=("--no-sandbox",), executable_path=self.webdriver_path)
         self.wait = WebDriverWait(self.driver, 10)
-        self.driver.maximize_window()
-        self.driver.get("https://live.mzoneweb.net/mzonex/maintenance/vehiclegroups")
+        self.driver.get(URL_GRUPOS)
+    
+    def continuar_headless(self):
+        """Passa a sessão do login manual para um navegador do perfil de vazão"""
+        driver = handoff_to_headless(
+            self.driver, URL_GRUPOS,
+            ready=lambda d: WebDriverWait(d, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='search'][placeholder='Pesquisar']"))
+            )
+        )
+        if driver is not self.driver:
+            self.driver = driver
+            self.wait = WebDriverWait(self.driver, 10)
     
     def inserir_chassis_terminal(self):
         """Permite inserir chassis diretamente no terminal"""
@@ -78,9 +111,7 @@ class CarAdditionAutomation:
         arquivo = os.path.join(os.path.dirname(__file__), 'AdicionarGrupo.xlsx')
         
         try:
-            df = pd.read_excel(arquivo)
-            chassis_list = df.iloc[:, 0].dropna().tolist()  # Primeira coluna
-            chassis_list = [str(chassi).strip() for chassi in chassis_list]
+            chassis_list = read_code_column(arquivo, 0)  # Primeira coluna, sem repetidos
             
             print(f"✅ {len(chassis_list)} chassis carregados da planilha")
             return chassis_list
@@ -98,6 +129,10 @@ class CarAdditionAutomation:
         print("2. 📁 Carregar de planilha Excel")
         print("-"*50)
         
+        # Sem interação, os chassis vêm sempre da planilha
+        if batch_requested():
+            return self.carregar_chassis_excel()
+        
         while True:
             opcao = input("Escolha uma opção (1-2): ").strip()
             
@@ -115,17 +150,26 @@ class CarAdditionAutomation:
         print("="*50)
         
         while True:
-            self.nome_grupo = input("Digite o nome do grupo de veículos: ").strip()
+            self.nome_grupo = ask('grupo', "Digite o nome do grupo de veículos: ")
             if self.nome_grupo:
                 print(f"✅ Grupo definido: {self.nome_grupo}")
-                break
-            else:
-                print("❌ Nome do grupo não pode estar vazio")
+                return True
+            print("❌ Nome do grupo não pode estar vazio")
+            if batch_requested():
+                print("❌ Defina 'grupo' no batch.json para o modo batch")
+                return False
     
+    @timed()
     def fazer_login_inicial(self):
         """
         Aguarda o usuário fazer login manualmente na primeira vez
         """
+        # Sessão da execução anterior: o usuário só confirma a conta e a página
+        cofre = open_vault()
+        sessao_reaproveitada = cofre.restore(self.driver, SESSAO_SITE, SESSAO_CLIENTE)
+        if sessao_reaproveitada:
+            self.driver.get(URL_GRUPOS)
+        
         print("\n" + "="*60)
         print("🔐 LOGIN MANUAL NECESSÁRIO")
         print("="*60)
@@ -134,14 +178,23 @@ class CarAdditionAutomation:
         print("1. 🔑 Faça login na conta do cliente correto")
         print("2. 🔍 Navegue até a página de 'Editar Grupos de Veículos'")
         print("3. ✅ Certifique-se de estar na página correta")
-        print("4. ⏸️  Volte aqui e pressione ENTER para continuar")
+        if batch_requested():
+            print("4. ⏸️  A automação continua sozinha quando a página de grupos abrir")
+        else:
+            print("4. ⏸️  Volte aqui e pressione ENTER para continuar")
         print("-"*60)
+        if sessao_reaproveitada:
+            print("♻️ Sessão da execução anterior aplicada: confira se a conta é a do cliente correto")
         
-        # Aguardar confirmação do usuário
-        input("Pressione ENTER quando estiver pronto para continuar...")
+        # Aguardar confirmação do usuário (no modo batch, a página de grupos carregada)
+        if not wait_for_login(self.driver, pagina_grupos_aberta, "Pressione ENTER quando estiver pronto para continuar..."):
+            if batch_requested():
+                return False
+        cofre.capture(self.driver, SESSAO_SITE, SESSAO_CLIENTE)
         
         print("✅ Continuando com a automação...")
         time.sleep(2)
+        return True
     
     def recarregar_pagina(self):
         """Recarrega a página e aguarda o carregamento"""
@@ -167,6 +220,7 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro ao recarregar página: {e}")
             return False
 
+    @timed()
     def pesquisar_grupo(self):
         """Pesquisa o grupo específico na lista"""
         try:
@@ -199,6 +253,7 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro ao pesquisar grupo: {e}")
             return False
 
+    @timed()
     def clicar_editar_grupo(self):
         """Clica no botão de editar do grupo"""
         try:
@@ -249,26 +304,11 @@ class CarAdditionAutomation:
         Tenta encontrar a checkbox específica através da estrutura HTML próxima ao chassi
         """
         try:
-            possibles_seletores = [
-                f"//div[contains(text(), '{chassi}')]/ancestor::tr//input[@type='checkbox']",
-                f"//div[contains(text(), '{chassi}')]/ancestor::div[contains(@class, 'row')]//input[@type='checkbox']",
-                f"//span[contains(text(), '{chassi}')]/ancestor::tr//input[@type='checkbox']",
-                f"//span[contains(text(), '{chassi}')]/ancestor::div[contains(@class, 'row')]//input[@type='checkbox']",
-                f"//*[contains(text(), '{chassi}')]/ancestor::*[contains(@class, 'item')]//input[@type='checkbox']",
-                f"//*[contains(text(), '{chassi}')]/preceding-sibling::*//input[@type='checkbox']",
-                f"//*[contains(text(), '{chassi}')]/following-sibling::*//input[@type='checkbox']"
-            ]
-            
-            for seletor in possibles_seletores:
-                try:
-                    checkbox = self.driver.find_element(By.XPATH, seletor)
-                    if checkbox.is_displayed():
-                        self.logger.info(f"Checkbox encontrada por contexto para chassi {chassi}")
-                        return checkbox
-                except (NoSuchElementException, StaleElementReferenceException):
-                    continue
-                    
-            return None
+            # A estrutura que funcionou no chassi anterior é tentada primeiro
+            checkbox = localizadores.find(self.driver, "mzone/grupo_modal/checkbox_contexto", estrategias_checkbox_contexto(chassi))
+            if checkbox is not None:
+                self.logger.info(f"Checkbox encontrada por contexto para chassi {chassi}")
+            return checkbox
             
         except Exception as e:
             self.logger.warning(f"Erro ao buscar checkbox por contexto: {e}")
@@ -298,6 +338,7 @@ class CarAdditionAutomation:
             self.logger.warning(f"Erro ao buscar checkbox por posição: {e}")
             return None
 
+    @timed()
     def processar_checkbox_com_retry(self, checkbox, chassi, max_tentativas=3):
         """
         Processa uma checkbox específica com retry para StaleElementReferenceException
@@ -332,6 +373,7 @@ class CarAdditionAutomation:
             except StaleElementReferenceException:
                 self.logger.warning(f"StaleElementReferenceException na tentativa {tentativa + 1} para {chassi}")
                 if tentativa < max_tentativas - 1:
+                    note_retry()
                     time.sleep(1)
                     checkbox = self.encontrar_checkbox_por_contexto(chassi)
                     if not checkbox:
@@ -345,6 +387,7 @@ class CarAdditionAutomation:
                 self.logger.error(f"Erro ao processar checkbox (tentativa {tentativa + 1}): {e}")
                 if tentativa == max_tentativas - 1:
                     return False
+                note_retry()
                 time.sleep(1)
         
         return False
@@ -390,6 +433,7 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro no método força bruta: {e}")
             return False
 
+    @timed()
     def pesquisar_e_adicionar_chassi(self, chassi):
         """
         Pesquisa um chassi e adiciona ao grupo se encontrado
@@ -432,46 +476,17 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro geral ao processar chassi {chassi}: {e}")
             return False
 
+    @timed()
     def salvar_alteracoes(self):
         """Salva as alterações no grupo usando o seletor correto"""
         try:
             print("💾 Salvando alterações...")
+            self.salvamento_limpo = False
             
-            # Primeiro, tentar pelo XPath mais específico com o texto exato
-            try:
-                botao_salvar = self.wait.until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' and contains(@class, 'button') and contains(@class, 'btn-mz') and contains(@class, 'success') and normalize-space(text())='Salvar']"))
-                )
-                self.logger.info("Botão 'Salvar' encontrado pelo XPath com texto")
-            except TimeoutException:
-                # Se não encontrar pelo texto, tentar pelo seletor CSS corrigido
-                try:
-                    botao_salvar = self.wait.until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit'].button.btn-mz.success.ng-star-inserted"))
-                    )
-                    # Verificar se é realmente o botão "Salvar" pelo texto
-                    texto_botao = botao_salvar.text.strip()
-                    if "Salvar" not in texto_botao or "criar" in texto_botao.lower():
-                        self.logger.warning(f"Botão encontrado não é o correto. Texto: '{texto_botao}'")
-                        raise TimeoutException("Botão incorreto encontrado")
-                    self.logger.info("Botão 'Salvar' encontrado pelo CSS selector")
-                except TimeoutException:
-                    # Última tentativa: buscar todos os botões submit e filtrar
-                    botoes_submit = self.driver.find_elements(By.CSS_SELECTOR, "button[type='submit']")
-                    botao_salvar = None
-                    
-                    for botao in botoes_submit:
-                        try:
-                            texto = botao.text.strip()
-                            if texto == "Salvar" and "success" in botao.get_attribute("class"):
-                                botao_salvar = botao
-                                self.logger.info(f"Botão 'Salvar' encontrado por busca manual: '{texto}'")
-                                break
-                        except:
-                            continue
-                    
-                    if not botao_salvar:
-                        raise TimeoutException("Botão 'Salvar' não encontrado em nenhuma tentativa")
+            # Começa pela estratégia que encontrou o botão no salvamento anterior
+            botao_salvar = localizadores.find(self.driver, "mzone/grupo_modal/botao_salvar", ESTRATEGIAS_BOTAO_SALVAR, timeout=10)
+            if botao_salvar is None:
+                raise TimeoutException("Botão 'Salvar' não encontrado em nenhuma tentativa")
             
             # Verificar se o botão está realmente visível e clicável
             if not botao_salvar.is_displayed():
@@ -493,14 +508,14 @@ class CarAdditionAutomation:
             
             # Aguardar confirmação de salvamento e fechamento do modal
             print("⏱️ Aguardando confirmação do salvamento...")
-            time.sleep(3)
             
             # Verificar se o modal foi fechado (isso indica que salvou com sucesso)
             try:
-                WebDriverWait(self.driver, 8).until(
+                WebDriverWait(self.driver, 11).until(
                     EC.invisibility_of_element_located((By.CSS_SELECTOR, "div.editor-section"))
                 )
                 self.logger.info("Modal fechado - alterações salvas com sucesso")
+                self.salvamento_limpo = True
                 return True
             except TimeoutException:
                 # Se o modal ainda estiver aberto, pode ser que ainda esteja processando
@@ -538,9 +553,77 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro ao salvar alterações: {e}")
             return False
     
+    def processar_lote_pelo_indice(self, chassis_lote):
+        """
+        Marca todos os chassis do lote com uma única varredura da lista do modal
+        
+        Returns:
+            dict: chassi -> status, ou None se o índice não pôde ser montado
+        """
+        try:
+            status_indice = GroupModalIndex(self.driver).apply(chassis_lote, checked=True)
+        except Exception as e:
+            self.logger.warning(f"Índice do modal indisponível, pesquisando chassi a chassi: {e}")
+            return None
+        
+        resultados_lote = {}
+        nao_vistos = []
+        for chassi in chassis_lote:
+            status = status_indice[chassi]
+            if status == 'not_found':
+                # A varredura pode não ter alcançado a linha; a pesquisa confirma antes de concluir
+                nao_vistos.append(chassi)
+                continue
+            if status == 'toggled':
+                self.carros_adicionados.append(chassi)
+                resultados_lote[chassi] = 'success'
+                print(f"  ✅ {chassi}: adicionado")
+            elif status == 'already':
+                self.carros_ja_no_grupo.append(chassi)
+                resultados_lote[chassi] = 'skipped'
+                print(f"  ⚠️ {chassi}: já estava no grupo")
+            elif status == 'failed':
+                # Não é definitivo: o chassi é refeito ao retomar
+                self.carros_com_falha.append(chassi)
+                resultados_lote[chassi] = 'error'
+                print(f"  ❌ {chassi}: localizado, mas a marcação não foi aplicada")
+            self.total_processados += 1
+        
+        if nao_vistos:
+            print(f"  🔍 {len(nao_vistos)} chassis fora da varredura, pesquisando um a um...")
+            resultados_lote.update(self.processar_lote_por_pesquisa(nao_vistos))
+        
+        return resultados_lote
+    
+    def processar_lote_por_pesquisa(self, chassis_lote):
+        """Pesquisa e marca cada chassi do lote individualmente (método original)"""
+        resultados_lote = {}
+        for i, chassi in enumerate(chassis_lote, 1):
+            print(f"  Processando {i}/{len(chassis_lote)}: {chassi}")
+            
+            resultado = self.pesquisar_e_adicionar_chassi(chassi)
+            
+            if resultado:
+                self.carros_adicionados.append(chassi)
+                resultados_lote[chassi] = 'success'
+                print(f"    ✅ Adicionado")
+            elif chassi in self.carros_ja_no_grupo:
+                resultados_lote[chassi] = 'skipped'
+                print(f"    ⚠️ Já estava no grupo")
+            else:
+                self.carros_nao_encontrados.append(chassi)
+                resultados_lote[chassi] = 'not_found'
+                print(f"    ❌ Não adicionado")
+            
+            self.total_processados += 1
+            time.sleep(0.5)  # Pequena pausa entre pesquisas
+        
+        return resultados_lote
+    
+    @timed()
     def processar_lote(self, chassis_lote, numero_lote):
         """
-        Processa um lote de até 60 chassis
+        Processa um lote de chassis
         
         Args:
             chassis_lote (list): Lista de chassis para processar neste lote
@@ -552,6 +635,7 @@ class CarAdditionAutomation:
         print(f"\n🔄 PROCESSANDO LOTE {numero_lote}")
         print("="*50)
         print(f"📦 Chassis neste lote: {len(chassis_lote)}")
+        self.ultimo_salvamento = (False, False, 0.0)
         
         try:
             # 1. Pesquisar o grupo
@@ -566,31 +650,24 @@ class CarAdditionAutomation:
             
             print("✅ Modal aberto, processando chassis...")
             
-            # 3. Processar cada chassi do lote
-            for i, chassi in enumerate(chassis_lote, 1):
-                print(f"  Processando {i}/{len(chassis_lote)}: {chassi}")
-                
-                resultado = self.pesquisar_e_adicionar_chassi(chassi)
-                
-                if resultado:
-                    self.carros_adicionados.append(chassi)
-                    print(f"    ✅ Adicionado")
-                elif chassi in self.carros_ja_no_grupo:
-                    print(f"    ⚠️ Já estava no grupo")
-                else:
-                    self.carros_nao_encontrados.append(chassi)
-                    print(f"    ❌ Não adicionado")
-                
-                self.total_processados += 1
-                time.sleep(0.5)  # Pequena pausa entre pesquisas
+            # 3. Processar o lote pelo índice do modal; se indisponível, chassi a chassi
+            resultados_lote = self.processar_lote_pelo_indice(chassis_lote) if USAR_INDICE_MODAL else None
+            if resultados_lote is None:
+                resultados_lote = self.processar_lote_por_pesquisa(chassis_lote)
             
             # 4. Salvar alterações do lote
             print(f"\n💾 Salvando alterações do lote {numero_lote}...")
-            if self.salvar_alteracoes():
+            inicio_salvamento = time.time()
+            salvo = self.salvar_alteracoes()
+            self.ultimo_salvamento = (salvo, self.salvamento_limpo, time.time() - inicio_salvamento)
+            if salvo:
+                # Só grava no diário depois que o servidor aceitou o lote
+                self.registrar_checkpoint_lote(resultados_lote)
                 print(f"✅ Lote {numero_lote} salvo com sucesso")
                 time.sleep(2)  # Aguardar processamento do servidor
                 return True
             else:
+                self.registrar_checkpoint_lote({chassi: 'error' for chassi in resultados_lote})
                 print(f"⚠️ Problema ao salvar lote {numero_lote}")
                 return False
                 
@@ -598,28 +675,42 @@ class CarAdditionAutomation:
             self.logger.error(f"Erro ao processar lote {numero_lote}: {e}")
             return False
     
+    def chave_checkpoint(self, chassi):
+        """Chave do chassi no diário de checkpoint"""
+        return f"{self.nome_grupo}:{chassi}"
+    
+    def registrar_checkpoint_lote(self, resultados_lote):
+        """Registra no diário o resultado de cada chassi do lote"""
+        if not self.journal:
+            return
+        for chassi, status in resultados_lote.items():
+            self.journal.record(self.chave_checkpoint(chassi), status, grupo=self.nome_grupo, chassi=chassi)
+    
     def processar_todos_chassis(self, chassis_list):
         """
-        Processa todos os chassis dividindo em lotes de 60
+        Processa todos os chassis em lotes de tamanho adaptativo
+        
+        O lote cresce enquanto os salvamentos são rápidos e diminui quando o
+        modal demora a fechar. A página só é recarregada após um salvamento ruim.
         """
         total_chassis = len(chassis_list)
-        tamanho_lote = 50
+        lotes = AdaptiveBatcher()
         numero_lote = 1
         
-        # Dividir chassis em lotes
-        for i in range(0, total_chassis, tamanho_lote):
-            chassis_lote = chassis_list[i:i + tamanho_lote]
-            
-            print(f"\n📊 Progresso: {min(i + tamanho_lote, total_chassis)}/{total_chassis} chassis")
+        # Dividir chassis em lotes (o tamanho é recalculado a cada lote)
+        for processados, chassis_lote in lotes.batches(chassis_list):
+            print(f"\n📊 Progresso: {processados}/{total_chassis} chassis (lote de {len(chassis_lote)})")
             
             # Processar o lote atual
             sucesso_lote = self.processar_lote(chassis_lote, numero_lote)
+            salvo, limpo, duracao = self.ultimo_salvamento
+            lotes.record(salvo, limpo, duracao, len(chassis_lote))
             
             if not sucesso_lote:
                 print(f"❌ Erro no lote {numero_lote}. Continuando para próximo lote...")
             
-            # Se não é o último lote, recarregar a página
-            if i + tamanho_lote < total_chassis:
+            # Recarregar a página apenas se o último salvamento não fechou o modal normalmente
+            if processados < total_chassis and lotes.needs_reload():
                 print(f"⏱️ Aguardando 5 segundos antes de recarregar...")
                 time.sleep(5)
                 
@@ -631,6 +722,144 @@ class CarAdditionAutomation:
         
         print(f"\n🎉 Todos os lotes processados!")
     
+    @timed()
+    def processar_em_massa(self, chassis_list):
+        """
+        Adiciona os chassis ao grupo direto pela API, em uma única requisição
+        
+        Resolve todos os chassis para o id do veículo de uma vez, descarta os que
+        já são membros do grupo e envia apenas a diferença.
+        
+        Returns:
+            list: chassis que ainda precisam ser processados pela interface
+        """
+        print("\n⚡ MODO EM MASSA (API)")
+        print("="*50)
+        
+        # Reaproveita o transporte e a leitura da diferença prévia, quando houver
+        transporte = self.transporte or MzoneHttpTransport.from_driver(self.driver)
+        self.transporte = None
+        if not transporte:
+            print("⚠️ API indisponível, os chassis serão processados pela interface")
+            return chassis_list
+        
+        try:
+            if self.situacao_api:
+                grupo_id, veiculos, membros = self.situacao_api
+            else:
+                grupo_id, veiculos, membros = transporte.group_snapshot(self.nome_grupo, chassis_list)
+            
+            if not veiculos:
+                # Nenhum chassi resolvido: provável divergência da API, a interface confirma
+                print("⚠️ Nenhum chassi localizado pela API, usando a interface")
+                return chassis_list
+            
+            resultados = {}
+            a_adicionar = {}
+            restantes = []
+            for chassi in chassis_list:
+                veiculo_id = veiculos.get(chassi.strip().upper())
+                if veiculo_id is None:
+                    # A busca exata (vin eq) pode divergir do que a interface encontra; ela confirma
+                    restantes.append(chassi)
+                elif veiculo_id in membros:
+                    self.carros_ja_no_grupo.append(chassi)
+                    resultados[chassi] = 'skipped'
+                else:
+                    a_adicionar[veiculo_id] = chassi
+            
+            print(f"🔍 Localizados: {len(veiculos)} | Já no grupo: {len(self.carros_ja_no_grupo)} | A adicionar: {len(a_adicionar)} | Sem veículo na API: {len(restantes)}")
+            
+            status = transporte.add_group_members(grupo_id, a_adicionar.keys())
+            
+            for veiculo_id, chassi in a_adicionar.items():
+                if status.get(veiculo_id):
+                    self.carros_adicionados.append(chassi)
+                    resultados[chassi] = 'success'
+                else:
+                    restantes.append(chassi)
+            
+            self.total_processados += len(resultados)
+            self.registrar_checkpoint_lote(resultados)
+            
+            print(f"✅ {len(self.carros_adicionados)} chassis adicionados pela API")
+            if restantes:
+                print(f"⚠️ {len(restantes)} chassis serão processados pela interface")
+            return restantes
+            
+        except TransportError as e:
+            print(f"⚠️ Falha na API ({e}), os chassis serão processados pela interface")
+            return chassis_list
+        finally:
+            transporte.close()
+    
+    @timed()
+    def estado_do_grupo(self, chassis_list):
+        """
+        Lê de uma só vez quais chassis já estão no grupo (API; sem ela, uma varredura do modal)
+        
+        Returns:
+            dict: chassi (maiúsculo) -> True se já é membro, ou None se o estado não pôde ser lido
+        """
+        transporte = MzoneHttpTransport.from_driver(self.driver)
+        if transporte:
+            try:
+                grupo_id, veiculos, membros = transporte.group_snapshot(self.nome_grupo, chassis_list)
+                if veiculos:
+                    # O modo em massa segue com o mesmo transporte e a mesma leitura
+                    self.transporte, transporte = transporte, None
+                    self.situacao_api = (grupo_id, veiculos, membros)
+                    return {vin: guid in membros for vin, guid in veiculos.items()}
+                # Nenhum chassi resolvido: provável divergência da API, o modal confirma
+            except TransportError as e:
+                self.logger.warning(f"Falha ao ler o grupo pela API, usando o modal: {e}")
+            finally:
+                if transporte:
+                    transporte.close()
+        
+        if not (self.pesquisar_grupo() and self.clicar_editar_grupo()):
+            return None
+        try:
+            return GroupModalIndex(self.driver).membership(chassis_list)
+        except Exception as e:
+            self.logger.warning(f"Não foi possível ler o modal do grupo: {e}")
+            return None
+        finally:
+            # Fecha o modal sem salvar
+            self.recarregar_pagina()
+    
+    def diferenca_previa(self, chassis_list):
+        """
+        Descarta os chassis que já estão no grupo, sem abrir lotes
+        
+        Chassis que a leitura não localizou continuam pendentes: a interface confirma.
+        
+        Returns:
+            list: chassis que realmente precisam ser adicionados
+        """
+        print("\n🔎 Conferindo a situação atual do grupo...")
+        estado = self.estado_do_grupo(chassis_list)
+        if estado is None:
+            print("⚠️ Situação do grupo indisponível, todos os chassis serão processados")
+            return chassis_list
+        
+        resultados = {}
+        pendentes = []
+        nao_localizados = 0
+        for chassi in chassis_list:
+            membro = estado.get(chassi.strip().upper())
+            if membro:
+                self.carros_ja_no_grupo.append(chassi)
+                resultados[chassi] = 'skipped'
+            else:
+                nao_localizados += membro is None
+                pendentes.append(chassi)
+        
+        self.total_processados += len(resultados)
+        self.registrar_checkpoint_lote(resultados)
+        print(f"📋 Já no grupo: {len(self.carros_ja_no_grupo)} | A adicionar: {len(pendentes)} ({nao_localizados} a confirmar pela interface)")
+        return pendentes
+    
     def gerar_relatorio(self):
         """Gera relatório final do processamento"""
         relatorio = f"""
@@ -642,6 +871,7 @@ class CarAdditionAutomation:
 ║ Adicionados com sucesso: {len(self.carros_adicionados):<23} ║
 ║ Não encontrados: {len(self.carros_nao_encontrados):<31} ║
 ║ Já estavam no grupo: {len(self.carros_ja_no_grupo):<27} ║
+║ Falha ao marcar: {len(self.carros_com_falha):<31} ║
 ╚══════════════════════════════════════════════════════╝
 
 ✅ CARROS ADICIONADOS:
@@ -652,6 +882,9 @@ class CarAdditionAutomation:
 
 ⚠️ CHASSIS JÁ NO GRUPO:
 {chr(10).join([f"  • {chassi}" for chassi in self.carros_ja_no_grupo]) if self.carros_ja_no_grupo else "  Nenhum"}
+
+❌ CHASSIS COM FALHA AO MARCAR (refeitos ao retomar):
+{chr(10).join([f"  • {chassi}" for chassi in self.carros_com_falha]) if self.carros_com_falha else "  Nenhum"}
 """
         
         print(relatorio)
@@ -667,7 +900,8 @@ class CarAdditionAutomation:
             print("🚀 Iniciando automação de adição de carros")
             
             # 1. Definir grupo de veículos
-            self.definir_grupo_veiculos()
+            if not self.definir_grupo_veiculos():
+                return
             
             # 2. Escolher método e carregar chassis
             chassis_list = self.escolher_metodo_entrada()
@@ -676,37 +910,60 @@ class CarAdditionAutomation:
                 print("❌ Nenhum chassi foi inserido. Encerrando.")
                 return
             
+            # Retomar execução anterior (pula chassis já concluídos)
+            self.journal = open_journal('adicionar_grupo')
+            pendentes = self.journal.pending(chassis_list, self.chave_checkpoint)
+            if len(pendentes) < len(chassis_list):
+                print(f"⏭️ {len(chassis_list) - len(pendentes)} chassis já concluídos foram pulados")
+            chassis_list = pendentes
+            
+            if not chassis_list:
+                print("✅ Todos os chassis já foram processados. Encerrando.")
+                return
+            
             # 3. Mostrar resumo
-            total_lotes = (len(chassis_list) + 59) // 60  # Arredonda para cima
             print(f"\n📊 RESUMO DA AUTOMAÇÃO:")
             print(f"🏷️  Grupo: {self.nome_grupo}")
             print(f"🚗 Total de chassis: {len(chassis_list)}")
-            print(f"📦 Serão processados em {total_lotes} lotes de até 60 chassis")
-            print(f"🔄 A página será recarregada entre cada lote")
+            print(f"📦 Lotes adaptativos: começam com {LOTE_INICIAL} chassis e variam entre {LOTE_MINIMO} e {LOTE_MAXIMO} conforme o salvamento")
+            print(f"🔄 A página só é recarregada depois de um salvamento com problema")
             
             # 4. Configurar browser
             print("\n🔧 Configurando navegador...")
             self.setup_driver()
             
             # 5. Aguardar login manual
-            self.fazer_login_inicial()
+            if not self.fazer_login_inicial():
+                print("❌ Login não concluído, automação encerrada")
+                return
+            self.continuar_headless()
+            
+            # Só os chassis que ainda não estão no grupo seguem para a alteração
+            if USAR_DIFERENCA_PREVIA:
+                chassis_list = self.diferenca_previa(chassis_list)
+                if not chassis_list:
+                    print("✅ Nenhum chassi precisa ser adicionado.")
+                    self.gerar_relatorio()
+                    return
             
             # 6. Confirmação final
             print("\n" + "="*50)
             print("⚠️  CONFIRMAÇÃO FINAL")
             print("="*50)
-            print("A automação irá processar os chassis em lotes.")
+            print(f"A automação irá processar {len(chassis_list)} chassis em lotes adaptativos ({LOTE_MINIMO} a {LOTE_MAXIMO}).")
             print(f"Grupo a ser editado: {self.nome_grupo}")
-            print(f"Total de lotes: {total_lotes}")
             
-            confirmar = input("\n🚀 Iniciar processamento? (s/n): ").lower()
-            if confirmar not in ['s', 'sim', 'y', 'yes']:
+            if not confirm('iniciar', "\n🚀 Iniciar processamento? (s/n): "):
                 print("❌ Automação cancelada pelo usuário")
                 return
             
-            # 7. Processar todos os chassis
+            # 7. Processar todos os chassis (API em massa, interface como fallback)
             print("\n🔄 Iniciando processamento...")
-            self.processar_todos_chassis(chassis_list)
+            if USAR_MODO_EM_MASSA:
+                chassis_list = self.processar_em_massa(chassis_list)
+            
+            if chassis_list:
+                self.processar_todos_chassis(chassis_list)
             
             # 8. Gerar relatório
             print("\n📋 Gerando relatório final...")
@@ -720,8 +977,13 @@ class CarAdditionAutomation:
             print(f"❌ Erro durante execução: {e}")
             self.logger.error(f"Erro durante execução: {e}")
         finally:
+            if self.transporte:
+                self.transporte.close()
+            if self.journal:
+                self.journal.close()
+            export_metrics('adicionar_grupo')
             if self.driver:
-                input("\nPressione ENTER para fechar o navegador...")
+                pause("\nPressione ENTER para fechar o navegador...")
                 self.driver.quit()
                 print("🔒 Navegador fechado")
 
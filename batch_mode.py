@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Flag da linha de comando que liga o modo sem interação (também vale SCOPE_BATCH=1 no ambiente)
+BATCH_FLAG = '--batch'
+BATCH_ENV = 'SCOPE_BATCH'
+
+# Respostas das perguntas no modo sem interação (trocado com --batch-config <arquivo>). Chaves:
+# grupo, retomar, iniciar, arquivo_ids, coluna_ids, coluna_chassis, data_terminacao,
+# sessoes, navegadores, login_manual, tempo_login_manual e retentativas
+# ({"cancelamento": {"max_tentativas": 3, "espera_inicial": 2, "fator": 2, "ao_esgotar": "pular"}})
+BATCH_CONFIG_FILE = 'batch.json'
+
+# Tempo máximo (segundos) aguardando um login manual no modo sem interação
+DEFAULT_LOGIN_TIMEOUT = 600
+
+# Intervalo (segundos) entre as verificações do login manual
+LOGIN_POLL_INTERVAL = 2
+
+# Política usada quando o batch.json não define a do passo
+DEFAULT_RETRY_POLICY = {
+    'max_tentativas': 3,
+    'espera_inicial': 2,
+    'fator': 2,
+    'espera_maxima': 60,
+    'ao_esgotar': 'pular',
+}
+
+YES_ANSWERS = ['s', 'sim', 'y', 'yes']
+
+_config = None
+
+
+def batch_requested():
+    """Indica se o script foi chamado com --batch (ou SCOPE_BATCH=1)"""
+    if BATCH_FLAG in sys.argv:
+        return True
+    return os.environ.get(BATCH_ENV, '').strip().lower() in ['1', 'true', 's', 'sim', 'yes']
+
+
+def config_path():
+    """Arquivo de respostas: o de --batch-config, ou batch.json na pasta atual"""
+    if '--batch-config' in sys.argv:
+        position = sys.argv.index('--batch-config')
+        if position + 1 < len(sys.argv):
+            return sys.argv[position + 1]
+    return BATCH_CONFIG_FILE
+
+
+def load_batch_config(reload=False):
+    """
+    Lê as respostas do modo sem interação (uma vez por processo)
+
+    Returns:
+        dict: respostas e políticas de retentativa (vazio se não há arquivo)
+    """
+    global _config
+    if _config is not None and not reload:
+        return _config
+
+    path = config_path()
+    _config = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _config = json.load(f)
+            logger.info(f"Configuração do modo batch carregada: {path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Configuração do modo batch ilegível ({path}): {e}")
+    elif batch_requested():
+        logger.warning(f"Arquivo {path} não encontrado; o modo batch usará as respostas padrão")
+    return _config
+
+
+def setting(key, default=None):
+    """Valor do batch.json para a pergunta (ou o padrão)"""
+    value = load_batch_config().get(key)
+    return default if value is None else value
+
+
+def ask(key, prompt, default=None):
+    """
+    Pergunta ao usuário, ou responde pelo batch.json no modo sem interação
+
+    Args:
+        key (str): chave da resposta no batch.json
+        prompt (str): texto exibido no console
+        default: resposta quando o batch.json não define a chave
+
+    Returns:
+        str: resposta (sem espaços nas pontas)
+    """
+    if not batch_requested():
+        return input(prompt).strip()
+    answer = setting(key, default)
+    answer = '' if answer is None else str(answer).strip()
+    print(f"{prompt}🤖 {answer}")
+    return answer
+
+
+def confirm(key, prompt, default=True):
+    """Pergunta de sim/não; no modo sem interação vale o batch.json (ou o padrão)"""
+    if not batch_requested():
+        return input(prompt).lower().strip() in YES_ANSWERS
+    answer = setting(key, default)
+    if isinstance(answer, str):
+        answer = answer.lower().strip() in YES_ANSWERS
+    print(f"{prompt}🤖 {'s' if answer else 'n'}")
+    return bool(answer)
+
+
+def pause(prompt):
+    """Aguarda ENTER (no modo sem interação segue direto)"""
+    if not batch_requested():
+        input(prompt)
+
+
+def wait_for_login(driver, logged_in, prompt):
+    """
+    Aguarda o login manual no navegador aberto
+
+    No modo interativo espera o ENTER do usuário. No modo sem interação a página
+    é verificada periodicamente até logged_in(driver) ou o tempo de login esgotar.
+
+    Args:
+        logged_in (callable): logged_in(driver) -> bool indica que o login foi feito
+        prompt (str): mensagem exibida no console
+
+    Returns:
+        bool: login concluído (no modo interativo, o resultado de logged_in após o ENTER)
+    """
+    if not batch_requested():
+        input(prompt)
+        return _check(driver, logged_in)
+
+    timeout = float(setting('tempo_login_manual', DEFAULT_LOGIN_TIMEOUT))
+    print(f"🤖 Modo batch: aguardando o login no navegador por até {int(timeout)}s...")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if _check(driver, logged_in):
+            return True
+        time.sleep(LOGIN_POLL_INTERVAL)
+    logger.error(f"Login manual não concluído em {int(timeout)}s")
+    return False
+
+
+def _check(driver, logged_in):
+    try:
+        return bool(logged_in(driver))
+    except Exception:
+        return False
+
+
+class RetryPolicy:
+    """Quantas vezes refazer um passo que falhou, com espera crescente entre as tentativas"""
+
+    def __init__(self, name, max_tentativas, espera_inicial, fator, espera_maxima, ao_esgotar):
+        self.name = name
+        self.max_attempts = max(1, int(max_tentativas))
+        self.initial_delay = float(espera_inicial)
+        self.factor = float(fator)
+        self.max_delay = float(espera_maxima)
+        # 'pular': registra o item como erro e segue; 'parar': interrompe a execução
+        self.on_exhausted = ao_esgotar
+
+    def delay(self, attempt):
+        """Espera antes da tentativa seguinte à de número attempt (começa em 1)"""
+        return min(self.max_delay, self.initial_delay * self.factor ** (attempt - 1))
+
+    def allows(self, attempt):
+        """Indica se ainda cabe outra tentativa depois da de número attempt"""
+        return attempt < self.max_attempts
+
+    def backoff(self, attempt):
+        wait = self.delay(attempt)
+        logger.info(f"🤖 Nova tentativa de '{self.name}' ({attempt + 1}/{self.max_attempts}) em {wait:.0f}s")
+        time.sleep(wait)
+
+    @property
+    def stops_run(self):
+        return self.on_exhausted == 'parar'
+
+
+def retry_policy(name):
+    """Política do passo definida em 'retentativas' no batch.json (campos ausentes usam o padrão)"""
+    values = dict(DEFAULT_RETRY_POLICY)
+    values.update(setting('retentativas', {}).get(name, {}))
+    return RetryPolicy(name, **{key: values[key] for key in DEFAULT_RETRY_POLICY})
+
+
+def should_retry(name, attempt, prompt):
+    """
+    Decide se um passo que falhou é refeito
+
+    No modo interativo o usuário responde; no modo sem interação a política do passo
+    decide e a espera (backoff) acontece aqui antes de liberar a nova tentativa.
+
+    Args:
+        name (str): nome da política em 'retentativas'
+        attempt (int): tentativa que acabou de falhar (começa em 1)
+        prompt (str): pergunta exibida no modo interativo
+
+    Returns:
+        bool: True para tentar de novo
+    """
+    if not batch_requested():
+        return input(prompt).lower().strip() in YES_ANSWERS
+    policy = retry_policy(name)
+    if not policy.allows(attempt):
+        logger.warning(f"🤖 '{name}': {policy.max_attempts} tentativas esgotadas")
+        return False
+    policy.backoff(attempt)
+    return True
+
+
+def continue_after_failure(name, prompt):
+    """
+    Decide se a execução segue depois de um item com erro crítico
+
+    No modo sem interação o item fica registrado como erro e a execução segue,
+    a não ser que a política do passo seja 'parar'.
+    """
+    if not batch_requested():
+        return input(prompt).lower().strip() in YES_ANSWERS
+    if retry_policy(name).stops_run:
+        logger.error(f"🤖 '{name}': política 'parar', execução interrompida")
+        return False
+    return True
@@ -0,0 +1,558 @@
+import re
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import threading
+import logging
+from html import escape
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from billing_automation import ScopeBillingAutomation
+from driver_factory import create_chrome
+from qtgo_automation import ChassisAutomation
+from run_telemetry import metrics, export_metrics
+from setup_automation import VehicleAutomation
+
+logger = logging.getLogger(__name__)
+
+# Atraso padrão de cada requisição aos sistemas simulados (ms)
+DEFAULT_LATENCY_MS = 150
+
+# Tempo extra em que o spinner fica visível depois de cada requisição (ms)
+DEFAULT_SPINNER_MS = 300
+
+# Itens processados por automação em cada medição
+DEFAULT_ITEMS = 10
+
+BENCHMARK_GROUP = "GRUPO BENCHMARK"
+
+# Mostra o spinner, faz uma requisição com a latência configurada e só então executa a ação
+BUSY_JS = """
+function busy(then, spinnerClass) {
+    var spinner = document.createElement('div');
+    spinner.className = spinnerClass || 'loading-spinner';
+    spinner.style.cssText = 'position:fixed;top:0;left:0;width:40px;height:40px;background:#ccc;';
+    document.body.appendChild(spinner);
+    fetch('/api/delay').then(function () {
+        setTimeout(function () { spinner.remove(); then(); }, __SPINNER_MS__);
+    });
+}
+"""
+
+# Grade "Todos os Veículos" (Wijmo) e modal de edição do mzoneweb
+MZONE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>mzoneweb (simulado)</title>
+<style>
+.wj-row { display: flex; } .wj-cell { width: 220px; }
+.modal { position: fixed; top: 10%; left: 20%; background: #fff; border: 1px solid #999; padding: 16px; }
+</style></head>
+<body>
+<input type="search" placeholder="Procurar veículos" id="search">
+<div class="wj-flexgrid" id="grid"></div>
+<script>
+__BUSY_JS__
+var vehicles = __DATA__;
+var groups = __GROUPS__;
+var fields = ['unit_Description', 'description', 'vin', 'registration'];
+var grid = document.getElementById('grid');
+var term = '';
+
+// Mesma interface que o vehicle_index lê da FlexGrid real
+grid['wj-Control'] = {
+    columns: [
+        {binding: 'unit_Description', header: 'Unidade'},
+        {binding: 'description', header: 'Descrição'},
+        {binding: 'vin', header: 'Número de Chassi'},
+        {binding: 'registration', header: 'Placa'}
+    ],
+    collectionView: {sourceCollection: vehicles}
+};
+
+function render() {
+    grid.innerHTML = '';
+    vehicles.forEach(function (v, i) {
+        var text = fields.map(function (f) { return v[f]; }).join(' ').toUpperCase();
+        if (term && text.indexOf(term.toUpperCase()) === -1) { return; }
+        var row = document.createElement('div');
+        row.className = 'wj-row';
+        fields.forEach(function (f) {
+            var cell = document.createElement('div');
+            cell.className = 'wj-cell';
+            cell.textContent = v[f];
+            row.appendChild(cell);
+        });
+        var actions = document.createElement('div');
+        actions.className = 'wj-cell';
+        var pencil = document.createElement('i');
+        pencil.className = 'pointer mz7-pencil';
+        pencil.textContent = 'editar';
+        pencil.onclick = function () { busy(function () { openEditor(i); }); };
+        actions.appendChild(pencil);
+        row.appendChild(actions);
+        grid.appendChild(row);
+    });
+}
+
+function renderGroups(list, filter) {
+    list.innerHTML = '';
+    groups.forEach(function (g) {
+        if (filter && g.toUpperCase().indexOf(filter.toUpperCase()) === -1) { return; }
+        var label = document.createElement('label');
+        label.appendChild(document.createTextNode(g));
+        var box = document.createElement('input');
+        box.type = 'checkbox';
+        label.appendChild(box);
+        list.appendChild(label);
+    });
+}
+
+function openEditor(i) {
+    var v = vehicles[i];
+    var modal = document.createElement('div');
+    modal.className = 'modal';
+    modal.innerHTML =
+        '<ul><li><a href="#" class="tab-main">Detalhes</a></li><li><a href="#" class="tab-groups">Grupos de veículos</a></li></ul>'
+        + '<div class="pane-main">'
+        + '<input name="description" placeholder="Descrição">'
+        + '<input name="registration" placeholder="Placa">'
+        + '<input name="vin" placeholder="Número de Chassi"></div>'
+        + '<div class="pane-groups" style="display:none">'
+        + '<input placeholder="Buscar" class="form-input ng-untouched ng-pristine ng-valid">'
+        + '<div class="scrollbar-container checkboxlist-wrapper"></div></div>'
+        + '<button type="submit" class="btn success">Salvar</button>'
+        + '<button type="button" class="btn cancel">Cancelar</button>';
+    document.body.appendChild(modal);
+
+    ['description', 'registration', 'vin'].forEach(function (f) { modal.querySelector('[name=' + f + ']').value = v[f]; });
+    var list = modal.querySelector('.checkboxlist-wrapper');
+    renderGroups(list, '');
+
+    modal.querySelector('.tab-groups').onclick = function (e) {
+        e.preventDefault();
+        busy(function () {
+            modal.querySelector('.pane-main').style.display = 'none';
+            modal.querySelector('.pane-groups').style.display = 'block';
+        });
+    };
+    var groupSearch = modal.querySelector('.pane-groups input');
+    var groupTimer = null;
+    groupSearch.addEventListener('input', function () {
+        clearTimeout(groupTimer);
+        groupTimer = setTimeout(function () { busy(function () { renderGroups(list, groupSearch.value); }); }, 200);
+    });
+    modal.querySelector('.success').onclick = function () {
+        busy(function () {
+            ['description', 'registration', 'vin'].forEach(function (f) { v[f] = modal.querySelector('[name=' + f + ']').value; });
+            modal.remove();
+            render();
+        });
+    };
+    modal.querySelector('.cancel').onclick = function () { modal.remove(); };
+}
+
+var searchTimer = null;
+document.getElementById('search').addEventListener('input', function (e) {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(function () { busy(function () { term = e.target.value; render(); }); }, 200);
+});
+render();
+</script>
+</body></html>
+"""
+
+# Tabela de subscriptions (Angular Material) e modal de desinstalação do Quantigo
+QTGO_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Quantigo (simulado)</title>
+<style>.modal { position: fixed; top: 10%; left: 20%; background: #fff; border: 1px solid #999; padding: 16px; }</style>
+</head>
+<body>
+<div class="quantigo-table-actions">
+    <input class="mat-input-element" placeholder="Search" id="mat-input-3">
+    <button class="mat-icon-button" mat-icon-button id="search-button"><mat-icon role="img">search</mat-icon></button>
+</div>
+<table class="mat-table"><tbody id="rows"></tbody></table>
+<script>
+__BUSY_JS__
+var subscriptions = __DATA__;
+var rows = document.getElementById('rows');
+
+function cell(column, text) {
+    var td = document.createElement('td');
+    td.className = 'mat-cell cdk-column-' + column;
+    td.textContent = text;
+    return td;
+}
+
+function render(term) {
+    rows.innerHTML = '';
+    subscriptions.forEach(function (s) {
+        if (s.chassis !== term) { return; }
+        var tr = document.createElement('tr');
+        tr.className = 'material-table-row mat-row';
+        tr.appendChild(cell('description', s.description));
+        var status = cell('status', s.status);
+        tr.appendChild(status);
+        var actions = cell('actions', '');
+        var button = document.createElement('button');
+        button.className = 'quantigo-table-row-action';
+        button.textContent = 'Deinstallation';
+        button.onclick = function () { busy(function () { openModal(s, status); }, 'quantigo-progress-spinner'); };
+        actions.appendChild(button);
+        tr.appendChild(actions);
+        rows.appendChild(tr);
+    });
+}
+
+function openModal(subscription, statusCell) {
+    var modal = document.createElement('div');
+    modal.className = 'modal';
+    modal.innerHTML = '<input formcontrolname="location">'
+        + '<button class="mat-stroked-button mat-button-base mat-primary" color="primary" mat-stroked-button><span>Ok</span></button>';
+    document.body.appendChild(modal);
+    modal.querySelector('button').onclick = function () {
+        busy(function () {
+            subscription.status = 'Inactive';
+            statusCell.textContent = 'Inactive';
+            modal.remove();
+        }, 'quantigo-progress-spinner');
+    };
+}
+
+document.getElementById('search-button').onclick = function () {
+    var term = document.getElementById('mat-input-3').value.trim();
+    busy(function () { render(term); }, 'quantigo-progress-spinner');
+};
+</script>
+</body></html>
+"""
+
+# Página de manutenção de contratos (ASP.NET WebForms) do Billing
+BILLING_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Billing (simulado)</title></head>
+<body>
+<form method="post" id="aspnetForm" action="ContractMaintenance.aspx">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="">
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}">
+<script>
+function __doPostBack(target, argument) {{
+    var form = document.getElementById('aspnetForm');
+    document.getElementById('__EVENTTARGET').value = target;
+    document.getElementById('__EVENTARGUMENT').value = argument;
+    form.submit();
+}}
+</script>
+<input type="text" name="ctl00$ContentPlaceHolder1$txt_BillableEntityDescription"
+       id="ctl00_ContentPlaceHolder1_txt_BillableEntityDescription" value="{search}">
+{body}
+</form>
+</body></html>
+"""
+
+BILLING_RESULTS_ROW = (
+    '<tr><td>{contract}</td><td>{equipment}</td><td>{status}</td><td>01/01/2024</td><td>{link}</td></tr>'
+)
+
+BILLING_TERMINATION_LINK = (
+    '<a id="ctl00_ContentPlaceHolder1_gv_SearchResults_ctl{row:02d}_lb_ContractTermination" '
+    'href="javascript:__doPostBack(\'ctl00$ContentPlaceHolder1$gv_SearchResults$ctl{row:02d}$lb_ContractTermination\',\'\')">'
+    'Termination</a>'
+)
+
+BILLING_TERMINATION_FORM = """
+<div id="termination">
+<input type="text" name="ctl00$ContentPlaceHolder1$txt_TerminationDate" id="ctl00_ContentPlaceHolder1_txt_TerminationDate">
+<input type="submit" name="ctl00$ContentPlaceHolder1$cmd_Terminate" id="ctl00_ContentPlaceHolder1_cmd_Terminate" value="Terminate">
+</div>
+"""
+
+LINK_ROW_RE = re.compile(r'\$ctl(\d+)\$lb_ContractTermination')
+
+
+def random_vin(rng):
+    """Chassi aleatório no padrão VIN (17 caracteres, sem I, O e Q)"""
+    alphabet = ''.join(c for c in string.ascii_uppercase + string.digits if c not in 'IOQ')
+    return ''.join(rng.choice(alphabet) for _ in range(17))
+
+
+class MockSystems:
+    """Estado dos três sistemas simulados, gerado a partir de uma semente"""
+
+    def __init__(self, items, latency_ms=DEFAULT_LATENCY_MS, spinner_ms=DEFAULT_SPINNER_MS,
+                 contracts_per_item=2, seed=42):
+        rng = random.Random(seed)
+        self.latency = latency_ms / 1000
+        self.spinner_ms = spinner_ms
+        self.lock = threading.Lock()
+
+        self.vehicles = [
+            {
+                'unit_Description': str(100000 + i),
+                'description': f"VEICULO {i}",
+                'vin': random_vin(rng),
+                'registration': f"BMK{i:04d}",
+            }
+            for i in range(items)
+        ]
+        self.groups = [BENCHMARK_GROUP] + [f"GRUPO {i}" for i in range(20)]
+
+        self.subscriptions = []
+        for vehicle in self.vehicles:
+            self.subscriptions.append({'chassis': vehicle['vin'], 'description': 'Tracker', 'status': 'Active'})
+            self.subscriptions.append({'chassis': vehicle['vin'], 'description': 'Tracker antigo', 'status': 'Inactive'})
+
+        self.equipment_ids = [str(500000 + i) for i in range(items)]
+        self.contracts = {
+            equipment: ['Active'] * contracts_per_item + ['Inactive']
+            for equipment in self.equipment_ids
+        }
+
+    def page(self, template):
+        return (template
+                .replace('__BUSY_JS__', BUSY_JS)
+                .replace('__SPINNER_MS__', str(self.spinner_ms)))
+
+    def mzone_page(self):
+        return (self.page(MZONE_PAGE)
+                .replace('__DATA__', json.dumps(self.vehicles))
+                .replace('__GROUPS__', json.dumps(self.groups)))
+
+    def qtgo_page(self):
+        return self.page(QTGO_PAGE).replace('__DATA__', json.dumps(self.subscriptions))
+
+    def billing_results(self, equipment):
+        rows = ['<tr><th>Contrato</th><th>Equipamento</th><th>Status</th><th>Início</th><th>Ações</th></tr>']
+        for index, status in enumerate(self.contracts.get(equipment, [])):
+            link = BILLING_TERMINATION_LINK.format(row=index + 2) if status == 'Active' else ''
+            rows.append(BILLING_RESULTS_ROW.format(contract=index + 1, equipment=escape(equipment), status=status, link=link))
+        return '<table id="ctl00_ContentPlaceHolder1_gv_SearchResults">' + ''.join(rows) + '</table>'
+
+    def billing_post(self, fields):
+        """Trata a postback do Billing e devolve a página resultante"""
+        value = lambda name: fields.get(name, [''])[0]
+        search = value('ctl00$ContentPlaceHolder1$txt_BillableEntityDescription').strip()
+        equipment, _, contract = value('__VIEWSTATE').partition('|')
+        target = value('__EVENTTARGET')
+
+        with self.lock:
+            if 'ctl00$ContentPlaceHolder1$cmd_Terminate' in fields and contract:
+                statuses = self.contracts.get(equipment, [])
+                if int(contract) < len(statuses):
+                    statuses[int(contract)] = 'Inactive'
+                body = self.billing_results(equipment)
+                viewstate = equipment
+            elif LINK_ROW_RE.search(target):
+                row = int(LINK_ROW_RE.search(target).group(1)) - 2
+                body = BILLING_TERMINATION_FORM
+                viewstate = f"{equipment}|{row}"
+            else:
+                equipment = search
+                body = self.billing_results(equipment)
+                viewstate = equipment
+
+        return BILLING_PAGE.format(viewstate=escape(viewstate), search=escape(search), body=body)
+
+    def billing_page(self):
+        return BILLING_PAGE.format(viewstate='', search='', body='')
+
+
+def make_handler(systems):
+    """Handler HTTP dos sistemas simulados (latência aplicada a toda requisição)"""
+
+    class MockHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def send_html(self, html, status=200):
+            body = html.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(systems.latency)
+            path = urlparse(self.path).path
+            if path == '/api/delay':
+                self.send_html('{}')
+            elif path.startswith('/mzonex'):
+                self.send_html(systems.mzone_page())
+            elif path.startswith('/app/subscriptions'):
+                self.send_html(systems.qtgo_page())
+            elif path.endswith('ContractMaintenance.aspx'):
+                self.send_html(systems.billing_page())
+            else:
+                self.send_html('', status=404)
+
+        def do_POST(self):
+            time.sleep(systems.latency)
+            length = int(self.headers.get('Content-Length') or 0)
+            fields = parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+            if urlparse(self.path).path.endswith('ContractMaintenance.aspx'):
+                self.send_html(systems.billing_post(fields))
+            else:
+                self.send_html('', status=404)
+
+    return MockHandler
+
+
+class MockServer:
+    """Servidor local dos sistemas simulados em uma thread própria"""
+
+    def __init__(self, systems):
+        self.systems = systems
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(systems))
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def bench_mzone(driver, server):
+    """Setup de veículos pela interface (pesquisa, edição e grupo)"""
+    automation = VehicleAutomation()
+    automation.attach_driver(driver)
+    driver.get(server.url + 'mzonex/')
+    automation.wait_for_loading()
+    automation.vehicles_page_initialized = True
+
+    vehicles = [
+        {
+            'ID': v['unit_Description'], 'CHASSI': v['vin'], 'DESCRIÇÃO': f"{v['description']} EDITADO",
+            'PLACA': v['registration'], 'GRUPO DE VEICULOS': BENCHMARK_GROUP, 'CLIENTE': 'BENCHMARK',
+            'ODOMETRO': None,
+        }
+        for v in server.systems.vehicles
+    ]
+    for vehicle in vehicles:
+        automation.process_vehicle(vehicle)
+    return len(vehicles), len(automation.report['success'])
+
+
+def bench_billing(driver, server):
+    """Cancelamento de contratos pelo navegador (pesquisa, Termination e confirmação)"""
+    automation = ScopeBillingAutomation()
+    automation.driver = driver
+    automation.wait = WebDriverWait(driver, 15)
+    automation.contracts_url = server.url + 'Scope.Billing.Web/ContractMaintenance.aspx'
+    automation.termination_date = "1 jan 2026"
+    automation.interactive = False
+
+    equipment_ids = server.systems.equipment_ids
+    for equipment_id in equipment_ids:
+        automation.process_equipment(equipment_id)
+    done = sum(1 for statuses in server.systems.contracts.values() if 'Active' not in statuses)
+    return len(equipment_ids), done
+
+
+def bench_qtgo(driver, server):
+    """Desinstalação de subscriptions pela interface (pesquisa, Deinstallation e modal)"""
+    automation = ChassisAutomation()
+    automation.driver = driver
+    driver.get(server.url + 'app/subscriptions')
+
+    chassis_list = [v['vin'] for v in server.systems.vehicles]
+    for chassis in chassis_list:
+        automation.process_chassis(chassis)
+    return len(chassis_list), len(automation.successful_chassis)
+
+
+BENCHMARKS = {
+    'mzone': bench_mzone,
+    'billing': bench_billing,
+    'qtgo': bench_qtgo,
+}
+
+
+def run_benchmark(name, items=DEFAULT_ITEMS, latency_ms=DEFAULT_LATENCY_MS, spinner_ms=DEFAULT_SPINNER_MS):
+    """
+    Executa uma automação contra o sistema simulado em navegador headless
+
+    Returns:
+        dict: itens, concluídos, segundos, itens por minuto e passos mais lentos (p95)
+    """
+    systems = MockSystems(items, latency_ms, spinner_ms)
+    metrics.reset()
+
+    with MockServer(systems) as server:
+        driver = create_chrome(headless=True)
+        try:
+            start = time.perf_counter()
+            total, done = BENCHMARKS[name](driver, server)
+            elapsed = time.perf_counter() - start
+        finally:
+            driver.quit()
+
+    steps = metrics.summary()
+    export_metrics(f"benchmark_{name}")
+    return {
+        'automation': name,
+        'items': total,
+        'done': done,
+        'seconds': round(elapsed, 2),
+        'items_per_minute': round(done / elapsed * 60, 2) if elapsed else 0.0,
+        'slowest_steps': [{k: row[k] for k in ('step', 'count', 'p50_s', 'p95_s')} for row in steps[:5]],
+    }
+
+
+def main():
+    """Mede a vazão das automações contra os sistemas simulados (sem tocar produção)"""
+    parser = argparse.ArgumentParser(description="Benchmark offline das automações contra sistemas simulados")
+    parser.add_argument('automations', nargs='*', metavar='AUTOMACAO',
+                        help=f"automações a medir: {', '.join(BENCHMARKS)} (padrão: todas)")
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS, help="itens por automação")
+    parser.add_argument('--latency', type=int, default=DEFAULT_LATENCY_MS, help="atraso de cada requisição (ms)")
+    parser.add_argument('--spinner', type=int, default=DEFAULT_SPINNER_MS, help="tempo extra do spinner (ms)")
+    parser.add_argument('--min-rate', type=float, default=None,
+                        help="falha (código 1) se alguma automação ficar abaixo desta vazão (itens/min)")
+    parser.add_argument('--json', default=None, help="arquivo onde gravar os resultados")
+    args = parser.parse_args()
+    unknown = [name for name in args.automations if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"automação desconhecida: {', '.join(unknown)}")
+
+    # As automações configuram o logging em INFO ao serem importadas; aqui só interessa o resumo
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for name in args.automations or list(BENCHMARKS):
+        print(f"\n⏱️ Medindo '{name}' ({args.items} itens, latência {args.latency}ms, spinner {args.spinner}ms)...")
+        result = run_benchmark(name, args.items, args.latency, args.spinner)
+        results.append(result)
+        print(f"📊 {name}: {result['done']}/{result['items']} concluídos em {result['seconds']}s "
+              f"→ {result['items_per_minute']} itens/min")
+        for step in result['slowest_steps']:
+            print(f"   • {step['step']}: {step['count']}x p50={step['p50_s']}s p95={step['p95_s']}s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+
+    failed = [
+        r for r in results
+        if r['done'] < r['items'] or (args.min_rate is not None and r['items_per_minute'] < args.min_rate)
+    ]
+    for r in failed:
+        print(f"❌ {r['automation']}: abaixo do esperado ({r['done']}/{r['items']} itens, {r['items_per_minute']} itens/min)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,24 @@
-import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from datetime import datetime
 import time
 import logging
 import locale
 
+from billing_webforms import (
+    BillingWebFormsClient, BillingHttpError, RESULTS_TABLE_ID, SEARCH_FIELD_ID, active_contract_counts,
+)
+from checkpoint_journal import open_journal
+from driver_factory import create_chrome, handoff_to_headless
+from session_vault import open_vault
+from sheet_ingest import read_code_column, sheet_columns
+from run_telemetry import timed, note_retry, export_metrics
+from batch_mode import ask, pause, wait_for_login, should_retry, continue_after_failure, batch_requested
+from table_snapshot import snapshot_table
+from worker_pool import WorkerPool
+
 # Configurar logging para acompanhar o progresso
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,6 +32,25 @@ except:
     except:
         logger.warning("Não foi possível configurar locale português")
 
+# Quantidade padrão de sessões simultâneas no modo paralelo
+DEFAULT_SESSIONS = 4
+
+# Cookie de sessão do ASP.NET: cada worker tenta obter o seu para não serializar requisições
+ASPNET_SESSION_COOKIE = "ASP.NET_SessionId"
+
+# Sessão do login manual guardada no cofre entre execuções
+SESSION_SITE = "billing"
+SESSION_CLIENT = "manual"
+
+# Reproduz as postbacks por HTTP (sem renderizar páginas); o navegador fica como fallback
+USE_HTTP_ENGINE = True
+
+# Cancela todos os contratos ativos a partir de uma única pesquisa (verificando uma vez no final)
+TERMINATE_ALL_PER_VISIT = True
+
+# Conta os contratos ativos de todos os IDs pelo motor HTTP antes de começar (IDs sem contratos não chegam ao navegador)
+USE_PREFLIGHT = True
+
 class ScopeBillingAutomation:
     def __init__(self):
         self.base_url = "https://billing.scopemp.net/Scope.Billing.Web/"
@@ -35,24 +63,77 @@ class ScopeBillingAutomation:
         self.total_contracts_terminated = 0
         self.error_ids = []  # Lista para armazenar IDs que deram erro
         self.no_active_contracts_ids = []  # Lista para IDs sem contratos ativos
+        self.journal = None
+        self.interactive = True  # Workers paralelos não podem perguntar nada ao usuário
+        self.session_cookies = []  # Cookies do login manual, copiados para os workers
+        self.http = None  # Motor HTTP (BillingWebFormsClient) quando disponível
+        self.vault = open_vault()
+        
+    def create_driver(self, headless=False):
+        """Cria o navegador, sem navegar nem fazer login"""
+        self.driver = create_chrome(
+            headless=headless,
+            extra_args=("--disable-web-security", "--allow-running-insecure-content")
+        )
+        self.wait = WebDriverWait(self.driver, 15)
+    
+    def continue_headless(self):
+        """Depois do login manual, segue o trabalho em navegador do perfil de vazão"""
+        driver = handoff_to_headless(
+            self.driver, self.contracts_url,
+            ready=lambda d: WebDriverWait(d, 20).until(EC.presence_of_element_located((By.ID, SEARCH_FIELD_ID)))
+        )
+        if driver is not self.driver:
+            self.driver = driver
+            self.wait = WebDriverWait(self.driver, 15)
         
     def setup_driver(self):
         """Cria uma nova sessão do Chrome"""
-        chrome_options = Options()
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 15)
+        self.create_driver()
         
         logger.info("Nova sessão do Chrome criada")
         logger.info("Navegando para o sistema...")
         
+        if self.restore_saved_session():
+            self.continue_headless()
+            return
+        
         self.driver.get(self.base_url)
         
-        logger.info("Por favor, faça login manualmente no sistema e pressione Enter para continuar...")
-        input()
+        if batch_requested():
+            logger.info("Por favor, faça login manualmente no sistema; a automação continua sozinha após o login...")
+        else:
+            logger.info("Por favor, faça login manualmente no sistema e pressione Enter para continuar...")
+        logged_in = wait_for_login(self.driver, self.is_logged_in, "")
+        if not logged_in and batch_requested():
+            raise RuntimeError("login manual não concluído no modo batch")
+        self.vault.capture(self.driver, SESSION_SITE, SESSION_CLIENT)
+        self.continue_headless()
+    
+    def is_logged_in(self, driver):
+        """Indica que o navegador saiu da tela de login do sistema"""
+        url = driver.current_url
+        return url.startswith(self.base_url) and 'login' not in url.lower()
+    
+    def restore_saved_session(self):
+        """
+        Reaproveita a sessão salva do login manual, validada com uma abertura da página de contratos
+        
+        Returns:
+            bool: True se a página de contratos abriu autenticada
+        """
+        if not self.vault.restore(self.driver, SESSION_SITE, SESSION_CLIENT):
+            return False
+        
+        self.driver.get(self.contracts_url)
+        if self.driver.find_elements(By.ID, "ctl00_ContentPlaceHolder1_txt_BillableEntityDescription"):
+            logger.info("♻️ Sessão salva reaproveitada, login manual dispensado")
+            return True
+        
+        logger.info("Sessão salva expirada, login manual necessário")
+        self.vault.forget(SESSION_SITE, SESSION_CLIENT)
+        self.vault.clear_browser(self.driver)
+        return False
         
     def get_equipment_ids(self):
         """Permite ao usuário escolher entre Excel ou inserção manual"""
@@ -63,6 +144,10 @@ class ScopeBillingAutomation:
         print("1. Importar de arquivo Excel")
         print("2. Inserir manualmente no terminal")
         
+        # Sem interação, os IDs vêm sempre do Excel
+        if batch_requested():
+            return self.read_excel_ids()
+        
         while True:
             choice = input("\nEscolha uma opção (1 ou 2): ").strip()
             
@@ -76,31 +161,34 @@ class ScopeBillingAutomation:
     def read_excel_ids(self):
         """Lê os IDs do arquivo Excel"""
         try:
-            excel_file = input("Digite o caminho do arquivo Excel (ou apenas o nome se estiver na mesma pasta): ").strip()
+            excel_file = ask('arquivo_ids', "Digite o caminho do arquivo Excel (ou apenas o nome se estiver na mesma pasta): ")
             if not excel_file:
                 excel_file = "ID_billing.xlsx"  # Nome padrão
             
-            df = pd.read_excel(excel_file)
+            columns = sheet_columns(excel_file)
             
             # Tenta diferentes nomes de coluna possíveis
             possible_columns = ['ID', 'id', 'Id', 'Equipment_ID', 'EquipmentID', 'Equipamento']
             
             id_column = None
             for col in possible_columns:
-                if col in df.columns:
+                if col in columns:
                     id_column = col
                     break
             
             if id_column is None:
-                logger.info(f"Colunas disponíveis: {list(df.columns)}")
-                id_column = input("Digite o nome da coluna que contém os IDs: ")
+                logger.info(f"Colunas disponíveis: {columns}")
+                id_column = ask('coluna_ids', "Digite o nome da coluna que contém os IDs: ", columns[0])
             
-            ids = df[id_column].dropna().astype(str).tolist()
+            # Lê só a coluna dos IDs, sem repetidos
+            ids = read_code_column(excel_file, id_column)
             logger.info(f"✅ Lidos {len(ids)} IDs do arquivo Excel (coluna: {id_column})")
             return ids
             
         except Exception as e:
             logger.error(f"❌ Erro ao ler arquivo Excel: {e}")
+            if batch_requested():
+                return []
             print("Deseja tentar inserir os IDs manualmente? (s/n): ", end="")
             if input().lower() == 's':
                 return self.input_manual_ids()
@@ -152,6 +240,7 @@ class ScopeBillingAutomation:
             logger.error(f"Erro ao navegar para contratos: {e}")
             raise
     
+    @timed()
     def search_equipment(self, equipment_id):
         """Pesquisa um equipamento pelo ID"""
         try:
@@ -239,73 +328,72 @@ class ScopeBillingAutomation:
         except Exception as e:
             logger.error(f"❌ Erro no debug da tabela: {e}")
 
-    def get_active_contracts(self):
-        """Encontra APENAS os contratos com status 'Active' na página atual"""
+    def get_active_contract_actions(self):
+        """
+        Encontra APENAS os contratos com status 'Active' na página atual
+        
+        A tabela inteira é lida em uma única chamada ao navegador (table_snapshot),
+        então o custo não cresce com o número de linhas.
+        
+        Returns:
+            list: ações 'Termination' (dicionários do snapshot com 'element', 'id' e 'href')
+        """
         try:
             # Aguardar a tabela de resultados carregar
             time.sleep(3)
             
             # Aguardar a tabela aparecer
-            search_results_table = self.wait.until(
+            self.wait.until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_gv_SearchResults"))
             )
             
             logger.info("Tabela de resultados encontrada, analisando contratos...")
             
-            # Encontrar todas as linhas da tabela (excluindo cabeçalho)
-            contract_rows = search_results_table.find_elements(By.XPATH, ".//tr[position()>1]")
+            # Todas as linhas da tabela (excluindo cabeçalho) em um único snapshot
+            rows = snapshot_table(
+                self.driver, "#ctl00_ContentPlaceHolder1_gv_SearchResults",
+                row_selector="tr", action_selector="a[id*='lb_ContractTermination']"
+            ) or []
+            contract_rows = rows[1:]
             
-            active_termination_links = []
+            active_termination_actions = []
             total_contracts = 0
             active_contracts = 0
             inactive_contracts = 0
             
             for i, row in enumerate(contract_rows):
-                try:
-                    # Buscar todas as células da linha atual
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    
-                    if len(cells) < 3:  # Verificar se tem células suficientes
-                        continue
-                    
-                    total_contracts += 1
-                    
-                    # A terceira célula (índice 2) contém o status "Active" ou "Inactive"
-                    status_cell = cells[2]
-                    status_text = status_cell.text.strip().upper()
-                    
-                    logger.info(f"📋 Linha {i+1}: Status = '{status_text}'")
+                cells = row['cells']
+                
+                if len(cells) < 3:  # Verificar se tem células suficientes
+                    continue
+                
+                total_contracts += 1
+                
+                # A terceira célula (índice 2) contém o status "Active" ou "Inactive"
+                status_text = cells[2].upper()
+                
+                logger.info(f"📋 Linha {i+1}: Status = '{status_text}'")
+                
+                # APENAS processar se o status for exatamente "ACTIVE"
+                if status_text == "ACTIVE":
+                    active_contracts += 1
                     
-                    # APENAS processar se o status for exatamente "ACTIVE"
-                    if status_text == "ACTIVE":
-                        active_contracts += 1
-                        
-                        # Procurar pelo link "Termination" nesta linha
-                        try:
-                            termination_link = row.find_element(
-                                By.XPATH, 
-                                ".//a[contains(@id, 'lb_ContractTermination') and contains(text(), 'Termination')]"
-                            )
-                            
-                            if termination_link.is_displayed() and termination_link.is_enabled():
-                                active_termination_links.append(termination_link)
-                                logger.info(f"✅ Contrato ATIVO encontrado na linha {i+1} - SERÁ PROCESSADO")
-                            else:
-                                logger.warning(f"⚠️ Contrato ativo na linha {i+1} mas link 'Termination' não está disponível")
-                                
-                        except Exception as link_error:
-                            logger.warning(f"⚠️ Contrato ativo na linha {i+1} mas erro ao encontrar link 'Termination': {link_error}")
-                            
-                    elif "INACTIVE" in status_text or "CANCELLED" in status_text:
-                        inactive_contracts += 1
-                        logger.info(f"⏸️ Contrato na linha {i+1} está INATIVO - IGNORADO")
-                        
+                    # Procurar pelo link "Termination" nesta linha
+                    links = [a for a in row['actions'] if 'Termination' in a['text']]
+                    if not links:
+                        logger.warning(f"⚠️ Contrato ativo na linha {i+1} mas link 'Termination' não foi encontrado")
+                    elif links[0]['visible'] and links[0]['enabled']:
+                        active_termination_actions.append(links[0])
+                        logger.info(f"✅ Contrato ATIVO encontrado na linha {i+1} - SERÁ PROCESSADO")
                     else:
-                        logger.info(f"❓ Status desconhecido na linha {i+1}: '{status_text}' - IGNORADO")
+                        logger.warning(f"⚠️ Contrato ativo na linha {i+1} mas link 'Termination' não está disponível")
                         
-                except Exception as row_error:
-                    logger.error(f"❌ Erro ao processar linha {i+1}: {row_error}")
-                    continue
+                elif "INACTIVE" in status_text or "CANCELLED" in status_text:
+                    inactive_contracts += 1
+                    logger.info(f"⏸️ Contrato na linha {i+1} está INATIVO - IGNORADO")
+                    
+                else:
+                    logger.info(f"❓ Status desconhecido na linha {i+1}: '{status_text}' - IGNORADO")
             
             # Resumo dos contratos encontrados
             logger.info("="*50)
@@ -313,15 +401,19 @@ class ScopeBillingAutomation:
             logger.info(f"📋 Total de contratos: {total_contracts}")
             logger.info(f"✅ Contratos ativos (para processar): {active_contracts}")
             logger.info(f"⏸️ Contratos inativos (ignorados): {inactive_contracts}")
-            logger.info(f"🎯 Links válidos para cancelamento: {len(active_termination_links)}")
+            logger.info(f"🎯 Links válidos para cancelamento: {len(active_termination_actions)}")
             logger.info("="*50)
             
-            return active_termination_links
+            return active_termination_actions
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar contratos ativos: {e}")
             return []
     
+    def get_active_contracts(self):
+        """Links 'Termination' dos contratos com status 'Active' na página atual"""
+        return [action['element'] for action in self.get_active_contract_actions()]
+    
     def get_termination_date(self):
         """Solicita a data de terminação do usuário"""
         print("\n" + "="*50)
@@ -336,6 +428,15 @@ class ScopeBillingAutomation:
         suggested_date = f"{today.day} {months[today.month]} {today.year}"
         
         print(f"Data sugerida (hoje): {suggested_date}")
+        
+        # Sem interação: 'data_terminacao' do batch.json, ou a data de hoje
+        if batch_requested():
+            custom_date = ask('data_terminacao', "Data de terminação: ", suggested_date)
+            if not self.validate_date_format(custom_date):
+                raise ValueError(f"data_terminacao inválida no batch.json: {custom_date}")
+            self.termination_date = custom_date
+            return
+        
         print("\nOpções:")
         print("1. Usar data de hoje")
         print("2. Inserir data personalizada")
@@ -395,6 +496,7 @@ class ScopeBillingAutomation:
         except:
             return False
     
+    @timed()
     def terminate_contract(self, termination_link, equipment_id, contract_index):
         """Cancela um contrato específico"""
         try:
@@ -404,6 +506,16 @@ class ScopeBillingAutomation:
             self.driver.execute_script("arguments[0].click();", termination_link)
             time.sleep(2)
             
+            self.submit_termination_form(contract_index)
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao cancelar contrato {contract_index}: {e}")
+            raise
+    
+    @timed()
+    def submit_termination_form(self, contract_index):
+        """Preenche a data de terminação e confirma o cancelamento já aberto"""
+        try:
             # Aguardar o campo de data aparecer
             date_field = self.wait.until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_txt_TerminationDate"))
@@ -430,9 +542,173 @@ class ScopeBillingAutomation:
             logger.info(f"✅ Contrato {contract_index} cancelado com sucesso!")
             
         except Exception as e:
-            logger.error(f"❌ Erro ao cancelar contrato {contract_index}: {e}")
+            logger.error(f"❌ Erro ao confirmar cancelamento do contrato {contract_index}: {e}")
             raise
     
+    def get_termination_targets(self):
+        """
+        Lê, em uma única análise da tabela, os links de cancelamento de todos os contratos ativos
+        
+        Returns:
+            list: dicionários com 'id' (id do link, que segue a posição da linha na tabela)
+        """
+        return [{'id': action['id']} for action in self.get_active_contract_actions()]
+    
+    def fire_termination(self, target):
+        """
+        Abre o cancelamento de um contrato pelo link coletado
+        
+        Os ids seguem a posição da linha e foram lidos antes do primeiro cancelamento;
+        se o link sumiu ou a linha não está mais ativa, o contrato fica para a
+        verificação final, que pesquisa de novo.
+        
+        Returns:
+            bool: True se o cancelamento foi aberto
+        """
+        links = self.driver.find_elements(By.ID, target['id']) if target['id'] else []
+        if not links:
+            return False
+        status = self.driver.execute_script(
+            "var row = arguments[0].closest('tr');"
+            "return row && row.cells.length > 2 ? row.cells[2].textContent : '';",
+            links[0]
+        )
+        if (status or '').strip().upper() != 'ACTIVE':
+            return False
+        self.driver.execute_script("arguments[0].click();", links[0])
+        time.sleep(2)
+        return True
+    
+    @timed()
+    def terminate_all_in_one_visit(self, equipment_id, already_terminated=0):
+        """
+        Cancela em sequência todos os contratos ativos encontrados em uma única pesquisa
+        
+        Args:
+            already_terminated (int): contratos do ID já cancelados pelo motor HTTP (numeração dos logs)
+        
+        Returns:
+            tuple: (contratos cancelados, True se a página ainda mostra a pesquisa sem contratos ativos)
+        """
+        self.navigate_to_contracts()
+        self.search_equipment(equipment_id)
+        targets = self.get_termination_targets()
+        
+        if not targets:
+            return 0, True
+        
+        logger.info(f"🎯 {len(targets)} contrato(s) ativo(s) de {equipment_id} serão cancelados em sequência")
+        terminated = 0
+        
+        for target in targets:
+            contract_number = already_terminated + terminated + 1
+            try:
+                # Após a confirmação o sistema pode sair da tabela; pesquisar de novo só nesse caso
+                if not self.driver.find_elements(By.ID, "ctl00_ContentPlaceHolder1_gv_SearchResults"):
+                    self.navigate_to_contracts()
+                    self.search_equipment(equipment_id)
+                
+                logger.info(f"🎯 Cancelando contrato {contract_number} de {equipment_id}")
+                if not self.fire_termination(target):
+                    logger.info(f"⏭️ Link {target['id']} não está mais ativo na página; fica para a verificação final")
+                    continue
+                self.submit_termination_form(contract_number)
+                terminated += 1
+                self.total_contracts_terminated += 1
+                
+            except Exception as e:
+                # O contrato que falhou é retomado pela verificação final, um a um
+                logger.warning(f"⚠️ Falha no cancelamento em sequência de {equipment_id}: {e}")
+                break
+        
+        return terminated, False
+    
+    def setup_http_engine(self):
+        """Cria o motor HTTP a partir da sessão do navegador, se habilitado"""
+        if USE_HTTP_ENGINE:
+            self.http = BillingWebFormsClient.from_driver(self.driver, self.contracts_url)
+    
+    def close_http_engine(self):
+        """Fecha a sessão do motor HTTP"""
+        if self.http:
+            self.http.close()
+            self.http = None
+    
+    @timed()
+    def terminate_all_http(self, equipment_id):
+        """
+        Cancela os contratos ativos pelo motor HTTP e verifica o resultado com uma nova pesquisa
+        
+        Returns:
+            tuple: (contratos cancelados, contratos ativos restantes ou None se o motor falhou)
+        """
+        terminated = 0
+        try:
+            self.http.search(equipment_id)
+            contracts = self.http.active_contracts()
+            if not contracts:
+                return 0, 0
+            
+            logger.info(f"🎯 {len(contracts)} contrato(s) ativo(s) de {equipment_id} (HTTP)")
+            for contract in contracts:
+                # A confirmação pode sair da tabela; a postback seguinte precisa do ViewState da pesquisa
+                if self.http.page.get_element_by_id(RESULTS_TABLE_ID, None) is None:
+                    self.http.search(equipment_id)
+                self.http.terminate(contract, self.termination_date)
+                terminated += 1
+                self.total_contracts_terminated += 1
+                logger.info(f"✅ Contrato {terminated} de {equipment_id} cancelado (HTTP)")
+            
+            # Verificação única no final
+            self.http.search(equipment_id)
+            return terminated, len(self.http.active_contracts())
+            
+        except BillingHttpError as e:
+            logger.warning(f"⚠️ Motor HTTP falhou para {equipment_id}, usando o navegador: {e}")
+            return terminated, None
+    
+    @timed()
+    def preflight_active_contracts(self, equipment_ids):
+        """
+        Descarta, antes de processar, os IDs que já não têm contratos ativos
+        
+        As pesquisas usam o motor HTTP em várias sessões próprias do ASP.NET; IDs cuja
+        pesquisa falhou continuam na fila para o fluxo normal.
+        
+        Returns:
+            list: IDs com contratos ativos a cancelar
+        """
+        if not (USE_PREFLIGHT and self.http) or not equipment_ids:
+            return equipment_ids
+        
+        clients = [self.http]
+        for _ in range(min(DEFAULT_SESSIONS, len(equipment_ids)) - 1):
+            client = BillingWebFormsClient.from_driver(
+                self.driver, self.contracts_url, exclude_cookies=(ASPNET_SESSION_COOKIE,)
+            )
+            if client is None:
+                break
+            clients.append(client)
+        
+        logger.info(f"🔎 Conferindo contratos ativos de {len(equipment_ids)} IDs ({len(clients)} sessões HTTP)...")
+        try:
+            counts = active_contract_counts(clients, equipment_ids)
+        finally:
+            for client in clients[1:]:
+                client.close()
+        
+        pending_ids = []
+        for equipment_id in equipment_ids:
+            if counts.get(equipment_id) == 0:
+                self.no_active_contracts_ids.append(equipment_id)
+                self.record_checkpoint(equipment_id)
+            else:
+                pending_ids.append(equipment_id)
+        
+        logger.info(f"📋 Sem contratos ativos: {len(self.no_active_contracts_ids)} | A cancelar: {len(pending_ids)}")
+        return pending_ids
+    
+    @timed()
     def process_equipment(self, equipment_id):
         """Processa um equipamento: pesquisa e cancela TODOS os contratos ativos"""
         try:
@@ -440,16 +716,38 @@ class ScopeBillingAutomation:
             
             contracts_terminated = 0
             attempt = 1
+            failures = 0
             max_attempts = 10  # Limite de segurança para evitar loop infinito
             
+            if self.http:
+                contracts_terminated, remaining = self.terminate_all_http(equipment_id)
+                if remaining == 0:
+                    if contracts_terminated == 0:
+                        logger.info(f"ℹ️ Nenhum contrato ATIVO encontrado para {equipment_id}")
+                        self.no_active_contracts_ids.append(equipment_id)
+                        return True
+                    self.processed_count += 1
+                    logger.info(f"🎉 Equipamento {equipment_id} processado com sucesso! ({contracts_terminated} contratos cancelados)")
+                    return True
+            
+            # Cancelar tudo a partir de uma pesquisa; o laço abaixo passa a ser a verificação final
+            results_on_page = False
+            if TERMINATE_ALL_PER_VISIT:
+                terminated, results_on_page = self.terminate_all_in_one_visit(equipment_id, contracts_terminated)
+                contracts_terminated += terminated
+            
             while attempt <= max_attempts:
                 logger.info(f"--- Tentativa {attempt}: Buscando contratos ativos para {equipment_id} ---")
                 
-                # Navegar para página de contratos
-                self.navigate_to_contracts()
-                
-                # Pesquisar o equipamento
-                self.search_equipment(equipment_id)
+                if results_on_page:
+                    # A pesquisa atual já mostrou que não há contratos ativos
+                    results_on_page = False
+                else:
+                    # Navegar para página de contratos
+                    self.navigate_to_contracts()
+                    
+                    # Pesquisar o equipamento
+                    self.search_equipment(equipment_id)
                 
                 # Encontrar contratos ativos
                 active_contracts = self.get_active_contracts()
@@ -494,15 +792,18 @@ class ScopeBillingAutomation:
                     
                 except Exception as e:
                     logger.error(f"❌ Erro ao cancelar contrato {contract_number} do equipamento {equipment_id}: {e}")
+                    failures += 1
                     
-                    # Adicionar ID à lista de erros
-                    if equipment_id not in self.error_ids:
-                        self.error_ids.append(equipment_id)
-                    
-                    # Perguntar se deve tentar novamente ou pular este contrato
-                    response = input(f"Erro ao cancelar contrato. Tentar novamente? (s/n): ")
-                    if response.lower() != 's':
+                    # Perguntar (ou, no modo batch, seguir a política) se deve tentar novamente
+                    retry = (self.interactive or batch_requested()) and should_retry(
+                        'cancelamento', failures, "Erro ao cancelar contrato. Tentar novamente? (s/n): "
+                    )
+                    if not retry:
+                        # Adicionar ID à lista de erros e pular este contrato
+                        if equipment_id not in self.error_ids:
+                            self.error_ids.append(equipment_id)
                         break
+                    note_retry()
                 
                 attempt += 1
             
@@ -526,6 +827,157 @@ class ScopeBillingAutomation:
                 self.error_ids.append(equipment_id)
             return False
     
+    def record_checkpoint(self, equipment_id):
+        """Registra o resultado do equipamento no diário de checkpoint"""
+        if equipment_id in self.error_ids:
+            status = 'error'
+        elif equipment_id in self.no_active_contracts_ids:
+            status = 'skipped'
+        else:
+            status = 'success'
+        self.journal.record(equipment_id, status, data_terminacao=self.termination_date)
+    
+    def ask_session_count(self):
+        """Pergunta quantas sessões devem cancelar contratos em paralelo"""
+        while True:
+            print("\n" + "="*50)
+            print("MODO DE EXECUÇÃO")
+            print("="*50)
+            print("1. Sequencial (apenas este navegador)")
+            print("2. Paralelo (várias sessões com o mesmo login)")
+            
+            # Sem interação: 'sessoes' do batch.json (1 é sequencial)
+            if batch_requested():
+                choice = '2'
+            else:
+                choice = input("\nEscolha uma opção (1 ou 2): ").strip()
+            
+            if choice == '1':
+                return 1
+            elif choice == '2':
+                sessions = ask('sessoes', f"Quantidade de sessões simultâneas [{DEFAULT_SESSIONS}]: ", DEFAULT_SESSIONS)
+                if not sessions:
+                    return DEFAULT_SESSIONS
+                if sessions.isdigit() and int(sessions) > 0:
+                    return int(sessions)
+                print("❌ Quantidade inválida.")
+                if batch_requested():
+                    return DEFAULT_SESSIONS
+            else:
+                print("❌ Opção inválida. Digite 1 ou 2.")
+    
+    def clone_session(self, cookies):
+        """
+        Autentica o navegador deste worker com os cookies do login manual
+        
+        Primeiro tenta sem o cookie de sessão do ASP.NET, para que o servidor
+        crie uma sessão própria (requisições da mesma sessão são serializadas).
+        Se a página de contratos não abrir assim, copia todos os cookies.
+        
+        Returns:
+            bool: True se a página de contratos abriu autenticada
+        """
+        attempts = [
+            [c for c in cookies if c['name'] != ASPNET_SESSION_COOKIE],
+            cookies,
+        ]
+        
+        for attempt in attempts:
+            # Cookies só podem ser gravados estando no domínio do sistema
+            self.driver.get(self.base_url)
+            self.driver.delete_all_cookies()
+            for cookie in attempt:
+                cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'secure', 'httpOnly', 'expiry')}
+                self.driver.add_cookie(cookie)
+            
+            self.driver.get(self.contracts_url)
+            if self.driver.find_elements(By.ID, "ctl00_ContentPlaceHolder1_txt_BillableEntityDescription"):
+                return True
+        
+        return False
+    
+    def run_shard_worker(self, shard, equipment_ids):
+        """Processa uma fatia dos IDs em um navegador headless autenticado com os cookies do login"""
+        worker = ScopeBillingAutomation()
+        worker.termination_date = self.termination_date
+        worker.journal = self.journal
+        worker.interactive = False
+        
+        worker.create_driver(headless=True)
+        try:
+            if not worker.clone_session(self.session_cookies):
+                raise RuntimeError("Sessão clonada não foi aceita pelo sistema")
+            
+            logger.info(f"[{shard}] Sessão autenticada, {len(equipment_ids)} equipamentos")
+            worker.setup_http_engine()
+            for i, equipment_id in enumerate(equipment_ids, 1):
+                logger.info(f"\n--- [{shard}] Progresso: {i}/{len(equipment_ids)} ---")
+                worker.process_equipment(equipment_id)
+                worker.record_checkpoint(equipment_id)
+            
+            return worker
+        finally:
+            worker.close_http_engine()
+            worker.driver.quit()
+    
+    def absorb(self, worker):
+        """Soma os resultados de um worker aos desta instância (usados no relatório final)"""
+        self.processed_count += worker.processed_count
+        self.error_count += worker.error_count
+        self.total_contracts_terminated += worker.total_contracts_terminated
+        self.error_ids.extend(worker.error_ids)
+        self.no_active_contracts_ids.extend(worker.no_active_contracts_ids)
+    
+    def run_parallel(self, equipment_ids, sessions):
+        """Divide os IDs entre várias sessões clonadas do login manual e une os resultados"""
+        self.session_cookies = self.driver.get_cookies()
+        sessions = min(sessions, len(equipment_ids))
+        
+        # Distribuição intercalada: cada sessão recebe IDs de toda a lista
+        shards = {
+            f"sessão {n + 1}": equipment_ids[n::sessions]
+            for n in range(sessions)
+        }
+        
+        logger.info(f"⚡ Modo paralelo: {len(equipment_ids)} equipamentos em {sessions} sessões")
+        
+        for shard, worker, error in WorkerPool(sessions).run(shards, self.run_shard_worker):
+            if error is None:
+                self.absorb(worker)
+                continue
+            
+            # Worker caiu: IDs sem resultado no diário ficam como erro
+            for equipment_id in shards[shard]:
+                if not self.journal.is_done(equipment_id) and equipment_id not in self.error_ids:
+                    self.error_ids.append(equipment_id)
+                    self.error_count += 1
+    
+    def run_sequential(self, equipment_ids):
+        """Processa os IDs um a um no navegador do login manual"""
+        for i, equipment_id in enumerate(equipment_ids, 1):
+            try:
+                logger.info(f"\n--- Progresso: {i}/{len(equipment_ids)} ---")
+                success = self.process_equipment(equipment_id)
+                self.record_checkpoint(equipment_id)
+                
+                if not success:
+                    # Perguntar se deve continuar em caso de erro crítico
+                    if not continue_after_failure('equipamento', f"Erro crítico ao processar {equipment_id}. Continuar? (s/n): "):
+                        break
+                
+                # Pausa entre equipamentos
+                time.sleep(1)
+                
+            except KeyboardInterrupt:
+                logger.info("Automação interrompida pelo usuário")
+                break
+            except Exception as e:
+                logger.error(f"Erro crítico ao processar {equipment_id}: {e}")
+                self.error_count += 1
+                if equipment_id not in self.error_ids:
+                    self.error_ids.append(equipment_id)
+                continue
+    
     def run_automation(self):
         """Executa todo o processo de automação"""
         try:
@@ -539,36 +991,30 @@ class ScopeBillingAutomation:
                 logger.error("Nenhum ID encontrado")
                 return
             
+            # Retomar execução anterior (pula IDs já concluídos)
+            self.journal = open_journal('billing')
+            pending_ids = self.journal.pending(equipment_ids)
+            if len(pending_ids) < len(equipment_ids):
+                logger.info(f"⏭️ {len(equipment_ids) - len(pending_ids)} IDs já concluídos foram pulados")
+            equipment_ids = pending_ids
+            
             # Solicitar data de terminação
             self.get_termination_date()
             
-            logger.info(f"Iniciando processamento de {len(equipment_ids)} equipamentos")
+            self.setup_http_engine()
+            
+            # Só os IDs que ainda têm contratos ativos seguem para o cancelamento
+            pending_ids = self.preflight_active_contracts(equipment_ids)
+            
+            logger.info(f"Iniciando processamento de {len(pending_ids)} equipamentos")
             logger.info("ℹ️ MODO AUTOMÁTICO: O processo continuará automaticamente mesmo quando não encontrar contratos ativos")
             
-            # Processar cada equipamento
-            for i, equipment_id in enumerate(equipment_ids, 1):
-                try:
-                    logger.info(f"\n--- Progresso: {i}/{len(equipment_ids)} ---")
-                    success = self.process_equipment(equipment_id)
-                    
-                    if not success:
-                        # Perguntar se deve continuar em caso de erro crítico
-                        response = input(f"Erro crítico ao processar {equipment_id}. Continuar? (s/n): ")
-                        if response.lower() != 's':
-                            break
-                    
-                    # Pausa entre equipamentos
-                    time.sleep(1)
-                    
-                except KeyboardInterrupt:
-                    logger.info("Automação interrompida pelo usuário")
-                    break
-                except Exception as e:
-                    logger.error(f"Erro crítico ao processar {equipment_id}: {e}")
-                    self.error_count += 1
-                    if equipment_id not in self.error_ids:
-                        self.error_ids.append(equipment_id)
-                    continue
+            # Processar os equipamentos (em paralelo quando escolhido)
+            sessions = self.ask_session_count() if len(pending_ids) > 1 else 1
+            if sessions > 1:
+                self.run_parallel(pending_ids, sessions)
+            elif pending_ids:
+                self.run_sequential(pending_ids)
             
             # Relatório final
             self.print_final_report(equipment_ids)
@@ -576,8 +1022,12 @@ class ScopeBillingAutomation:
         except Exception as e:
             logger.error(f"Erro geral na automação: {e}")
         finally:
+            self.close_http_engine()
+            if self.journal:
+                self.journal.close()
+            export_metrics('billing')
             if self.driver:
-                input("Pressione Enter para fechar o navegador...")
+                pause("Pressione Enter para fechar o navegador...")
                 self.driver.quit()
     
     def print_final_report(self, equipment_ids):
@@ -663,8 +1113,12 @@ def main():
     print("INSTRUÇÕES:")
     print("1. O script abrirá o Chrome automaticamente")
     print("2. Faça login no sistema Scope Billing")
-    print("3. Pressione Enter para continuar")
-    print("4. Configure os IDs e data de terminação")
+    if batch_requested():
+        print("3. A automação continua sozinha após o login")
+        print("4. IDs e data de terminação vêm do batch.json")
+    else:
+        print("3. Pressione Enter para continuar")
+        print("4. Configure os IDs e data de terminação")
     print("5. O processo continuará automaticamente")
     print("="*50)
     
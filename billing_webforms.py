@@ -0,0 +1,227 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+# IDs dos controles da página ContractMaintenance.aspx
+SEARCH_FIELD_ID = "ctl00_ContentPlaceHolder1_txt_BillableEntityDescription"
+RESULTS_TABLE_ID = "ctl00_ContentPlaceHolder1_gv_SearchResults"
+TERMINATION_DATE_ID = "ctl00_ContentPlaceHolder1_txt_TerminationDate"
+TERMINATE_BUTTON_ID = "ctl00_ContentPlaceHolder1_cmd_Terminate"
+
+# Extrai o UniqueID do controle a partir do href "javascript:__doPostBack('...','')"
+POSTBACK_TARGET_RE = re.compile(r"__doPostBack\('([^']+)'")
+
+
+class BillingHttpError(Exception):
+    """Falha no motor HTTP; o navegador deve assumir o equipamento"""
+
+
+class BillingWebFormsClient:
+    """Reproduz as postbacks da página de contratos sem navegador, mantendo ViewState/EventValidation"""
+
+    def __init__(self, session, contracts_url, timeout=30):
+        """
+        Args:
+            session: requests.Session já autenticada
+            contracts_url (str): URL da ContractMaintenance.aspx
+            timeout (int): tempo máximo de cada requisição em segundos
+        """
+        self.session = session
+        self.contracts_url = contracts_url
+        self.timeout = timeout
+        self.page = None
+        self.page_url = contracts_url
+
+    @classmethod
+    def from_driver(cls, driver, contracts_url, timeout=30, exclude_cookies=()):
+        """
+        Cria o cliente a partir do navegador já logado
+
+        Args:
+            exclude_cookies: nomes de cookies não copiados (ex.: o de sessão do ASP.NET,
+                para o servidor abrir uma sessão própria que não serializa com as demais)
+
+        Returns:
+            BillingWebFormsClient ou None se o motor HTTP não puder ser usado
+        """
+        if requests is None or lxml_html is None:
+            logger.warning("Pacotes 'requests'/'lxml' não instalados; usando apenas o navegador")
+            return None
+
+        session = requests.Session()
+        session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent;")
+        for cookie in driver.get_cookies():
+            if cookie['name'] in exclude_cookies:
+                continue
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        client = cls(session, contracts_url, timeout)
+        try:
+            client.load()
+            client.control(SEARCH_FIELD_ID)
+        except BillingHttpError as e:
+            logger.warning(f"Motor HTTP do Billing indisponível, usando apenas o navegador: {e}")
+            session.close()
+            return None
+
+        logger.info("Motor HTTP do Billing ativo")
+        return client
+
+    def parse(self, response):
+        """Guarda a página recebida como estado atual do formulário"""
+        if response.status_code >= 400:
+            raise BillingHttpError(f"HTTP {response.status_code} em {response.url}")
+        self.page = lxml_html.fromstring(response.content)
+        self.page_url = response.url
+        if not self.page.xpath("//form"):
+            raise BillingHttpError(f"Página sem formulário (sessão expirada?): {response.url}")
+
+    def load(self):
+        """Abre a página de contratos do zero"""
+        try:
+            self.parse(self.session.get(self.contracts_url, timeout=self.timeout))
+        except requests.RequestException as e:
+            raise BillingHttpError(f"GET {self.contracts_url}: {e}")
+
+    def control(self, element_id):
+        """Retorna o elemento da página atual pelo id, ou BillingHttpError se ausente"""
+        found = self.page.get_element_by_id(element_id, None)
+        if found is None:
+            raise BillingHttpError(f"Controle {element_id} não encontrado na página")
+        return found
+
+    def form_fields(self):
+        """Campos que o navegador enviaria no submit (hidden, textos, selects e checkboxes marcadas)"""
+        form = self.page.xpath("//form")[0]
+        fields = {}
+        for el in form.xpath(".//input[@name] | .//select[@name] | .//textarea[@name]"):
+            name = el.get('name')
+            tag = el.tag.lower()
+            kind = (el.get('type') or 'text').lower()
+
+            if tag == 'select':
+                selected = el.xpath(".//option[@selected]") or el.xpath(".//option")[:1]
+                fields[name] = selected[0].get('value', selected[0].text_content()) if selected else ''
+            elif tag == 'textarea':
+                fields[name] = el.text_content()
+            elif kind in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            elif kind in ('checkbox', 'radio'):
+                if el.get('checked') is not None:
+                    fields[name] = el.get('value', 'on')
+            else:
+                fields[name] = el.get('value', '')
+        return fields
+
+    def post(self, event_target='', button=None, **overrides):
+        """
+        Envia o formulário atual como uma postback do ASP.NET
+
+        Args:
+            event_target (str): UniqueID do controle (__EVENTTARGET) para LinkButtons
+            button: elemento submit que dispara o envio (nome/valor vão no corpo)
+            overrides: valores de campos por id do controle
+        """
+        fields = self.form_fields()
+        fields['__EVENTTARGET'] = event_target
+        fields['__EVENTARGUMENT'] = ''
+        for element_id, value in overrides.items():
+            fields[self.control(element_id).get('name')] = value
+        if button is not None:
+            fields[button.get('name')] = button.get('value', '')
+
+        action = urljoin(self.page_url, self.page.xpath("//form")[0].get('action') or self.page_url)
+        try:
+            self.parse(self.session.post(action, data=fields, timeout=self.timeout))
+        except requests.RequestException as e:
+            raise BillingHttpError(f"POST {action}: {e}")
+
+    def click(self, element_id, **overrides):
+        """Aciona um botão (submit) ou LinkButton (__doPostBack) da página atual"""
+        element = self.control(element_id)
+        if element.tag.lower() in ('input', 'button') and element.get('name'):
+            self.post(button=element, **overrides)
+            return
+        match = POSTBACK_TARGET_RE.search(element.get('href') or element.get('onclick') or '')
+        if not match:
+            raise BillingHttpError(f"Controle {element_id} não dispara postback")
+        self.post(event_target=match.group(1), **overrides)
+
+    def search(self, equipment_id):
+        """Pesquisa o equipamento (equivale a digitar o ID e pressionar Enter)"""
+        self.load()
+        # Enter no campo envia o formulário pelo primeiro botão submit (submissão implícita do HTML)
+        buttons = self.page.xpath("//form//input[@type='submit' and @name] | //form//button[@type='submit' and @name]")
+        self.post(button=buttons[0] if buttons else None, **{SEARCH_FIELD_ID: str(equipment_id)})
+
+    def active_contracts(self):
+        """
+        Lê a tabela de resultados da página atual
+
+        Returns:
+            list: dicionários com 'id' e 'postback' do link de Termination de cada contrato ativo
+        """
+        table = self.page.get_element_by_id(RESULTS_TABLE_ID, None)
+        if table is None:
+            return []
+
+        contracts = []
+        for row in table.xpath(".//tr[position()>1]"):
+            cells = row.xpath("./td")
+            if len(cells) < 3 or cells[2].text_content().strip().upper() != 'ACTIVE':
+                continue
+            for link in row.xpath(".//a[contains(@id, 'lb_ContractTermination')]"):
+                match = POSTBACK_TARGET_RE.search(link.get('href') or '')
+                if match and link.get('disabled') is None:
+                    contracts.append({'id': link.get('id'), 'postback': match.group(1)})
+        return contracts
+
+    def terminate(self, contract, termination_date):
+        """Abre o cancelamento do contrato e confirma com a data informada"""
+        self.post(event_target=contract['postback'])
+        self.control(TERMINATION_DATE_ID)
+        self.click(TERMINATE_BUTTON_ID, **{TERMINATION_DATE_ID: termination_date})
+
+    def close(self):
+        """Fecha as conexões da sessão HTTP"""
+        self.session.close()
+
+
+def active_contract_counts(clients, equipment_ids):
+    """
+    Conta os contratos ativos de cada ID, dividindo a lista entre os clientes (um por thread)
+
+    Cada cliente guarda o ViewState da própria página, por isso processa sua fatia em sequência.
+
+    Returns:
+        dict: ID -> quantidade de contratos ativos, ou BillingHttpError se a pesquisa falhou
+    """
+    def count_shard(client, shard):
+        counts = {}
+        for equipment_id in shard:
+            try:
+                client.search(equipment_id)
+                counts[equipment_id] = len(client.active_contracts())
+            except BillingHttpError as e:
+                counts[equipment_id] = e
+        return counts
+
+    shards = [(client, equipment_ids[n::len(clients)]) for n, client in enumerate(clients)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        for counts in executor.map(lambda args: count_shard(*args), shards):
+            results.update(counts)
+    return results
@@ -48,6 +48,7 @@ a = Analysis(
         ('qtgo_automation.py', '.'),
         ('setup_automation.py', '.'),
         ('odometer_setup.py', '.'),
+        ('vehicle_pipeline.py', '.'),
     ],
     hiddenimports=[
         'selenium',
@@ -67,7 +68,26 @@ a = Analysis(
         'billing_automation',
         'qtgo_automation',
         'setup_automation',
-        'odometer_setup'
+        'odometer_setup',
+        'page_readiness',
+        'worker_pool',
+        'checkpoint_journal',
+        'mzone_transport',
+        'group_modal_index',
+        'adaptive_batcher',
+        'billing_webforms',
+        'table_snapshot',
+        'quantigo_api',
+        'locator_cache',
+        'session_vault',
+        'client_contexts',
+        'vehicle_pipeline',
+        'sheet_ingest',
+        'driver_factory',
+        'vehicle_index',
+        'run_telemetry',
+        'batch_mode',
+        'group_modal_locators'
     ],
     hookspath=[],
     hooksconfig={},
@@ -119,6 +139,7 @@ def verificar_arquivos():
         'qtgo_automation.py',
         'setup_automation.py',       # Nova automação
         'odometer_setup.py',         # Nova automação
+        'vehicle_pipeline.py',       # Setup + odômetro em uma passada
         'AdicionarGrupo.xlsx',
         'RemoverGrupo.xlsx', 
         'ID_billing.xlsx',
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import threading
+import logging
+from datetime import datetime
+
+from batch_mode import confirm
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = 'checkpoints'
+
+# Resultados definitivos: itens com esses status não são refeitos ao retomar
+# ('uncertain': escrita possivelmente aplicada pelo servidor; conferir antes de refazer à mão)
+DONE_STATUSES = {'success', 'not_found', 'skipped', 'uncertain'}
+
+
+class CheckpointJournal:
+    """Diário append-only (JSONL) com o resultado de cada item processado"""
+
+    def __init__(self, name, directory=CHECKPOINT_DIR, fsync_every=10):
+        """
+        Args:
+            name (str): nome da automação (define o arquivo do diário)
+            directory (str): pasta onde os diários são gravados
+            fsync_every (int): quantidade de registros entre cada fsync
+        """
+        self.name = name
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.fsync_every = max(1, fsync_every)
+        self.entries = {}
+        self.file = None
+        self.unsynced = 0
+        self.lock = threading.Lock()
+
+    def has_entries(self):
+        """Indica se existe um diário anterior com registros"""
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def load(self):
+        """Lê o diário existente; o último registro de cada item prevalece"""
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return self.entries
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha pode ter ficado pela metade em um crash
+                    logger.warning(f"Linha inválida ignorada no diário {self.path}")
+                    continue
+                self.entries[entry['key']] = entry
+
+        logger.info(f"Diário carregado: {len(self.entries)} itens em {self.path}")
+        return self.entries
+
+    def rotate(self):
+        """Arquiva o diário anterior para começar uma execução nova"""
+        if self.has_entries():
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            archived = os.path.join(self.directory, f"{self.name}_{timestamp}.jsonl")
+            os.replace(self.path, archived)
+            logger.info(f"Diário anterior arquivado em {archived}")
+        self.entries = {}
+
+    def is_done(self, key):
+        """Indica se o item já tem resultado definitivo no diário"""
+        entry = self.entries.get(str(key))
+        return entry is not None and entry['status'] in DONE_STATUSES
+
+    def pending(self, items, key_fn=str):
+        """Filtra os itens que ainda não foram concluídos"""
+        return [item for item in items if not self.is_done(key_fn(item))]
+
+    def record(self, key, status, **data):
+        """Grava o resultado de um item assim que ele termina"""
+        entry = {
+            'key': str(key),
+            'status': status,
+            'ts': datetime.now().isoformat(timespec='seconds'),
+        }
+        entry.update({k: str(v) for k, v in data.items()})
+
+        with self.lock:
+            if self.file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.file = open(self.path, 'a', encoding='utf-8')
+
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+            self.entries[entry['key']] = entry
+
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+
+    def close(self):
+        """Sincroniza e fecha o arquivo do diário"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+                self.unsynced = 0
+
+
+def resume_requested():
+    """Indica se o script foi chamado com --resume"""
+    return '--resume' in sys.argv
+
+
+def open_journal(name):
+    """
+    Abre o diário da automação, retomando a execução anterior quando pedido
+
+    Com --resume o diário existente é carregado. Sem a flag, se houver uma
+    execução anterior, o usuário escolhe entre retomar ou começar do zero
+    (no modo batch vale 'retomar' do batch.json, que por padrão retoma).
+    """
+    journal = CheckpointJournal(name)
+    resume = resume_requested()
+
+    if not resume and journal.has_entries():
+        resume = confirm('retomar', f"\n♻️ Existe uma execução anterior de '{name}'. Retomar de onde parou? (s/n): ")
+
+    if resume:
+        journal.load()
+        done = sum(1 for key in journal.entries if journal.is_done(key))
+        print(f"♻️ Retomando execução: {done} itens já concluídos serão pulados")
+    else:
+        journal.rotate()
+
+    return journal
@@ -0,0 +1,103 @@
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Navegadores logados mantidos abertos ao mesmo tempo (um por cliente)
+DEFAULT_MAX_CONTEXTS = 3
+
+
+class ClientContexts:
+    """
+    Mantém um navegador logado por cliente e troca entre eles sem logout/login
+
+    Cada contexto é o conjunto de atributos da automação ligados ao navegador
+    (driver, wait, transportes, página inicializada...). Ao trocar de cliente,
+    os atributos do atual são guardados e os do cliente pedido são devolvidos
+    à automação. Acima de max_size, o cliente usado há mais tempo é liberado.
+    """
+
+    def __init__(self, owner, attributes, release, max_size=DEFAULT_MAX_CONTEXTS):
+        """
+        Args:
+            owner: automação cujos atributos formam o contexto
+            attributes (dict): nome do atributo -> valor de um contexto vazio
+            release (callable): release(cliente) encerra o contexto já carregado na automação
+            max_size (int): máximo de contextos abertos ao mesmo tempo
+        """
+        self.owner = owner
+        self.attributes = attributes
+        self.release = release
+        self.max_size = max(1, int(max_size))
+        self.contexts = OrderedDict()
+        self.current = None
+
+    def save_current(self):
+        """Guarda os atributos do cliente atual"""
+        if self.current is not None:
+            self.contexts[self.current] = {name: getattr(self.owner, name) for name in self.attributes}
+
+    def load(self, client):
+        """Devolve à automação os atributos guardados do cliente"""
+        for name, value in self.contexts[client].items():
+            setattr(self.owner, name, value)
+
+    def clear_owner(self):
+        """Deixa a automação sem navegador, pronta para abrir o do próximo cliente"""
+        for name, value in self.attributes.items():
+            setattr(self.owner, name, value() if callable(value) else value)
+
+    def switch(self, client):
+        """
+        Ativa o contexto do cliente
+
+        Returns:
+            bool: True se o cliente já tinha um navegador logado (nada a fazer);
+                False se a automação precisa abrir o navegador (se driver for None) e logar
+        """
+        if client == self.current:
+            return True
+
+        self.save_current()
+
+        if client in self.contexts:
+            self.load(client)
+            self.contexts.move_to_end(client)
+            self.current = client
+            logger.info(f"Contexto reaproveitado: {client}")
+            return True
+
+        while len(self.contexts) >= self.max_size:
+            self.evict(next(iter(self.contexts)))
+
+        # O primeiro cliente aproveita o navegador que a automação já abriu
+        if self.current is not None:
+            self.clear_owner()
+        self.current = client
+        return False
+
+    def evict(self, client):
+        """Encerra o contexto do cliente usado há mais tempo"""
+        logger.info(f"Liberando contexto do cliente: {client}")
+        self.load(client)
+        try:
+            self.release(client)
+        except Exception as e:
+            logger.warning(f"Erro ao liberar contexto de {client}: {e}")
+        del self.contexts[client]
+        self.clear_owner()
+
+    def discard_current(self):
+        """Encerra o contexto do cliente atual (ex.: login recusado)"""
+        if self.current is None:
+            return
+        self.save_current()
+        self.evict(self.current)
+        self.current = None
+
+    def close(self):
+        """Encerra todos os contextos abertos"""
+        self.save_current()
+        self.current = None
+        for client in list(self.contexts):
+            self.evict(client)
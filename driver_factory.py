@@ -0,0 +1,144 @@
+import logging
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from session_vault import snapshot_session, apply_session
+
+logger = logging.getLogger(__name__)
+
+# Execução sem interação roda em navegador headless otimizado (perfil de vazão); só o login manual abre janela
+THROUGHPUT_PROFILE = True
+
+# Viewport fixa do perfil de vazão (pixels CSS, antes da escala)
+THROUGHPUT_VIEWPORT = (1920, 1080)
+
+# Recursos que não afetam os seletores nem os dados das telas: bloqueados no perfil de vazão
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.bmp', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+]
+
+# Remove animações e transições (modais e overlays ficam prontos imediatamente)
+DISABLE_ANIMATIONS_JS = """
+document.addEventListener('DOMContentLoaded', function () {
+    var style = document.createElement('style');
+    style.textContent = '*, *::before, *::after { animation-duration: 0s !important; '
+        + 'animation-delay: 0s !important; transition-duration: 0s !important; '
+        + 'transition-delay: 0s !important; scroll-behavior: auto !important; }';
+    document.head.appendChild(style);
+});
+"""
+
+HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+def chrome_options(headless=False, scale=1.0, extra_args=()):
+    """
+    Opções do Chrome para o perfil interativo (janela maximizada) ou de vazão (headless)
+
+    Args:
+        headless (bool): usa o perfil de vazão
+        scale (float): escala da página; no headless a viewport cresce na mesma proporção,
+            mantendo o mesmo layout CSS que a janela com --force-device-scale-factor
+        extra_args: argumentos adicionais da linha de comando
+    """
+    options = Options()
+    if headless:
+        width, height = (int(size / scale) for size in THROUGHPUT_VIEWPORT)
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={width},{height}")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--mute-audio")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        # Os seletores já esperam cada elemento; não é preciso aguardar imagens e iframes
+        options.page_load_strategy = 'eager'
+    else:
+        options.add_argument("--start-maximized")
+        if scale != 1.0:
+            options.add_argument(f"--force-device-scale-factor={scale}")
+
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-translate")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    for arg in extra_args:
+        options.add_argument(arg)
+
+    options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values": {"notifications": 2},
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False,
+    })
+    options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    options.add_experimental_option('useAutomationExtension', False)
+    return options
+
+
+def tune_for_throughput(driver):
+    """Bloqueia recursos pesados e desliga animações via CDP (vale para todas as páginas seguintes)"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': DISABLE_ANIMATIONS_JS})
+    except Exception as e:
+        logger.warning(f"Ajustes de vazão via CDP indisponíveis: {e}")
+
+
+def create_chrome(headless=False, scale=1.0, extra_args=(), executable_path=None):
+    """
+    Cria o Chrome no perfil interativo ou de vazão
+
+    Args:
+        executable_path (str): caminho do chromedriver (None usa o do PATH/Selenium Manager)
+
+    Returns:
+        WebDriver
+    """
+    service = Service(executable_path) if executable_path else None
+    driver = webdriver.Chrome(options=chrome_options(headless, scale, extra_args), service=service)
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER_JS})
+    except Exception:
+        driver.execute_script(HIDE_WEBDRIVER_JS)
+    if headless:
+        tune_for_throughput(driver)
+    return driver
+
+
+def handoff_to_headless(driver, url, scale=1.0, ready=None):
+    """
+    Passa a sessão do navegador visível (login manual) para um navegador do perfil de vazão
+
+    Args:
+        driver: navegador visível já logado
+        url (str): página aberta no novo navegador
+        scale (float): escala da página (ver chrome_options)
+        ready (callable): ready(novo_driver) -> bool confirma que a página abriu logada
+
+    Returns:
+        WebDriver: o navegador headless logado, ou o original se a transferência falhar
+    """
+    if not THROUGHPUT_PROFILE:
+        return driver
+
+    headless = None
+    try:
+        state = snapshot_session(driver)
+        headless = create_chrome(headless=True, scale=scale)
+        apply_session(headless, state)
+        headless.get(url)
+        if ready is not None and not ready(headless):
+            raise RuntimeError("página não abriu logada")
+    except Exception as e:
+        logger.warning(f"Sessão não transferida ao navegador headless, mantendo o visível: {e}")
+        if headless is not None:
+            headless.quit()
+        return driver
+
+    driver.quit()
+    logger.info("Login concluído; execução continua em navegador headless")
+    return headless
@@ -0,0 +1,166 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Percorre a lista de veículos do modal (rolando listas virtualizadas), monta o
+# índice chassi -> checkbox marcada e, quando pedido, marca/desmarca os alvos.
+# Tudo roda dentro do navegador e devolve o resultado em uma única chamada.
+SCAN_AND_TOGGLE_JS = """
+var targets = arguments[0];
+var desired = arguments[1];
+var root = document.querySelector(arguments[2]);
+var done = arguments[arguments.length - 1];
+
+if (!root) { done({error: 'Container do modal não encontrado', index: {}, results: {}, rows: 0}); return; }
+
+var wanted = null;
+var pending = 0;
+if (targets) {
+    wanted = {};
+    targets.forEach(function (t) {
+        var key = String(t).trim().toUpperCase();
+        if (!wanted[key]) { wanted[key] = true; pending++; }
+    });
+}
+
+var index = {};
+var results = {};
+var rows = 0;
+
+function findScroller() {
+    var nodes = [root].concat(Array.prototype.slice.call(root.querySelectorAll('*')));
+    for (var i = 0; i < nodes.length; i++) {
+        var el = nodes[i];
+        var overflow = window.getComputedStyle(el).overflowY;
+        if (el.scrollHeight > el.clientHeight + 10 && (overflow === 'auto' || overflow === 'scroll')) { return el; }
+    }
+    return null;
+}
+
+function rowOf(cb) {
+    return cb.closest('tr, li, label, [class*="row"], [class*="item"]') || cb.parentElement;
+}
+
+function boxOf(token) {
+    // A lista pode ser redesenhada depois do clique: procura de novo a checkbox da linha
+    var boxes = root.querySelectorAll('input[type="checkbox"]');
+    for (var i = 0; i < boxes.length; i++) {
+        var tokens = (rowOf(boxes[i]).textContent || '').toUpperCase().split(/[^A-Z0-9]+/);
+        if (tokens.indexOf(token) !== -1) { return boxes[i]; }
+    }
+    return null;
+}
+
+function scan() {
+    var boxes = root.querySelectorAll('input[type="checkbox"]');
+    for (var i = 0; i < boxes.length; i++) {
+        var cb = boxes[i];
+        var tokens = (rowOf(cb).textContent || '').toUpperCase().split(/[^A-Z0-9]+/);
+        for (var j = 0; j < tokens.length; j++) {
+            var token = tokens[j];
+            if (!token || index.hasOwnProperty(token)) { continue; }
+            if (wanted ? !wanted[token] : token.length !== 17) { continue; }
+
+            rows++;
+            index[token] = cb.checked;
+            if (wanted && desired !== null) {
+                if (cb.checked === desired) {
+                    results[token] = 'already';
+                } else {
+                    cb.click();
+                    var current = cb.isConnected ? cb : boxOf(token);
+                    results[token] = (current && current.checked === desired) ? 'toggled' : 'failed';
+                }
+                pending--;
+            }
+        }
+    }
+}
+
+var scroller = findScroller();
+var lastTop = -1;
+
+function finish() { done({index: index, results: results, rows: rows}); }
+
+function step() {
+    scan();
+    if (wanted && pending <= 0) { finish(); return; }
+    if (!scroller || scroller.scrollTop === lastTop ||
+        scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight) { finish(); return; }
+    lastTop = scroller.scrollTop;
+    scroller.scrollTop += Math.max(50, scroller.clientHeight * 0.8);
+    setTimeout(step, 150);
+}
+
+if (scroller) { scroller.scrollTop = 0; }
+setTimeout(step, 50);
+"""
+
+
+class GroupModalIndex:
+    """Índice chassi -> checkbox do modal de edição de grupo, montado em uma única chamada JS"""
+
+    def __init__(self, driver, container_selector="div.editor-section", timeout=180):
+        """
+        Args:
+            driver: instância do WebDriver com o modal de edição aberto
+            container_selector (str): seletor CSS do modal que contém a lista de veículos
+            timeout (int): tempo máximo, em segundos, para percorrer a lista inteira
+        """
+        self.driver = driver
+        self.container_selector = container_selector
+        self.timeout = timeout
+
+    def run(self, targets=None, checked=None):
+        """Executa o script de varredura e devolve o resultado bruto"""
+        self.driver.set_script_timeout(self.timeout)
+        result = self.driver.execute_async_script(SCAN_AND_TOGGLE_JS, targets, checked, self.container_selector)
+        if result.get('error'):
+            raise RuntimeError(result['error'])
+        return result
+
+    def build(self):
+        """
+        Lê a lista inteira do modal
+
+        Returns:
+            dict: chassi (maiúsculo) -> True se a checkbox está marcada
+        """
+        return self.run()['index']
+
+    def membership(self, chassis_list):
+        """
+        Lê a situação dos chassis na lista do modal, sem alterar nenhuma checkbox
+
+        Returns:
+            dict: chassi (maiúsculo) -> True se a checkbox está marcada; chassis ausentes ficam de fora
+
+        Raises:
+            RuntimeError: se o modal não foi encontrado ou nenhum chassi foi reconhecido
+        """
+        result = self.run(chassis_list, None)
+        if not result['index']:
+            raise RuntimeError("Nenhum chassi reconhecido na lista do modal")
+        logger.info(f"Situação no modal: {len(result['index'])} de {len(chassis_list)} chassis localizados")
+        return result['index']
+
+    def apply(self, chassis_list, checked):
+        """
+        Marca (checked=True) ou desmarca (checked=False) as checkboxes dos chassis
+
+        Returns:
+            dict: chassi original -> 'toggled', 'already', 'failed' ou 'not_found'
+
+        Raises:
+            RuntimeError: se o modal não foi encontrado ou a lista estava vazia
+        """
+        result = self.run(chassis_list, checked)
+        if result['rows'] == 0 and not result['results']:
+            # Nenhuma linha reconhecida: estrutura diferente, o chamador usa o método antigo
+            raise RuntimeError("Nenhum chassi reconhecido na lista do modal")
+
+        logger.info(f"Índice do modal: {result['rows']} chassis alvo localizados")
+        return {
+            chassi: result['results'].get(str(chassi).strip().upper(), 'not_found')
+            for chassi in chassis_list
+        }
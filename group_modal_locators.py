@@ -0,0 +1,57 @@
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from locator_cache import wait_for, find_visible
+
+logger = logging.getLogger(__name__)
+
+
+def pagina_grupos_aberta(driver):
+    """Indica que a página de grupos de veículos está aberta e logada"""
+    return "maintenance/vehiclegroups" in driver.current_url and bool(
+        driver.find_elements(By.CSS_SELECTOR, "input[type='search'][placeholder='Pesquisar']")
+    )
+
+
+def botao_salvar_css_verificado(driver, timeout):
+    """Estratégia: botão submit de sucesso pelo CSS, aceito apenas se o texto for 'Salvar'"""
+    botao = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit'].button.btn-mz.success.ng-star-inserted"))
+    )
+    texto_botao = botao.text.strip()
+    if "Salvar" not in texto_botao or "criar" in texto_botao.lower():
+        logger.warning(f"Botão encontrado não é o correto. Texto: '{texto_botao}'")
+        return None
+    return botao
+
+
+def botao_salvar_por_varredura(driver, timeout):
+    """Estratégia: percorre os botões submit e retorna o 'Salvar' de sucesso"""
+    for botao in driver.find_elements(By.CSS_SELECTOR, "button[type='submit']"):
+        if botao.text.strip() == "Salvar" and "success" in botao.get_attribute("class"):
+            return botao
+    return None
+
+
+# Estratégias (nome, estratégia) para o botão Salvar do modal do grupo
+ESTRATEGIAS_BOTAO_SALVAR = [
+    ("xpath_texto", wait_for(By.XPATH, "//button[@type='submit' and contains(@class, 'button') and contains(@class, 'btn-mz') and contains(@class, 'success') and normalize-space(text())='Salvar']")),
+    ("css_verificado", botao_salvar_css_verificado),
+    ("varredura_submit", botao_salvar_por_varredura),
+]
+
+
+def estrategias_checkbox_contexto(chassi):
+    """Estratégias (nome, estratégia) para a checkbox ao redor do texto do chassi"""
+    return [
+        ("div_tr", find_visible(By.XPATH, f"//div[contains(text(), '{chassi}')]/ancestor::tr//input[@type='checkbox']")),
+        ("div_row", find_visible(By.XPATH, f"//div[contains(text(), '{chassi}')]/ancestor::div[contains(@class, 'row')]//input[@type='checkbox']")),
+        ("span_tr", find_visible(By.XPATH, f"//span[contains(text(), '{chassi}')]/ancestor::tr//input[@type='checkbox']")),
+        ("span_row", find_visible(By.XPATH, f"//span[contains(text(), '{chassi}')]/ancestor::div[contains(@class, 'row')]//input[@type='checkbox']")),
+        ("item", find_visible(By.XPATH, f"//*[contains(text(), '{chassi}')]/ancestor::*[contains(@class, 'item')]//input[@type='checkbox']")),
+        ("irmao_anterior", find_visible(By.XPATH, f"//*[contains(text(), '{chassi}')]/preceding-sibling::*//input[@type='checkbox']")),
+        ("irmao_seguinte", find_visible(By.XPATH, f"//*[contains(text(), '{chassi}')]/following-sibling::*//input[@type='checkbox']")),
+    ]
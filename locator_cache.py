@@ -0,0 +1,157 @@
+import os
+import json
+import atexit
+import threading
+import logging
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+from run_telemetry import note_fallback
+
+logger = logging.getLogger(__name__)
+
+# Memória das estratégias vencedoras, compartilhada entre execuções e automações
+LOCATOR_CACHE_PATH = os.path.join('checkpoints', 'locator_cache.json')
+
+
+def wait_for(by, value, condition=EC.element_to_be_clickable):
+    """Estratégia que aguarda o elemento atender à condição (até o timeout da busca)"""
+    def strategy(driver, timeout):
+        return WebDriverWait(driver, timeout).until(condition((by, value)))
+    return strategy
+
+
+def find_visible(by, value):
+    """Estratégia sem espera: primeiro elemento já presente e visível"""
+    def strategy(driver, timeout):
+        element = driver.find_element(by, value)
+        return element if element.is_displayed() else None
+    return strategy
+
+
+class LocatorRegistry:
+    """Lembra qual estratégia localizou cada elemento lógico e a tenta primeiro na próxima vez"""
+
+    def __init__(self, path=LOCATOR_CACHE_PATH):
+        """
+        Args:
+            path (str): arquivo JSON onde vencedores e estatísticas são gravados
+        """
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+
+    def load(self):
+        """Lê a memória gravada (arquivo ausente ou corrompido começa do zero)"""
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cache de seletores ignorado ({self.path}): {e}")
+                self.entries = {}
+
+    def save(self):
+        """Grava a memória de forma atômica, se houve mudança"""
+        with self.lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            temp_path = self.path + '.tmp'
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, self.path)
+                self.dirty = False
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar o cache de seletores ({self.path}): {e}")
+
+    def entry(self, key):
+        """Registro do elemento lógico (vencedor e contadores)"""
+        return self.entries.setdefault(key, {'winner': None, 'hits': 0, 'misses': 0, 'failures': 0})
+
+    def ordered(self, key, strategies):
+        """Estratégias na ordem de tentativa: a vencedora anterior primeiro, depois a ordem original"""
+        self.load()
+        with self.lock:
+            winner = self.entries.get(key, {}).get('winner')
+        return sorted(strategies, key=lambda item: item[0] != winner)
+
+    def record(self, key, first_tried, winner):
+        """Atualiza vencedor e estatísticas após uma busca"""
+        with self.lock:
+            entry = self.entry(key)
+            if winner is None:
+                entry['failures'] += 1
+            elif winner == first_tried:
+                entry['hits'] += 1
+            else:
+                entry['misses'] += 1
+            if winner is not None and entry['winner'] != winner:
+                logger.info(f"Seletor de '{key}' aprendido: {winner}")
+                entry['winner'] = winner
+            self.dirty = True
+
+    def find(self, driver, key, strategies, timeout=5):
+        """
+        Localiza o elemento lógico tentando as estratégias pela ordem aprendida
+
+        Args:
+            driver: WebDriver
+            key (str): identificador do elemento lógico ("site/página/elemento")
+            strategies (list): tuplas (nome, estratégia); estratégia(driver, timeout) retorna
+                o elemento, None ou lança exceção quando não encontra
+            timeout (int): espera máxima de cada estratégia
+
+        Returns:
+            WebElement ou None se nenhuma estratégia encontrou
+        """
+        ordered = self.ordered(key, strategies)
+        for name, strategy in ordered:
+            try:
+                element = strategy(driver, timeout)
+            except (TimeoutException, NoSuchElementException, StaleElementReferenceException):
+                element = None
+            except Exception as e:
+                logger.debug(f"Estratégia '{name}' de '{key}' falhou: {e}")
+                element = None
+            if element is not None:
+                self.record(key, ordered[0][0], name)
+                if name != ordered[0][0]:
+                    note_fallback()
+                return element
+
+        self.record(key, ordered[0][0] if ordered else None, None)
+        return None
+
+    def stats(self):
+        """Cópia dos contadores por elemento lógico"""
+        with self.lock:
+            return {key: dict(entry) for key, entry in self.entries.items()}
+
+    def log_stats(self):
+        """Registra no log os acertos/erros da estratégia aprendida por elemento"""
+        for key, entry in sorted(self.stats().items()):
+            logger.info(f"Seletor '{key}': vencedor={entry['winner']} acertos={entry['hits']} "
+                        f"erros={entry['misses']} falhas={entry['failures']}")
+
+    def close(self):
+        """Registra as estatísticas e grava a memória"""
+        if self.dirty:
+            self.log_stats()
+        self.save()
+
+
+registry = LocatorRegistry()
+atexit.register(registry.close)
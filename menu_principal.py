@@ -30,6 +30,7 @@ def verificar_arquivos():
         'qtgo_automation.py',
         'setup_automation.py',      
         'odometer_setup.py',        
+        'vehicle_pipeline.py',
         'AdicionarGrupo.xlsx',
         'RemoverGrupo.xlsx',
         'ID_billing.xlsx',
@@ -110,6 +111,7 @@ def mostrar_menu():
         ("5", "⚙️   Setup Automático", "Faço Setup de veiculos"),
         ("6", "📏  Ajuste de Odômetro", "Ajusto odômetro automaticamente"),
         ("7", "🔍  Verificar Sistema", "Verifica status dos arquivos e planilhas"),
+        ("8", "🔗  Setup + Odômetro", "Faço setup e ajusto odômetro em uma única passada"),
         ("0", "🚪  Sair", "Encerra o sistema")
     ]
     
@@ -137,7 +139,8 @@ def executar_script(nome_script, titulo_operacao):
             try:
                 # Importação dinâmica baseada no nome do módulo
                 if nome_modulo in ['add_automation', 'remove_automation', 'billing_automation', 
-                                  'qtgo_automation', 'setup_automation', 'odometer_setup']:
+                                  'qtgo_automation', 'setup_automation', 'odometer_setup',
+                                  'vehicle_pipeline']:
                     module = importlib.import_module(nome_modulo)
                     if hasattr(module, 'main'):
                         module.main()
@@ -306,7 +309,8 @@ def main():
                     ('billing_automation.py', 'Automação billing', '💰'),
                     ('qtgo_automation.py', 'Automação QTGO', '🚙'),
                     ('setup_automation.py', 'Setup automático', '⚙️'),
-                    ('odometer_setup.py', 'Ajuste odômetro', '📏')
+                    ('odometer_setup.py', 'Ajuste odômetro', '📏'),
+                    ('vehicle_pipeline.py', 'Setup + odômetro', '🔗')
                 ]
                 
                 todos_ok = True
@@ -334,6 +338,10 @@ def main():
                 
                 input("\n🔙 Pressione ENTER para voltar ao menu...")
                 
+            elif opcao == '8':
+                limpar_tela()
+                executar_script('vehicle_pipeline.py', 'SETUP + AJUSTE DE ODÔMETRO')
+                
             elif opcao == '0':
                 tela_saida()
                 break
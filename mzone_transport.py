@@ -0,0 +1,411 @@
+import logging
+from datetime import datetime, timezone
+
+import pandas as pd
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+logger = logging.getLogger(__name__)
+
+# API OData consumida pelo SPA do mzoneweb (mesmo host, autenticada pelo token do login)
+MZONE_API_URL = "https://live.mzoneweb.net/mzone62.api/"
+
+# Filtro usado para localizar o veículo pelo valor da coluna ID da planilha
+VEHICLE_LOOKUP_FILTER = "unit_Description eq '{valor}' or description eq '{valor}'"
+
+# Quantidade de chassis por consulta (limita o tamanho da URL do $filter)
+VIN_LOOKUP_CHUNK = 40
+
+# Quantidade de IDs da planilha por consulta de unidade (cada ID gera duas comparações no $filter)
+UNIT_LOOKUP_CHUNK = 20
+
+# Ajuste de odômetro da unidade (mesma chamada do botão Definir na aba de odômetro do Controlador de unidade)
+ODOMETER_ADJUSTMENT_PATH = "Units({unit_id})/OdometerAdjustments"
+
+# Campos do corpo do ajuste: nomes copiados da requisição que o modal envia (aba Rede do DevTools).
+# Não há documentação pública da API; ao atualizar o mzoneweb, confira-os antes de usar o ajuste por HTTP
+# (USE_HTTP_ODOMETER no odometer_setup). Um campo desconhecido é rejeitado (HTTP 400) e o modal assume.
+ODOMETER_VALUE_FIELD = 'decimalOdometer'
+ODOMETER_START_FIELD = 'adjustmentStartUtc'
+
+# Procura o token OIDC salvo pelo SPA no sessionStorage/localStorage
+CAPTURE_TOKEN_JS = """
+var stores = [window.sessionStorage, window.localStorage];
+for (var s = 0; s < stores.length; s++) {
+    var store = stores[s];
+    for (var i = 0; i < store.length; i++) {
+        var value = store.getItem(store.key(i));
+        if (!value || value.indexOf('access_token') === -1) { continue; }
+        try {
+            var parsed = JSON.parse(value);
+            if (parsed && parsed.access_token) { return parsed.access_token; }
+        } catch (e) {}
+    }
+}
+return null;
+"""
+
+
+class TransportError(Exception):
+    """Falha no transporte; o próximo transporte da lista deve ser tentado"""
+
+
+class UncertainWriteError(TransportError):
+    """Escrita sem resposta confiável (HTTP 5xx ou conexão perdida): o servidor pode já tê-la aplicado"""
+
+
+def text_value(vehicle_data, column):
+    """Retorna o valor da coluna como texto, ou vazio quando ausente"""
+    value = vehicle_data.get(column, '')
+    if pd.isna(value):
+        return ''
+    return str(value).strip()
+
+
+class SeleniumVehicleTransport:
+    """Edita o veículo pela interface (fluxo original, usado como fallback)"""
+
+    name = 'selenium'
+
+    def __init__(self, automation):
+        self.automation = automation
+
+    def update_vehicle(self, vehicle_data):
+        """
+        Returns:
+            tuple: (status, erro) com status 'success', 'not_found' ou 'error'
+        """
+        vehicle_id = vehicle_data['ID']
+
+        if not self.automation.navigate_to_vehicles():
+            return 'error', 'Erro ao navegar para veículos'
+
+        if not self.automation.search_vehicle_by_id(vehicle_id):
+            return 'not_found', None
+
+        if not self.automation.click_edit_vehicle(vehicle_id):
+            return 'error', 'Erro ao abrir modal de edição'
+
+        if not self.automation.fill_vehicle_form(vehicle_data):
+            return 'error', 'Erro ao preencher formulário'
+
+        return 'success', None
+
+
+class MzoneHttpTransport:
+    """Edita o veículo direto na API, reaproveitando a autenticação do navegador"""
+
+    name = 'http'
+
+    def __init__(self, session, base_url=MZONE_API_URL, timeout=20):
+        self.session = session
+        self.base_url = base_url
+        self.timeout = timeout
+        self.group_ids = {}
+        self.unit_ids = {}
+        self.missing_units = set()  # IDs já consultados sem unidade única (não são consultados de novo)
+
+    @classmethod
+    def from_driver(cls, driver, base_url=MZONE_API_URL, pool_size=10, timeout=20):
+        """
+        Cria o transporte a partir de um navegador já logado
+
+        Returns:
+            MzoneHttpTransport ou None se a API não estiver acessível
+        """
+        if requests is None:
+            logger.warning("Pacote 'requests' não instalado; usando apenas o navegador")
+            return None
+
+        session = requests.Session()
+        # Só repete leituras: um POST repetido (inclusão no grupo, ajuste de odômetro) poderia duplicar
+        # a operação; falhas de escrita viram TransportError e o chamador decide o fallback
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                      allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'User-Agent': driver.execute_script("return navigator.userAgent;"),
+        })
+
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        token = driver.execute_script(CAPTURE_TOKEN_JS)
+        if token:
+            session.headers['Authorization'] = f"Bearer {token}"
+
+        transport = cls(session, base_url=base_url, timeout=timeout)
+        try:
+            transport.get('Vehicles', {'$top': 1, '$select': 'id'})
+        except TransportError as e:
+            logger.warning(f"API do mzoneweb indisponível, usando apenas o navegador: {e}")
+            session.close()
+            return None
+
+        logger.info("Transporte HTTP do mzoneweb ativo")
+        return transport
+
+    def request(self, method, path, accept_status=(), **kwargs):
+        """Executa uma chamada na API e converte falhas em TransportError"""
+        write = method != 'GET'
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.ConnectionError as e:
+            # Conexão recusada, DNS ou tempo esgotado ao conectar: nada chegou ao servidor
+            raise TransportError(f"{method} {path}: {e}")
+        except requests.RequestException as e:
+            if write:
+                raise UncertainWriteError(f"{method} {path}: {e}")
+            raise TransportError(f"{method} {path}: {e}")
+
+        if response.status_code >= 400 and response.status_code not in accept_status:
+            if write and response.status_code >= 500:
+                raise UncertainWriteError(f"{method} {path}: HTTP {response.status_code}")
+            raise TransportError(f"{method} {path}: HTTP {response.status_code}")
+        return response
+
+    def decode(self, response, method, path):
+        """
+        JSON da resposta; HTML (tela de login, caminho errado) ou corpo inválido vira TransportError
+
+        Numa escrita a resposta ilegível não diz se o servidor aplicou a operação: UncertainWriteError
+        """
+        error = UncertainWriteError if method != 'GET' else TransportError
+        content_type = response.headers.get('Content-Type', '')
+        if 'json' not in content_type.lower():
+            raise error(f"{method} {path}: resposta não é JSON ({content_type or 'sem Content-Type'})")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise error(f"{method} {path}: JSON inválido ({e})")
+
+    def get(self, path, params=None):
+        """GET que retorna o JSON da resposta"""
+        return self.decode(self.request('GET', path, params=params), 'GET', path)
+
+    def get_all(self, path, params=None):
+        """GET que percorre a paginação (@odata.nextLink) e retorna todos os itens"""
+        result = self.get(path, params)
+        items = result.get('value', [])
+        next_link = result.get('@odata.nextLink')
+        while next_link:
+            path = next_link[len(self.base_url):] if next_link.startswith(self.base_url) else next_link
+            result = self.get(path)
+            items.extend(result.get('value', []))
+            next_link = result.get('@odata.nextLink')
+        return items
+
+    def batch(self, operations):
+        """
+        Envia várias operações em uma única requisição OData JSON $batch
+
+        Args:
+            operations (list): dicionários com 'method', 'url' e opcionalmente 'body'
+
+        Returns:
+            dict: id da operação (posição na lista, como texto) -> status HTTP
+        """
+        payload = {'requests': []}
+        for i, operation in enumerate(operations):
+            item = {
+                'id': str(i),
+                'method': operation['method'],
+                'url': operation['url'],
+                'headers': {'Content-Type': 'application/json'},
+            }
+            if 'body' in operation:
+                item['body'] = operation['body']
+            payload['requests'].append(item)
+
+        response = self.request('POST', '$batch', json=payload)
+        result = self.decode(response, 'POST', '$batch')
+        try:
+            return {item['id']: item['status'] for item in result.get('responses', [])}
+        except (AttributeError, KeyError, TypeError) as e:
+            raise UncertainWriteError(f"POST $batch: resposta inesperada ({e})")
+
+    def find_vehicles_by_vin(self, chassis_list):
+        """
+        Resolve vários chassis para o id interno do veículo
+
+        Returns:
+            dict: chassi (maiúsculo) -> id do veículo; chassis ausentes ficam de fora
+        """
+        vins = sorted({str(c).strip().upper() for c in chassis_list})
+        found = {}
+        for i in range(0, len(vins), VIN_LOOKUP_CHUNK):
+            chunk = vins[i:i + VIN_LOOKUP_CHUNK]
+            filtro = ' or '.join(f"vin eq '{vin.replace(chr(39), chr(39) * 2)}'" for vin in chunk)
+            for vehicle in self.get_all('Vehicles', {'$filter': filtro, '$select': 'id,vin'}):
+                if vehicle.get('vin'):
+                    found[vehicle['vin'].strip().upper()] = vehicle['id']
+        return found
+
+    def group_member_ids(self, group_id):
+        """Ids dos veículos que já pertencem ao grupo"""
+        return {v['id'] for v in self.get_all(f"VehicleGroups({group_id})/Vehicles", {'$select': 'id'})}
+
+    def group_snapshot(self, group_name, chassis_list):
+        """
+        Lê em massa o grupo, os veículos dos chassis e os membros atuais
+
+        Returns:
+            tuple: (id do grupo, chassi (maiúsculo) -> id do veículo, ids dos membros)
+        """
+        group_id = self.find_group(group_name)
+        vehicles = self.find_vehicles_by_vin(chassis_list)
+        members = self.group_member_ids(group_id) if vehicles else set()
+        return group_id, vehicles, members
+
+    def group_membership(self, group_name, chassis_list):
+        """
+        Situação dos chassis em relação ao grupo, lida em massa (grupo, veículos e membros)
+
+        Returns:
+            dict: chassi (maiúsculo) -> True se já é membro; chassis sem veículo ficam de fora
+        """
+        _, vehicles, members = self.group_snapshot(group_name, chassis_list)
+        return {vin: guid in members for vin, guid in vehicles.items()}
+
+    def add_group_members(self, group_id, vehicle_guids):
+        """
+        Inclui vários veículos no grupo em um único $batch
+
+        Returns:
+            dict: id do veículo -> True se incluído (ou já membro)
+        """
+        vehicle_guids = list(vehicle_guids)
+        if not vehicle_guids:
+            return {}
+        operations = [
+            {
+                'method': 'POST',
+                'url': f"VehicleGroups({group_id})/Vehicles/$ref",
+                'body': {'@odata.id': f"{self.base_url}Vehicles({guid})"},
+            }
+            for guid in vehicle_guids
+        ]
+        statuses = self.batch(operations)
+        return {
+            guid: statuses.get(str(i), 500) < 300 or statuses.get(str(i)) == 409
+            for i, guid in enumerate(vehicle_guids)
+        }
+
+    def find_units(self, vehicle_ids):
+        """
+        Resolve vários IDs da planilha para a unidade instalada no veículo (com cache)
+
+        Returns:
+            dict: ID -> id da unidade; IDs ausentes ou ambíguos ficam de fora
+        """
+        keys = [str(v).strip() for v in vehicle_ids]
+        pending = sorted({key for key in keys if key not in self.unit_ids and key not in self.missing_units})
+        for i in range(0, len(pending), UNIT_LOOKUP_CHUNK):
+            chunk = pending[i:i + UNIT_LOOKUP_CHUNK]
+            filtro = ' or '.join(f"({VEHICLE_LOOKUP_FILTER.format(valor=key.replace(chr(39), chr(39) * 2))})" for key in chunk)
+            matches = {key: set() for key in chunk}
+            params = {'$filter': filtro, '$select': 'id,description,unit_Id,unit_Description'}
+            for vehicle in self.get_all('Vehicles', params):
+                for field in ('unit_Description', 'description'):
+                    key = str(vehicle.get(field) or '').strip()
+                    if key in matches and vehicle.get('unit_Id'):
+                        matches[key].add(vehicle['unit_Id'])
+            for key, units in matches.items():
+                if len(units) == 1:
+                    self.unit_ids[key] = units.pop()
+                    continue
+                if units:
+                    logger.warning(f"{len(units)} unidades encontradas na API para {key}")
+                self.missing_units.add(key)
+        return {key: self.unit_ids[key] for key in keys if key in self.unit_ids}
+
+    def adjust_odometer(self, vehicle_id, odometer):
+        """
+        Inclui o ajuste de odômetro da unidade do veículo em uma única requisição
+
+        Raises:
+            UncertainWriteError: o ajuste pode ter sido gravado (não deve ser refeito pelo modal)
+            TransportError: unidade não resolvida, valor inválido ou falha na API
+        """
+        key = str(vehicle_id).strip()
+        unit_id = self.find_units([key]).get(key)
+        if unit_id is None:
+            raise TransportError(f"Unidade do veículo {vehicle_id} não encontrada na API")
+        try:
+            value = float(str(odometer).replace(',', '.'))
+        except ValueError:
+            raise TransportError(f"Valor de odômetro inválido: {odometer}")
+
+        adjustment = {
+            ODOMETER_VALUE_FIELD: value,
+            # Mesmo início do modal: o ajuste vale a partir de agora
+            ODOMETER_START_FIELD: datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self.request('POST', ODOMETER_ADJUSTMENT_PATH.format(unit_id=unit_id), json=adjustment)
+
+    def find_vehicle(self, vehicle_id):
+        """Localiza o id interno do veículo pelo ID da planilha"""
+        filtro = VEHICLE_LOOKUP_FILTER.format(valor=str(vehicle_id).replace("'", "''"))
+        result = self.get('Vehicles', {'$filter': filtro, '$select': 'id', '$top': 2})
+        vehicles = result.get('value', [])
+        if len(vehicles) != 1:
+            # Ambíguo ou ausente na API: a interface decide
+            raise TransportError(f"{len(vehicles)} veículos encontrados na API para {vehicle_id}")
+        return vehicles[0]['id']
+
+    def find_group(self, group_name):
+        """Localiza (com cache) o id do grupo de veículos pelo nome"""
+        if group_name not in self.group_ids:
+            filtro = f"description eq '{group_name.replace(chr(39), chr(39) * 2)}'"
+            result = self.get('VehicleGroups', {'$filter': filtro, '$select': 'id'})
+            groups = result.get('value', [])
+            if len(groups) != 1:
+                raise TransportError(f"Grupo '{group_name}' não encontrado na API")
+            self.group_ids[group_name] = groups[0]['id']
+        return self.group_ids[group_name]
+
+    def add_to_group(self, group_id, vehicle_guid):
+        """Inclui o veículo no grupo (409 indica que ele já era membro)"""
+        ref = {'@odata.id': f"{self.base_url}Vehicles({vehicle_guid})"}
+        self.request('POST', f"VehicleGroups({group_id})/Vehicles/$ref", accept_status=(409,), json=ref)
+
+    def update_vehicle(self, vehicle_data):
+        """
+        Returns:
+            tuple: (status, erro) com status 'success'
+
+        Raises:
+            TransportError: quando a API não conseguiu concluir a edição
+        """
+        vehicle_guid = self.find_vehicle(vehicle_data['ID'])
+
+        changes = {}
+        description = text_value(vehicle_data, 'DESCRIÇÃO')
+        plate = text_value(vehicle_data, 'PLACA') or text_value(vehicle_data, 'CHASSI')
+        chassi = text_value(vehicle_data, 'CHASSI')
+        if description:
+            changes['description'] = description
+        if plate:
+            changes['registration'] = plate
+        if chassi:
+            changes['vin'] = chassi
+
+        if changes:
+            self.request('PATCH', f"Vehicles({vehicle_guid})", json=changes)
+
+        group_name = text_value(vehicle_data, 'GRUPO DE VEICULOS')
+        if group_name:
+            self.add_to_group(self.find_group(group_name), vehicle_guid)
+
+        return 'success', None
+
+    def close(self):
+        """Fecha as conexões do pool"""
+        self.session.close()
@@ -1,19 +1,60 @@
 import pandas as pd
-import json
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 import logging
 
+from page_readiness import PageReadiness
+from checkpoint_journal import open_journal
+from client_contexts import ClientContexts
+from driver_factory import create_chrome, THROUGHPUT_PROFILE
+from session_vault import open_vault
+from mzone_transport import MzoneHttpTransport, TransportError, UncertainWriteError
+from sheet_ingest import load_vehicle_sheet, load_credentials, report_rejected, vehicle_records
+from vehicle_index import VehicleIndexCache, build_vehicle_index
+from run_telemetry import timed, export_metrics
+from batch_mode import confirm
+
+MZONE_URL = "https://live.mzoneweb.net/mzonex/"
+
+# Escala da página (a grade de veículos cabe inteira na tela)
+PAGE_SCALE = 0.8
+
+# Ajusta o odômetro direto na API do mzoneweb quando possível (o modal vira fallback)
+USE_HTTP_ODOMETER = True
+
+# Indexa a grade de veículos de cada cliente: os ausentes são reportados e os demais pesquisados direto pelo valor certo
+USE_VEHICLE_INDEX = True
+
+# Nome do site no cofre de sessões (o mesmo da automação de setup, que compartilha os logins)
+SESSION_SITE = "mzone"
+
+# Navegadores logados mantidos abertos (um por cliente, o mais antigo é fechado)
+MAX_CLIENT_BROWSERS = 3
+
+# Atributos que formam o contexto de um cliente (valor de um contexto vazio)
+CLIENT_CONTEXT_ATTRIBUTES = {
+    'driver': None,
+    'wait': None,
+    'readiness': None,
+    'odometer_api': None,
+    'vehicle_index': None,
+    'vehicles_page_initialized': False,
+}
+
 class OdometerUpdateAutomation:
     def __init__(self):
         self.driver = None
         self.wait = None
+        self.readiness = None
+        self.odometer_api = None  # Transporte HTTP do cliente atual (MzoneHttpTransport) quando disponível
+        self.vehicle_index = None  # Índice da grade do cliente atual (VehicleIndex) quando disponível
+        self.index_cache = VehicleIndexCache()
+        self.journal = None
+        self.vault = open_vault()
         self.credentials = {}
         self.vehicles_data = pd.DataFrame()
         self.report = {
@@ -35,29 +76,12 @@ class OdometerUpdateAutomation:
         self.logger = logging.getLogger(__name__)
 
     def setup_driver(self):
-        """Configura o driver do Chrome"""
+        """Configura o driver do Chrome (login automático: perfil de vazão, headless)"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--force-device-scale-factor=0.8")
-            chrome_options.add_argument("--disable-notifications")
-            chrome_options.add_argument("--disable-translate")
-            
-            prefs = {
-                "profile.default_content_setting_values": {"notifications": 2},
-                "credentials_enable_service": False,
-                "profile.password_manager_enabled": False
-            }
-            chrome_options.add_experimental_option("prefs", prefs)
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = create_chrome(headless=THROUGHPUT_PROFILE, scale=PAGE_SCALE)
             self.wait = WebDriverWait(self.driver, 15)
-            
-            self.driver.execute_script("document.body.style.zoom='80%'")
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            self.readiness = PageReadiness(self.driver, timeout=15)
+            self.readiness.install()
             
             print("🌐 Chrome configurado com sucesso")
             return True
@@ -66,23 +90,16 @@ class OdometerUpdateAutomation:
             return False
 
     def load_excel_data(self):
-        """Carrega e valida os dados da planilha Excel"""
+        """Carrega, normaliza e valida a planilha antes de abrir o navegador (linhas inválidas são rejeitadas)"""
         try:
-            self.vehicles_data = pd.read_excel('veiculos_setup.xlsx')
+            # Sem login manual nesta automação: clientes sem credenciais são rejeitados
+            self.vehicles_data, rejected = load_vehicle_sheet('veiculos_setup.xlsx', self.credentials)
+            report_rejected(rejected, 'rejeitados_odometro')
             
-            required_columns = ['ID', 'CHASSI', 'DESCRIÇÃO', 'PLACA', 'GRUPO DE VEICULOS', 'CLIENTE', 'ODOMETRO']
-            missing_columns = [col for col in required_columns if col not in self.vehicles_data.columns]
-            
-            if missing_columns:
-                self.logger.error(f"Colunas faltantes na planilha: {missing_columns}")
+            if self.vehicles_data.empty:
+                self.logger.error("Nenhum veículo válido na planilha")
                 return False
             
-            # Remove linhas com dados obrigatórios vazios
-            self.vehicles_data = self.vehicles_data.dropna(subset=['ID', 'CHASSI', 'CLIENTE'])
-            
-            # Ordena por cliente para otimizar logins
-            self.vehicles_data = self.vehicles_data.sort_values('CLIENTE')
-            
             self.logger.info(f"Planilha carregada: {len(self.vehicles_data)} veículos")
             return True
             
@@ -96,16 +113,7 @@ class OdometerUpdateAutomation:
     def load_credentials(self):
         """Carrega as credenciais do arquivo JSON"""
         try:
-            with open('credentials.json', 'r', encoding='utf-8') as file:
-                credentials_data = json.load(file)
-            
-            self.credentials = {}
-            for cliente in credentials_data['clientes']:
-                self.credentials[cliente['nome']] = {
-                    'user': cliente['user'],
-                    'senha': cliente['senha']
-                }
-            
+            self.credentials = load_credentials()
             self.logger.info(f"Credenciais carregadas: {len(self.credentials)} clientes")
             return True
             
@@ -114,28 +122,50 @@ class OdometerUpdateAutomation:
             return False
 
     def wait_for_loading(self):
-        """Aguarda loadings do sistema finalizarem"""
+        """Aguarda a página ficar pronta (requisições, Angular e DOM estáveis)"""
+        if not self.readiness.wait():
+            self.logger.warning("Página não estabilizou dentro do tempo limite")
+
+    def restore_saved_session(self, client):
+        """
+        Reaproveita a sessão salva do cliente, validada com uma abertura do mzoneweb
+        
+        Returns:
+            bool: True se o sistema aceitou a sessão salva
+        """
+        if not self.vault.restore(self.driver, SESSION_SITE, client):
+            return False
+        
+        self.driver.get(MZONE_URL)
         try:
-            time.sleep(2)
-            loading_selectors = [
-                "//div[contains(@class, 'loading')]",
-                "//div[contains(@class, 'spinner')]", 
-                "//div[contains(@class, 'loader')]"
-            ]
-            
-            for selector in loading_selectors:
-                try:
-                    WebDriverWait(self.driver, 3).until_not(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                except:
-                    pass
-            time.sleep(1)
-        except Exception:
-            time.sleep(3)
+            WebDriverWait(self.driver, 10).until(lambda driver: "workspace/map" in driver.current_url)
+        except TimeoutException:
+            print(f"⚠️ Sessão salva expirada para cliente: {client}")
+            self.vault.forget(SESSION_SITE, client)
+            self.vault.clear_browser(self.driver)
+            return False
+        
+        self.wait_for_loading()
+        print(f"♻️ Sessão salva reaproveitada: {client}")
+        return True
+
+    def end_client_session(self, client):
+        """Guarda a sessão do cliente e limpa o navegador; sem o cofre, faz logout"""
+        if not self.vault.enabled:
+            self.logout()
+            return
+        # Logout invalidaria a sessão no servidor; limpar o navegador basta para trocar de cliente
+        if "mzonex" in self.driver.current_url:
+            self.vault.capture(self.driver, SESSION_SITE, client)
+        self.vault.clear_browser(self.driver)
+        self.vehicles_page_initialized = False
 
+    @timed()
     def login(self, client):
         """Realiza login para o cliente especificado"""
+        if self.restore_saved_session(client):
+            return True
+        
         if client not in self.credentials:
             print(f"❌ Credenciais não encontradas para cliente: {client}")
             return False
@@ -143,7 +173,7 @@ class OdometerUpdateAutomation:
         try:
             print(f"🔐 Fazendo login para cliente: {client}")
             
-            self.driver.get("https://live.mzoneweb.net/mzonex/")
+            self.driver.get(MZONE_URL)
             self.wait_for_loading()
             
             username_field = self.wait.until(EC.presence_of_element_located((By.ID, "Username")))
@@ -163,6 +193,7 @@ class OdometerUpdateAutomation:
                 )
                 self.wait_for_loading()
                 print(f"✅ Login bem-sucedido: {client}")
+                self.vault.capture(self.driver, SESSION_SITE, client)
                 return True
             except TimeoutException:
                 print(f"❌ Login falhou para cliente: {client}")
@@ -189,6 +220,7 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro no logout: {str(e)}")
             return False
 
+    @timed()
     def navigate_to_vehicles(self):
         """Navega para a seção de veículos e seleciona 'TODOS OS VEICULOS'"""
         try:
@@ -233,14 +265,23 @@ class OdometerUpdateAutomation:
     def search_vehicle(self, vehicle_id, chassi):
         """Busca veículo por ID e depois por chassi se necessário"""
         try:
+            # Com o índice da grade, pesquisa primeiro pelo valor que existe nela; a ausência
+            # no índice não é conclusiva e cai nas pesquisas por ID e por chassi
+            tried = None
+            if self.vehicle_index is not None:
+                tried = self.vehicle_index.search_term({'ID': vehicle_id, 'CHASSI': chassi})
+                if tried is not None and self._search_vehicle_by_criteria(tried, "ID" if tried == vehicle_id else "CHASSI"):
+                    return True
+            
             # Primeiro tenta buscar por ID
-            if self._search_vehicle_by_criteria(vehicle_id, "ID"):
+            if tried != vehicle_id and self._search_vehicle_by_criteria(vehicle_id, "ID"):
                 return True
             
             # Se não encontrou por ID, tenta por chassi
-            print(f"⚠️ Veículo não encontrado por ID, tentando por chassi: {chassi}")
-            if self._search_vehicle_by_criteria(chassi, "CHASSI"):
-                return True
+            if tried != chassi:
+                print(f"⚠️ Veículo não encontrado por ID, tentando por chassi: {chassi}")
+                if self._search_vehicle_by_criteria(chassi, "CHASSI"):
+                    return True
             
             print(f"❌ Veículo não encontrado nem por ID nem por chassi")
             return False
@@ -249,6 +290,7 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro ao buscar veículo: {str(e)}")
             return False
 
+    @timed()
     def _search_vehicle_by_criteria(self, search_term, criteria_type):
         """Busca veículo por um critério específico"""
         try:
@@ -265,7 +307,6 @@ class OdometerUpdateAutomation:
             search_field.send_keys(str(search_term))
             
             self.wait_for_loading()
-            time.sleep(3)
             
             # Verifica se encontrou resultado na tabela
             result_xpath = f"//div[@class='wj-row']//div[contains(text(), '{search_term}')]"
@@ -284,6 +325,7 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro ao buscar por {criteria_type}: {str(e)}")
             return False
 
+    @timed()
     def edit_vehicle(self):
         """Clica no botão de editar veículo (três pontos)"""
         try:
@@ -413,6 +455,7 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro ao fazer scroll: {str(e)}")
             return False
 
+    @timed()
     def save_changes(self):
         """Salva as alterações (botão Definir)"""
         try:
@@ -450,6 +493,7 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro ao fechar modal: {str(e)}")
             return False
 
+    @timed()
     def process_vehicle(self, vehicle_row):
         """Processa um veículo individual"""
         vehicle_id = vehicle_row['ID']
@@ -573,46 +617,165 @@ class OdometerUpdateAutomation:
                 pass
             return False
 
+    def checkpoint_key(self, vehicle_row):
+        """Chave do veículo no diário de checkpoint"""
+        return f"{vehicle_row['CLIENTE']}:{vehicle_row['ID']}"
+
+    def record_checkpoint(self, vehicle_row, status, **data):
+        """Registra o resultado do veículo no diário de checkpoint"""
+        if self.journal:
+            self.journal.record(self.checkpoint_key(vehicle_row), status, chassi=vehicle_row['CHASSI'], **data)
+
+    def skip_completed_vehicles(self):
+        """Remove da fila os veículos já concluídos em uma execução anterior"""
+        keys = self.vehicles_data['CLIENTE'] + ':' + self.vehicles_data['ID']
+        done_mask = keys.map(self.journal.is_done).astype(bool)
+        skipped = int(done_mask.sum())
+        if skipped:
+            self.vehicles_data = self.vehicles_data[~done_mask]
+            print(f"⏭️ {skipped} veículos já concluídos foram pulados")
+
+    def setup_odometer_api(self, client):
+        """Cria o transporte HTTP do cliente logado e resolve veículo -> unidade de todos os veículos dele"""
+        if not USE_HTTP_ODOMETER:
+            return
+        self.odometer_api = MzoneHttpTransport.from_driver(self.driver)
+        if not self.odometer_api:
+            return
+        
+        client_ids = self.vehicles_data.loc[self.vehicles_data['CLIENTE'] == client, 'ID'].tolist()
+        try:
+            units = self.odometer_api.find_units(client_ids)
+            print(f"⚡ API de odômetro ativa: {len(units)}/{len(client_ids)} unidades resolvidas")
+        except TransportError as e:
+            print(f"⚠️ Unidades não resolvidas pela API ({e}), usando o modal")
+            self.close_odometer_api()
+    
+    @timed()
+    def prepare_vehicle_index(self, client):
+        """
+        Indexa a grade de veículos do cliente logado
+        
+        Os veículos fora do índice não são descartados: a grade pode estar paginada ou
+        parcialmente carregada, então eles seguem para a pesquisa na tela.
+        """
+        self.vehicle_index = None
+        if not USE_VEHICLE_INDEX:
+            return
+        
+        # Veículos com a unidade resolvida pela API não passam pela grade
+        resolved = self.odometer_api.unit_ids if self.odometer_api else {}
+        client_vehicles = vehicle_records(self.vehicles_data[self.vehicles_data['CLIENTE'] == client])
+        vehicles = [v for v in client_vehicles if str(v['ID']).strip() not in resolved]
+        if not vehicles:
+            return
+        
+        self.vehicle_index, missing = build_vehicle_index(
+            self.driver, client, vehicles, self.navigate_to_vehicles, self.index_cache
+        )
+        if missing:
+            print(f"🔍 {len(missing)} veículo(s) de {client} fora do índice da grade, serão confirmados na pesquisa")
+    
+    def close_odometer_api(self):
+        """Fecha o transporte HTTP do cliente atual"""
+        if self.odometer_api:
+            self.odometer_api.close()
+            self.odometer_api = None
+    
+    @timed()
+    def adjust_odometer_http(self, vehicle_row):
+        """
+        Ajusta o odômetro pela API, sem abrir o modal
+        
+        Returns:
+            bool: True se o ajuste foi gravado; False para seguir pelo modal;
+                None se a API pode ter gravado o ajuste (já reportado, sem modal)
+        """
+        try:
+            self.odometer_api.adjust_odometer(vehicle_row['ID'], vehicle_row['ODOMETRO'])
+        except UncertainWriteError as e:
+            # Refazer pelo modal incluiria um segundo ajuste na unidade
+            print(f"⚠️ API de odômetro sem confirmação para {vehicle_row['ID']} ({e}); confira antes de refazer")
+            self.report['errors'].append({
+                'id': vehicle_row['ID'],
+                'chassi': vehicle_row['CHASSI'],
+                'error': f"Ajuste sem confirmação da API, conferir antes de refazer ({e})"
+            })
+            return None
+        except TransportError as e:
+            print(f"⚠️ API de odômetro falhou para {vehicle_row['ID']} ({e}), usando o modal...")
+            return False
+        
+        self.report['success'].append({
+            'id': vehicle_row['ID'],
+            'chassi': vehicle_row['CHASSI'],
+            'odometer': vehicle_row['ODOMETRO']
+        })
+        print(f"✅ Odômetro ajustado pela API: {vehicle_row['ID']}")
+        return True
+
+    def release_client(self, client):
+        """Encerra o navegador de um cliente (sessão guardada no cofre, ou logout)"""
+        if self.driver is None:
+            return
+        try:
+            self.end_client_session(client)
+        finally:
+            self.close_odometer_api()
+            self.driver.quit()
+
     def run(self):
         """Executa a automação completa"""
+        contexts = ClientContexts(self, CLIENT_CONTEXT_ATTRIBUTES, self.release_client, MAX_CLIENT_BROWSERS)
         try:
             print("🚀 Iniciando automação de atualização de odômetro")
             print("="*60)
             
-            # Configurações iniciais
-            if not self.setup_driver():
+            # Planilha validada antes de abrir o navegador (credenciais primeiro: os clientes são conferidos na leitura)
+            if not self.load_credentials():
                 return False
             
             if not self.load_excel_data():
                 return False
             
-            if not self.load_credentials():
+            self.journal = open_journal('odometro')
+            self.skip_completed_vehicles()
+            
+            if self.vehicles_data.empty:
+                print("✅ Todos os veículos já foram concluídos")
+                return True
+            
+            if not self.setup_driver():
                 return False
             
             print(f"📊 Total de veículos a processar: {len(self.vehicles_data)}")
             
-            # Processa veículos agrupados por cliente
-            current_client = None
+            # Processa veículos agrupados por cliente, com um navegador logado por cliente
+            failed_clients = set()
             processed_count = 0
             
-            for index, vehicle_row in self.vehicles_data.iterrows():
+            for vehicle_row in vehicle_records(self.vehicles_data):
                 client = vehicle_row['CLIENTE']
                 
                 print(f"\n{'='*40}")
                 print(f"Progresso: {processed_count + 1}/{len(self.vehicles_data)}")
                 print(f"{'='*40}")
                 
-                # Faz login se mudou de cliente
-                if client != current_client:
-                    if current_client is not None:
-                        print(f"🔄 Mudando de cliente: {current_client} → {client}")
-                        self.logout()
+                if client in failed_clients:
+                    continue
+                
+                # Mudança de cliente: volta ao navegador dele ou abre um novo e faz login
+                if client != contexts.current:
+                    if contexts.current is not None:
+                        print(f"🔄 Mudando de cliente: {contexts.current} → {client}")
                     
-                    if not self.login(client):
+                    if contexts.switch(client):
+                        print(f"♻️ Navegador do cliente {client} reaproveitado")
+                    elif (self.driver is None and not self.setup_driver()) or not self.login(client):
                         print(f"❌ Falha no login para cliente: {client}")
                         # Adiciona todos os veículos deste cliente aos erros de login
                         client_vehicles = self.vehicles_data[self.vehicles_data['CLIENTE'] == client]
-                        for _, v in client_vehicles.iterrows():
+                        for v in vehicle_records(client_vehicles):
                             self.report['login_errors'].append({
                                 'id': v['ID'],
                                 'chassi': v['CHASSI'],
@@ -621,19 +784,38 @@ class OdometerUpdateAutomation:
                             })
                         # Pula todos os veículos deste cliente
                         processed_count += len(client_vehicles)
+                        failed_clients.add(client)
+                        contexts.discard_current()
                         continue
                     
-                    if not self.navigate_to_vehicles():
-                        print(f"❌ Falha ao navegar para veículos do cliente: {client}")
-                        continue
-                    
-                    current_client = client
                     print(f"✅ Logado como cliente: {client}")
+                    self.setup_odometer_api(client)
+                    self.prepare_vehicle_index(client)
+                
+                # Uma requisição por veículo quando a API está disponível
+                adjusted = self.adjust_odometer_http(vehicle_row) if self.odometer_api else False
+                if adjusted is not False:
+                    processed_count += 1
+                    self.record_checkpoint(vehicle_row, 'success' if adjusted else 'uncertain', odometro=vehicle_row['ODOMETRO'])
+                    continue
+                
+                # Imediato quando a página de veículos do cliente já foi preparada
+                if not self.navigate_to_vehicles():
+                    print(f"❌ Falha ao navegar para veículos do cliente: {client}")
+                    continue
                 
                 # Processa o veículo
+                not_found_before = len(self.report['not_found'])
                 success = self.process_vehicle(vehicle_row)
                 processed_count += 1
                 
+                if success:
+                    self.record_checkpoint(vehicle_row, 'success', odometro=vehicle_row['ODOMETRO'])
+                elif len(self.report['not_found']) > not_found_before:
+                    self.record_checkpoint(vehicle_row, 'not_found')
+                else:
+                    self.record_checkpoint(vehicle_row, 'error')
+                
                 if success:
                     print(f"🎯 Sucesso! Veículo {vehicle_row['ID']} processado")
                 else:
@@ -648,9 +830,8 @@ class OdometerUpdateAutomation:
                     error_count = len(self.report['errors']) + len(self.report['not_found']) + len(self.report['login_errors'])
                     print(f"📈 Progresso atual: {success_count} sucessos, {error_count} erros")
             
-            # Logout final
-            if current_client is not None:
-                self.logout()
+            # Guarda as sessões dos clientes abertos (ou logout, sem o cofre) e fecha os navegadores
+            contexts.close()
             
             # Exibe relatório final
             self.show_final_report()
@@ -662,6 +843,10 @@ class OdometerUpdateAutomation:
             print(f"❌ Erro geral na automação: {str(e)}")
             self.show_final_report()
         finally:
+            contexts.close()
+            if self.journal:
+                self.journal.close()
+            export_metrics('odometro')
             if self.driver:
                 print("🔄 Fechando navegador...")
                 self.driver.quit()
@@ -791,9 +976,7 @@ def main():
     print("   • Não interfira no navegador durante a execução")
     print("   • Em caso de erro, o script continuará com o próximo veículo")
     
-    response = input("\n🚀 Deseja iniciar a automação? (s/n): ").lower().strip()
-    
-    if response in ['s', 'sim', 'y', 'yes']:
+    if confirm('iniciar', "\n🚀 Deseja iniciar a automação? (s/n): "):
         automation = OdometerUpdateAutomation()
         automation.run()
     else:
@@ -0,0 +1,175 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Script injetado na página: conta requisições XHR/fetch pendentes e registra
+# o horário da última inclusão/remoção de nós no DOM. É idempotente (pode rodar várias vezes).
+# Atributos e textos ficam de fora: relógios, tooltips e animações os alteram o tempo todo.
+READINESS_HOOK_JS = """
+(function () {
+    if (window.__scopeReady) { return; }
+    var state = { pending: 0, lastActivity: Date.now() };
+    window.__scopeReady = state;
+
+    function touch() { state.lastActivity = Date.now(); }
+    function done() { state.pending = Math.max(0, state.pending - 1); touch(); }
+
+    var origOpen = XMLHttpRequest.prototype.open;
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function () {
+        this.__scopeTracked = false;
+        return origOpen.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        if (!this.__scopeTracked) {
+            this.__scopeTracked = true;
+            state.pending += 1;
+            touch();
+            this.addEventListener('loadend', done);
+        }
+        return origSend.apply(this, arguments);
+    };
+
+    if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function () {
+            state.pending += 1;
+            touch();
+            return origFetch.apply(this, arguments).then(
+                function (r) { done(); return r; },
+                function (e) { done(); throw e; }
+            );
+        };
+    }
+
+    function observe() {
+        if (!document.documentElement) { return setTimeout(observe, 10); }
+        new MutationObserver(touch).observe(document.documentElement, { childList: true, subtree: true });
+    }
+    observe();
+})();
+"""
+
+# Retorna um retrato do estado atual da página em uma única chamada
+READINESS_STATE_JS = """
+var state = window.__scopeReady;
+var angularStable = true;
+try {
+    if (window.getAllAngularTestabilities) {
+        angularStable = window.getAllAngularTestabilities().every(function (t) { return t.isStable(); });
+    }
+} catch (e) {}
+
+var spinnerVisible = false;
+var nodes = document.querySelectorAll(
+    "div[class*='loading'], div[class*='spinner'], div[class*='loader'], .wj-state-loading"
+);
+for (var i = 0; i < nodes.length; i++) {
+    var el = nodes[i];
+    if (el.offsetParent !== null && el.getClientRects().length > 0) { spinnerVisible = true; break; }
+}
+
+return {
+    installed: !!state,
+    pending: state ? state.pending : 0,
+    quietMs: state ? Date.now() - state.lastActivity : 0,
+    documentReady: document.readyState === 'complete',
+    angularStable: angularStable,
+    spinnerVisible: spinnerVisible
+};
+"""
+
+
+class PageReadiness:
+    """Aguarda a página ficar pronta com base em sinais reais do navegador"""
+
+    def __init__(self, driver, timeout=15, quiet_ms=400, max_quiet_wait_ms=1500, poll_interval=0.1):
+        """
+        Args:
+            driver: instância do WebDriver
+            timeout (float): tempo máximo de espera em segundos
+            quiet_ms (int): janela sem requisições nem mutações do DOM para considerar a página estável
+            max_quiet_wait_ms (int): sem requisições pendentes nem spinner, tempo máximo aguardando
+                o DOM ficar quieto (páginas que nunca param de redesenhar não esperam até o timeout)
+            poll_interval (float): intervalo entre verificações em segundos
+        """
+        self.driver = driver
+        self.timeout = timeout
+        self.quiet_ms = quiet_ms
+        self.max_quiet_wait_ms = max_quiet_wait_ms
+        self.poll_interval = poll_interval
+        self.cdp_registered = False
+
+    def install(self):
+        """Registra o hook para todo novo documento (CDP) e injeta na página atual"""
+        if not self.cdp_registered:
+            try:
+                self.driver.execute_cdp_cmd(
+                    "Page.addScriptToEvaluateOnNewDocument", {"source": READINESS_HOOK_JS}
+                )
+                self.cdp_registered = True
+            except Exception as e:
+                logger.debug(f"CDP indisponível, hook será injetado sob demanda: {e}")
+        try:
+            self.driver.execute_script(READINESS_HOOK_JS)
+        except Exception as e:
+            logger.debug(f"Não foi possível injetar hook de prontidão: {e}")
+
+    def snapshot(self):
+        """Lê o estado de prontidão da página"""
+        return self.driver.execute_script(READINESS_STATE_JS)
+
+    def is_idle(self, state):
+        """Sem requisições pendentes, sem spinner e com o documento carregado"""
+        return (
+            state['installed']
+            and state['documentReady']
+            and state['pending'] == 0
+            and state['angularStable']
+            and not state['spinnerVisible']
+        )
+
+    def is_ready(self, state, idle_ms=0):
+        """
+        Avalia se o estado lido indica página pronta
+
+        Args:
+            idle_ms (float): há quanto tempo a página está ociosa (is_idle) sem interrupção
+        """
+        if not self.is_idle(state):
+            return False
+        return state['quietMs'] >= self.quiet_ms or idle_ms >= self.max_quiet_wait_ms
+
+    def wait(self, timeout=None):
+        """
+        Aguarda até a página estar pronta
+
+        Returns:
+            bool: True se a página estabilizou, False se atingiu o tempo limite
+        """
+        deadline = time.time() + (timeout if timeout is not None else self.timeout)
+        idle_since = None
+
+        while True:
+            try:
+                state = self.snapshot()
+                if not state['installed']:
+                    # Navegação recarregou o documento antes do hook CDP existir
+                    self.install()
+                    idle_since = None
+                else:
+                    if not self.is_idle(state):
+                        idle_since = None
+                    elif idle_since is None:
+                        idle_since = time.time()
+                    idle_ms = (time.time() - idle_since) * 1000 if idle_since else 0
+                    if self.is_ready(state, idle_ms):
+                        return True
+            except Exception as e:
+                # Documento em transição (navegação em andamento)
+                logger.debug(f"Falha ao ler estado da página: {e}")
+
+            if time.time() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
@@ -1,6 +1,5 @@
-import pandas as pd
 import time
-from selenium import webdriver
+import queue
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -8,23 +7,110 @@ from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import os
 
+from checkpoint_journal import open_journal
+from locator_cache import registry as locators, wait_for
+from quantigo_api import QuantigoApiClient, QuantigoApiError, DEINSTALLATION_LOCATION
+from run_telemetry import timed, export_metrics
+from batch_mode import ask, pause, wait_for_login, batch_requested
+from session_vault import open_vault
+from sheet_ingest import read_code_column, sheet_columns
+from driver_factory import create_chrome, handoff_to_headless
+from table_snapshot import snapshot_table
+from worker_pool import WorkerPool
+
+# Página de subscriptions do Quantigo
+QTGO_URL = "https://quantigo.scopemp.net/app/subscriptions"
+QTGO_ORIGIN = "https://quantigo.scopemp.net/"
+
+# Sessão do login manual guardada no cofre entre execuções
+SESSION_SITE = "qtgo"
+SESSION_CLIENT = "manual"
+
+# Quantidade padrão de navegadores no modo paralelo
+DEFAULT_WORKERS = 3
+
+# Pesquisa e desinstala pela API do Quantigo; o navegador fica como fallback
+USE_API_BACKEND = True
+
+# Lê o localStorage/sessionStorage do SPA (onde fica o token do login)
+CAPTURE_STORAGE_JS = """
+function dump(store) {
+    var data = {};
+    for (var i = 0; i < store.length; i++) { data[store.key(i)] = store.getItem(store.key(i)); }
+    return data;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+RESTORE_STORAGE_JS = """
+var state = arguments[0];
+Object.keys(state.local).forEach(function (k) { window.localStorage.setItem(k, state.local[k]); });
+Object.keys(state.session).forEach(function (k) { window.sessionStorage.setItem(k, state.session[k]); });
+"""
+
+
+def find_icon_button(icon_name):
+    """Estratégia: percorre os mat-icon-button e retorna o que tem o ícone informado"""
+    def strategy(driver, timeout):
+        for button in driver.find_elements(By.CSS_SELECTOR, "button.mat-icon-button"):
+            icons = button.find_elements(By.CSS_SELECTOR, "mat-icon")
+            if icons and icons[0].text == icon_name:
+                return button
+        return None
+    return strategy
+
+
+def find_button_by_text(*texts):
+    """Estratégia: percorre todos os botões e retorna o primeiro cujo texto contém um dos valores"""
+    def strategy(driver, timeout):
+        for button in driver.find_elements(By.CSS_SELECTOR, "button"):
+            if any(text in button.text for text in texts):
+                return button
+        return None
+    return strategy
+
+
+# Estratégias (nome, estratégia) para o botão de pesquisa da tabela de subscriptions
+SEARCH_BUTTON_STRATEGIES = [
+    ("icone_search", wait_for(By.XPATH, "//button[contains(@class, 'mat-icon-button')]//mat-icon[text()='search']/ancestor::button")),
+    ("acoes_da_tabela", wait_for(By.XPATH, "//div[contains(@class, 'quantigo-table-actions')]//button[@mat-icon-button][.//mat-icon[@role='img']]", EC.presence_of_element_located)),
+    ("acoes_da_tabela_texto", wait_for(By.XPATH, "//div[contains(@class, 'quantigo-table-actions')]//button//mat-icon[contains(text(), 'search')]/parent::*/parent::button", EC.presence_of_element_located)),
+    ("varredura_icon_buttons", find_icon_button("search")),
+]
+
+# Estratégias (nome, estratégia) para o botão OK do modal de desinstalação
+OK_BUTTON_STRATEGIES = [
+    ("stroked_primary", wait_for(By.CSS_SELECTOR, "button.mat-stroked-button.mat-button-base.mat-primary")),
+    ("stroked_span_ok", wait_for(By.XPATH, "//button[contains(@class, 'mat-stroked-button') and contains(span, 'Ok')]")),
+    ("color_primary", wait_for(By.CSS_SELECTOR, "button[color='primary'][mat-stroked-button]")),
+    ("texto_ok", wait_for(By.XPATH, "//button[contains(text(), 'Ok')]")),
+    ("stroked_span_ok_exato", wait_for(By.XPATH, "//button[contains(@class, 'mat-stroked-button') and .//span[text()='Ok']]")),
+    ("varredura_botoes", find_button_by_text("Ok", "OK")),
+]
+
 class ChassisAutomation:
     def __init__(self):
         self.driver = None
         self.processed_chassis = []
         self.failed_chassis = []
         self.successful_chassis = []
+        self.journal = None
+        self.session_state = None  # Sessão do login manual replicada nos workers
+        self.api = None  # Cliente da API (QuantigoApiClient) quando disponível
+        self.vault = open_vault()
         
-    def setup_driver(self):
-        """Configura o driver do Chrome"""
-        options = webdriver.ChromeOptions()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        self.driver.maximize_window()
+    def setup_driver(self, headless=False):
+        """Configura o driver do Chrome (headless usa o perfil de vazão)"""
+        self.driver = create_chrome(headless=headless)
+    
+    def continue_headless(self):
+        """Depois do login manual, segue o trabalho em navegador do perfil de vazão"""
+        self.driver = handoff_to_headless(
+            self.driver, QTGO_URL,
+            ready=lambda d: WebDriverWait(d, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input.mat-input-element[placeholder='Search']"))
+            )
+        )
         
     def load_chassis_list(self):
         """Carrega a lista de chassis do Excel ou input manual"""
@@ -32,7 +118,8 @@ class ChassisAutomation:
         print("1. Carregar de arquivo Excel (QTGO_ID.xlsx)")
         print("2. Inserir lista manualmente")
         
-        choice = input("\nEscolha uma opção (1 ou 2): ").strip()
+        # Sem interação, os chassis vêm sempre do Excel
+        choice = "1" if batch_requested() else input("\nEscolha uma opção (1 ou 2): ").strip()
         
         chassis_list = []
         
@@ -44,29 +131,29 @@ class ChassisAutomation:
                 if not os.path.exists(file_path):
                     print(f"❌ Arquivo não encontrado: {file_path}")
                     print("📁 Certifique-se de que o arquivo QTGO_ID.xlsx está na raiz do projeto")
-                    return self.load_chassis_list()
+                    return [] if batch_requested() else self.load_chassis_list()
                 
                 print(f"📊 Carregando arquivo: {file_path}")
-                df = pd.read_excel(file_path)
+                columns = sheet_columns(file_path)
                 
                 print("📋 Colunas disponíveis no Excel:")
-                for i, col in enumerate(df.columns):
+                for i, col in enumerate(columns):
                     print(f"   {i+1}. {col}")
                 
-                col_choice = input("\n🔢 Digite o número da coluna que contém os chassis: ").strip()
+                col_choice = ask('coluna_chassis', "\n🔢 Digite o número da coluna que contém os chassis: ", 1)
                 try:
                     col_index = int(col_choice) - 1
-                    column_name = df.columns[col_index]
-                    chassis_list = df[column_name].dropna().astype(str).tolist()
+                    column_name = columns[col_index]
+                    chassis_list = read_code_column(file_path, column_name)
                     print(f"✅ Coluna selecionada: {column_name}")
                 except (ValueError, IndexError):
                     print("❌ Opção inválida!")
-                    return self.load_chassis_list()
+                    return [] if batch_requested() else self.load_chassis_list()
                     
             except Exception as e:
                 print(f"❌ Erro ao ler o arquivo Excel: {e}")
                 print("💡 Verifique se o arquivo não está aberto em outro programa")
-                return self.load_chassis_list()
+                return [] if batch_requested() else self.load_chassis_list()
                 
         elif choice == "2":
             print("📝 Cole a lista de chassis (um por linha). Digite 'FIM' para finalizar:")
@@ -94,14 +181,31 @@ class ChassisAutomation:
         return chassis_list
     
     def wait_for_manual_login(self):
-        """Abre o sistema e aguarda login manual"""
+        """Abre o sistema e aguarda login manual (dispensado quando a sessão salva ainda vale)"""
         print(f"\n=== ABRINDO SISTEMA ===")
-        self.driver.get("https://quantigo.scopemp.net/app/subscriptions")
+        if self.vault.restore(self.driver, SESSION_SITE, SESSION_CLIENT):
+            self.driver.get(QTGO_URL)
+            self.wait_for_loading_to_finish()
+            if not self.check_if_logged_out():
+                print("♻️ Sessão salva reaproveitada, login manual dispensado")
+                return
+            print("⚠️ Sessão salva expirada, login manual necessário")
+            self.vault.forget(SESSION_SITE, SESSION_CLIENT)
+            self.vault.clear_browser(self.driver)
+        
+        self.driver.get(QTGO_URL)
         
         print("🌐 Sistema aberto no navegador.")
         print("🔑 Faça login manualmente e aguarde a página de subscriptions carregar.")
-        input("⏳ Pressione ENTER quando estiver na página de subscriptions e pronto para iniciar a automação...")
+        logged_in = wait_for_login(
+            self.driver, lambda d: not self.check_if_logged_out(),
+            "⏳ Pressione ENTER quando estiver na página de subscriptions e pronto para iniciar a automação..."
+        )
+        if not logged_in and batch_requested():
+            raise RuntimeError("login manual não concluído no modo batch")
+        self.vault.capture(self.driver, SESSION_SITE, SESSION_CLIENT)
         
+    @timed()
     def search_chassis(self, chassis):
         """Pesquisa um chassis específico"""
         try:
@@ -122,44 +226,15 @@ class ChassisAutomation:
             time.sleep(0.5)
             print(f"🔍 Chassis '{chassis}' digitado no campo de busca")
             
-            # Localiza e clica no botão de pesquisa ESPECÍFICO
+            # Localiza o botão de pesquisa começando pela estratégia que funcionou da última vez
+            search_button = locators.find(self.driver, "qtgo/subscriptions/search_button", SEARCH_BUTTON_STRATEGIES)
+            if search_button is None:
+                raise Exception("Não foi possível encontrar o botão de search")
             try:
-                # Método 1: Busca o botão que contém especificamente o ícone "search"
-                search_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'mat-icon-button')]//mat-icon[text()='search']/ancestor::button"))
-                )
                 search_button.click()
-                print(f"🔍 Botão de busca clicado (método 1) para chassis: {chassis}")
-            except:
-                try:
-                    # Método 2: Busca dentro da div quantigo-table-actions o botão com ícone search
-                    search_button = self.driver.find_element(By.CSS_SELECTOR, ".quantigo-table-actions button[mat-icon-button] mat-icon[role='img'][aria-hidden='true']")
-                    # Clica no botão pai (o button)
-                    search_button = search_button.find_element(By.XPATH, "./ancestor::button")
-                    search_button.click()
-                    print(f"🔍 Botão de busca clicado (método 2) para chassis: {chassis}")
-                except:
-                    try:
-                        # Método 3: JavaScript click no botão específico que contém "search"
-                        search_button = self.driver.find_element(By.XPATH, "//div[contains(@class, 'quantigo-table-actions')]//button//mat-icon[contains(text(), 'search')]/parent::*/parent::button")
-                        self.driver.execute_script("arguments[0].click();", search_button)
-                        print(f"🔍 Botão de busca clicado (método 3 - JavaScript) para chassis: {chassis}")
-                    except:
-                        # Método 4: Busca o segundo botão mat-icon-button (assumindo que o primeiro é o menu)
-                        search_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button.mat-icon-button")
-                        if len(search_buttons) >= 2:
-                            # Verifica qual contém o ícone search
-                            for btn in search_buttons:
-                                try:
-                                    icon = btn.find_element(By.CSS_SELECTOR, "mat-icon")
-                                    if icon.text == "search":
-                                        btn.click()
-                                        print(f"🔍 Botão de busca clicado (método 4) para chassis: {chassis}")
-                                        break
-                                except:
-                                    continue
-                        else:
-                            raise Exception("Não foi possível encontrar o botão de search")
+            except WebDriverException:
+                self.driver.execute_script("arguments[0].click();", search_button)
+            print(f"🔍 Botão de busca clicado para chassis: {chassis}")
             
             # IMPORTANTE: Aguarda o loading terminar antes de continuar
             print(f"⏳ Aguardando sistema carregar resultados para chassis: {chassis}...")
@@ -235,42 +310,28 @@ class ChassisAutomation:
             # Aguarda um pouco mais para garantir que os dados carregaram
             time.sleep(2)
             
-            # Procura por todas as linhas da tabela usando o seletor correto
-            table_rows = self.driver.find_elements(By.CSS_SELECTOR, "tr.material-table-row.mat-row")
+            # Lê todas as linhas da tabela em uma única chamada ao navegador
+            table_rows = snapshot_table(self.driver, None, "tr.material-table-row.mat-row") or []
             
             active_rows = []
             
             for row in table_rows:
-                # Procura pela célula de status na linha usando o seletor correto
-                try:
-                    status_cell = row.find_element(By.CSS_SELECTOR, "td.mat-cell-bold.mat-cell.cdk-column-status")
-                    status_text = status_cell.text.strip()
-                    print(f"📊 Status encontrado: '{status_text}'")
+                # Célula de status identificada pela coluna cdk-column-status
+                status_text = row['columns'].get('status')
+                if status_text is None:
+                    print("⚠️ Não foi possível encontrar célula de status nesta linha")
+                    continue
+                
+                print(f"📊 Status encontrado: '{status_text}'")
+                
+                if status_text == "Active":
+                    active_rows.append(row['element'])
+                    print(f"✅ Registro ativo encontrado!")
                     
-                    if status_text == "Active":
-                        active_rows.append(row)
-                        print(f"✅ Registro ativo encontrado!")
-                        
-                        # Debug: mostra informações da linha
-                        try:
-                            description_cell = row.find_element(By.CSS_SELECTOR, "td.cdk-column-description")
-                            print(f"📝 Descrição: {description_cell.text[:50]}...")
-                        except:
-                            pass
-                            
-                except NoSuchElementException:
-                    # Tenta seletor alternativo para status
-                    try:
-                        status_cell = row.find_element(By.CSS_SELECTOR, "td.cdk-column-status")
-                        status_text = status_cell.text.strip()
-                        print(f"📊 Status encontrado (alternativo): '{status_text}'")
-                        
-                        if status_text == "Active":
-                            active_rows.append(row)
-                            print(f"✅ Registro ativo encontrado (seletor alternativo)!")
-                    except NoSuchElementException:
-                        print("⚠️ Não foi possível encontrar célula de status nesta linha")
-                        continue
+                    # Debug: mostra informações da linha
+                    description = row['columns'].get('description')
+                    if description is not None:
+                        print(f"📝 Descrição: {description[:50]}...")
             
             print(f"📈 Total de registros com status Active: {len(active_rows)}")
             return active_rows
@@ -308,6 +369,7 @@ class ChassisAutomation:
             print(f"❌ Erro aguardando modal aparecer: {e}")
             return False
     
+    @timed()
     def click_deinstallation_button(self, row):
         """Clica no botão de desinstalação na linha especificada"""
         try:
@@ -380,6 +442,7 @@ class ChassisAutomation:
                 print(f"❌ Falha também no método alternativo: {e2}")
                 return False
     
+    @timed()
     def fill_modal_and_confirm(self):
         """Preenche o modal de desinstalação e confirma"""
         try:
@@ -395,64 +458,12 @@ class ChassisAutomation:
             # Preenche com "REMOÇÃO"
             location_input.clear()
             time.sleep(0.5)
-            location_input.send_keys("REMOÇÃO")
+            location_input.send_keys(DEINSTALLATION_LOCATION)
             
             print("🔍 Campo preenchido, procurando botão OK...")
             
-            # Múltiplas tentativas para encontrar e clicar no botão OK
-            ok_button = None
-            selectors = [
-                # Seletor baseado no HTML fornecido
-                "button.mat-stroked-button.mat-button-base.mat-primary",
-                # Seletor alternativo por texto
-                "//button[contains(@class, 'mat-stroked-button') and contains(span, 'Ok')]",
-                # Seletor mais específico
-                "button[color='primary'][mat-stroked-button]",
-                # Seletor genérico por texto
-                "//button[contains(text(), 'Ok')]",
-                # Seletor alternativo
-                "button.mat-stroked-button span:contains('Ok')",
-                # Seletor XPath mais robusto
-                "//button[contains(@class, 'mat-stroked-button') and .//span[text()='Ok']]"
-            ]
-            
-            for i, selector in enumerate(selectors):
-                try:
-                    print(f"🔄 Tentativa {i+1}: usando seletor '{selector}'")
-                    
-                    if selector.startswith("//"):
-                        # XPath selector
-                        ok_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        # CSS selector
-                        ok_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                    
-                    print(f"✅ Botão OK encontrado com seletor {i+1}")
-                    break
-                    
-                except TimeoutException:
-                    print(f"⚠️ Seletor {i+1} não funcionou, tentando próximo...")
-                    continue
-                except Exception as e:
-                    print(f"❌ Erro com seletor {i+1}: {e}")
-                    continue
-            
-            if not ok_button:
-                print("🔍 Tentando encontrar todos os botões do modal...")
-                # Última tentativa: encontrar todos os botões e procurar pelo texto
-                all_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button")
-                for button in all_buttons:
-                    try:
-                        if "Ok" in button.text or "OK" in button.text:
-                            ok_button = button
-                            print(f"✅ Botão OK encontrado por busca em todos os botões: '{button.text}'")
-                            break
-                    except:
-                        continue
+            # Tenta primeiro o seletor que encontrou o botão OK da última vez
+            ok_button = locators.find(self.driver, "qtgo/subscriptions/deinstall_ok_button", OK_BUTTON_STRATEGIES)
             
             if not ok_button:
                 raise Exception("Não foi possível encontrar o botão OK em nenhuma tentativa")
@@ -516,6 +527,7 @@ class ChassisAutomation:
                 pass
             return False
     
+    @timed()
     def process_chassis(self, chassis):
         """Processa um chassi completo"""
         print(f"\n--- 🚗 Processando chassis: {chassis} ---")
@@ -524,6 +536,7 @@ class ChassisAutomation:
             # 1. Pesquisa o chassis
             if not self.search_chassis(chassis):
                 self.failed_chassis.append(f"{chassis} - Erro na pesquisa")
+                self.record_checkpoint(chassis, 'error', motivo='Erro na pesquisa')
                 return False
             
             # 2. Encontra registros ativos
@@ -532,6 +545,7 @@ class ChassisAutomation:
             if not active_rows:
                 print(f"⚠️ Nenhum registro ativo encontrado para {chassis}")
                 self.failed_chassis.append(f"{chassis} - Nenhum registro ativo")
+                self.record_checkpoint(chassis, 'skipped', motivo='Nenhum registro ativo')
                 return False
             
             # 3. Processa cada registro ativo
@@ -554,16 +568,24 @@ class ChassisAutomation:
             if processed_count > 0:
                 self.successful_chassis.append(f"{chassis} - {processed_count} registro(s) processado(s)")
                 print(f"🎉 Chassis {chassis} processado com sucesso! ({processed_count} registros)")
+                self.record_checkpoint(chassis, 'success', registros=processed_count)
                 return True
             else:
                 self.failed_chassis.append(f"{chassis} - Falha no processamento")
+                self.record_checkpoint(chassis, 'error', motivo='Falha no processamento')
                 return False
                 
         except Exception as e:
             print(f"❌ Erro geral ao processar chassis {chassis}: {e}")
             self.failed_chassis.append(f"{chassis} - Erro: {str(e)}")
+            self.record_checkpoint(chassis, 'error', motivo=str(e))
             return False
     
+    def record_checkpoint(self, chassis, status, **data):
+        """Registra o resultado do chassis no diário de checkpoint"""
+        if self.journal:
+            self.journal.record(chassis, status, **data)
+    
     def check_if_logged_out(self):
         """Verifica se o usuário foi deslogado - chamado apenas quando há erro"""
         try:
@@ -593,6 +615,175 @@ class ChassisAutomation:
         except:
             return True  # Em caso de erro, assume que foi deslogado
     
+    def ask_worker_count(self):
+        """Pergunta quantos navegadores devem processar a fila em paralelo"""
+        print("\n=== MODO DE EXECUÇÃO ===")
+        print("1. Sequencial (apenas este navegador)")
+        print("2. Paralelo (vários navegadores com o mesmo login)")
+        
+        # Sem interação: 'navegadores' do batch.json (1 é sequencial)
+        choice = "2" if batch_requested() else input("\nEscolha uma opção (1 ou 2): ").strip()
+        if choice == "1":
+            return 1
+        if choice == "2":
+            workers = ask('navegadores', f"🔢 Quantidade de navegadores simultâneos [{DEFAULT_WORKERS}]: ", DEFAULT_WORKERS)
+            if not workers:
+                return DEFAULT_WORKERS
+            if workers.isdigit() and int(workers) > 0:
+                return int(workers)
+        print("❌ Opção inválida!")
+        if batch_requested():
+            return DEFAULT_WORKERS
+        return self.ask_worker_count()
+    
+    def capture_session(self):
+        """Guarda cookies e storage do navegador logado para replicar nos workers"""
+        state = self.driver.execute_script(CAPTURE_STORAGE_JS)
+        state['cookies'] = self.driver.get_cookies()
+        return state
+    
+    def restore_session(self, state):
+        """
+        Autentica este navegador com a sessão capturada do login manual
+        
+        Returns:
+            bool: True se a página de subscriptions abriu logada
+        """
+        # Cookies e storage só podem ser gravados estando na origem do sistema
+        self.driver.get(QTGO_ORIGIN)
+        for cookie in state['cookies']:
+            cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'secure', 'httpOnly', 'expiry')}
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException:
+                # Cookies de outros domínios (login federado) não se aplicam a esta origem
+                continue
+        self.driver.execute_script(RESTORE_STORAGE_JS, state)
+        
+        self.driver.get(QTGO_URL)
+        self.wait_for_loading_to_finish()
+        return not self.check_if_logged_out()
+    
+    def run_queue_worker(self, name, chassis_queue):
+        """Consome chassis da fila compartilhada em um navegador headless com a sessão replicada"""
+        worker = ChassisAutomation()
+        worker.journal = self.journal
+        worker.setup_driver(headless=True)
+        
+        try:
+            if not worker.restore_session(self.session_state):
+                raise RuntimeError("Sessão replicada não foi aceita pelo sistema")
+            print(f"🤖 [{name}] Sessão replicada, consumindo fila...")
+            
+            while True:
+                try:
+                    chassis = chassis_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                failures_before = len(worker.failed_chassis)
+                error = None
+                try:
+                    success = worker.process_chassis(chassis)
+                except Exception as e:
+                    success, error = False, e
+                
+                if not success and worker.check_if_logged_out():
+                    # A falha veio da sessão expirada: desfaz o registro de erro feito por process_chassis
+                    # e devolve o chassis para outro worker (ou para o relatório de pendentes)
+                    print(f"🚨 [{name}] Sessão expirada, encerrando worker")
+                    del worker.failed_chassis[failures_before:]
+                    worker.record_checkpoint(chassis, 'requeued', motivo='Sessão expirada')
+                    chassis_queue.put(chassis)
+                    break
+                if error is not None:
+                    print(f"❌ [{name}] Erro ao processar chassis {chassis}: {error}")
+                    worker.failed_chassis.append(f"{chassis} - Erro: {str(error)}")
+            
+            return worker
+        finally:
+            worker.driver.quit()
+    
+    def run_parallel(self, chassis_list, workers):
+        """Processa a fila de chassis com vários navegadores e une os resultados para o resumo"""
+        self.session_state = self.capture_session()
+        print(f"\n=== ⚡ MODO PARALELO: {len(chassis_list)} CHASSIS EM {workers} NAVEGADORES ===")
+        
+        results, leftover = WorkerPool(workers).run_queue(chassis_list, self.run_queue_worker)
+        
+        for name, worker, error in results:
+            if error is None:
+                self.successful_chassis.extend(worker.successful_chassis)
+                self.failed_chassis.extend(worker.failed_chassis)
+            else:
+                print(f"❌ {name} falhou: {error}")
+        
+        for chassis in leftover:
+            self.failed_chassis.append(f"{chassis} - Não processado (sessões encerradas)")
+    
+    def run_api(self, chassis_list):
+        """
+        Pesquisa todos os chassis de uma vez e desinstala os registros ativos pela API
+        
+        Returns:
+            list: chassis que a API não conseguiu concluir (seguem para o navegador)
+        """
+        print(f"\n=== ⚡ MODO API: PESQUISANDO {len(chassis_list)} CHASSIS ===")
+        results = self.api.search_many(chassis_list)
+        
+        pending = []
+        for chassis in chassis_list:
+            subscriptions = results.get(chassis)
+            if isinstance(subscriptions, QuantigoApiError):
+                print(f"⚠️ Pesquisa pela API falhou para {chassis}, usando o navegador: {subscriptions}")
+                pending.append(chassis)
+                continue
+            
+            if not subscriptions:
+                print(f"⚠️ Nenhum registro ativo encontrado para {chassis}")
+                self.failed_chassis.append(f"{chassis} - Nenhum registro ativo")
+                self.record_checkpoint(chassis, 'skipped', motivo='Nenhum registro ativo')
+                continue
+            
+            processed_count = 0
+            try:
+                for subscription in subscriptions:
+                    self.api.deinstall(subscription)
+                    processed_count += 1
+            except QuantigoApiError as e:
+                # Os registros já desinstalados não aparecem mais como ativos na pesquisa do navegador
+                print(f"⚠️ Desinstalação pela API falhou para {chassis}, usando o navegador: {e}")
+                pending.append(chassis)
+                continue
+            
+            self.successful_chassis.append(f"{chassis} - {processed_count} registro(s) processado(s)")
+            print(f"🎉 Chassis {chassis} processado pela API! ({processed_count} registros)")
+            self.record_checkpoint(chassis, 'success', registros=processed_count)
+        
+        return pending
+    
+    def run_sequential(self, chassis_list):
+        """Processa os chassis um a um no navegador do login manual"""
+        print(f"\n=== 🚀 INICIANDO PROCESSAMENTO DE {len(chassis_list)} CHASSIS ===")
+        
+        for i, chassis in enumerate(chassis_list, 1):
+            print(f"\n📊 Progresso: {i}/{len(chassis_list)}")
+            
+            # Tenta processar o chassis
+            try:
+                self.process_chassis(chassis)
+            except Exception as e:
+                # Se houver erro relacionado a logout, verifica
+                if "login" in str(e).lower() or "auth" in str(e).lower():
+                    if self.check_if_logged_out():
+                        print("🚨 ATENÇÃO: Usuário deslogado! Parando a automação.")
+                        break
+                print(f"❌ Erro ao processar chassis {chassis}: {e}")
+                self.failed_chassis.append(f"{chassis} - Erro: {str(e)}")
+            
+            # Pausa entre chassis
+            time.sleep(2)
+    
     def run_automation(self):
         """Executa a automação completa"""
         try:
@@ -605,31 +796,31 @@ class ChassisAutomation:
                 print("⚠️ Nenhum chassis para processar!")
                 return
             
+            # Retomar execução anterior (pula chassis já concluídos)
+            self.journal = open_journal('qtgo')
+            pending_chassis = self.journal.pending(chassis_list)
+            if len(pending_chassis) < len(chassis_list):
+                print(f"⏭️ {len(chassis_list) - len(pending_chassis)} chassis já concluídos foram pulados")
+            chassis_list = pending_chassis
+            
             # 3. Abrir sistema e aguardar login
             self.wait_for_manual_login()
+            self.continue_headless()
+            
+            # 4. Processar pela API; o que ela não concluir segue para os navegadores
+            if USE_API_BACKEND:
+                self.api = QuantigoApiClient.from_driver(self.driver)
+            if self.api and chassis_list:
+                chassis_list = self.run_api(chassis_list)
+            
+            # 5. Processar os chassis restantes (em paralelo quando escolhido)
+            workers = self.ask_worker_count() if len(chassis_list) > 1 else 1
+            if workers > 1:
+                self.run_parallel(chassis_list, workers)
+            else:
+                self.run_sequential(chassis_list)
             
-            # 4. Processar cada chassis
-            print(f"\n=== 🚀 INICIANDO PROCESSAMENTO DE {len(chassis_list)} CHASSIS ===")
-            
-            for i, chassis in enumerate(chassis_list, 1):
-                print(f"\n📊 Progresso: {i}/{len(chassis_list)}")
-                
-                # Tenta processar o chassis
-                try:
-                    self.process_chassis(chassis)
-                except Exception as e:
-                    # Se houver erro relacionado a logout, verifica
-                    if "login" in str(e).lower() or "auth" in str(e).lower():
-                        if self.check_if_logged_out():
-                            print("🚨 ATENÇÃO: Usuário deslogado! Parando a automação.")
-                            break
-                    print(f"❌ Erro ao processar chassis {chassis}: {e}")
-                    self.failed_chassis.append(f"{chassis} - Erro: {str(e)}")
-                
-                # Pausa entre chassis
-                time.sleep(2)
-            
-            # 5. Mostrar resumo
+            # 6. Mostrar resumo
             self.show_summary()
             
         except KeyboardInterrupt:
@@ -637,8 +828,13 @@ class ChassisAutomation:
         except Exception as e:
             print(f"❌ Erro geral na automação: {e}")
         finally:
+            if self.api:
+                self.api.close()
+            if self.journal:
+                self.journal.close()
+            export_metrics('qtgo')
             if self.driver:
-                input("\n⏸️ Pressione ENTER para fechar o navegador...")
+                pause("\n⏸️ Pressione ENTER para fechar o navegador...")
                 self.driver.quit()
     
     def show_summary(self):
@@ -0,0 +1,175 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+logger = logging.getLogger(__name__)
+
+# API JSON consumida pelo SPA do Quantigo (mesmo host, autenticada pelo token do login)
+QTGO_API_URL = "https://quantigo.scopemp.net/api/"
+
+# Pesquisa de subscriptions (mesmo campo de busca da tela) e desinstalação por id
+SUBSCRIPTIONS_PATH = "subscriptions"
+DEINSTALLATION_PATH = "subscriptions/{id}/deinstallation"
+
+# Valor do campo location preenchido no modal de desinstalação
+DEINSTALLATION_LOCATION = "REMOÇÃO"
+
+# Resultados por página na pesquisa (um chassi raramente passa de poucas subscriptions)
+SEARCH_PAGE_SIZE = 100
+
+# Procura o token salvo pelo SPA no sessionStorage/localStorage (JSON com access_token ou JWT puro)
+CAPTURE_TOKEN_JS = """
+var stores = [window.sessionStorage, window.localStorage];
+for (var s = 0; s < stores.length; s++) {
+    var store = stores[s];
+    for (var i = 0; i < store.length; i++) {
+        var value = store.getItem(store.key(i));
+        if (!value) { continue; }
+        if (/^eyJ[\\w-]*\\.[\\w-]+\\.[\\w-]*$/.test(value)) { return value; }
+        if (value.indexOf('access_token') === -1) { continue; }
+        try {
+            var parsed = JSON.parse(value);
+            if (parsed && parsed.access_token) { return parsed.access_token; }
+        } catch (e) {}
+    }
+}
+return null;
+"""
+
+
+class QuantigoApiError(Exception):
+    """Falha na API; o navegador deve assumir o chassi"""
+
+
+def subscription_items(payload):
+    """Lista de subscriptions da resposta (lista pura ou paginada em items/data/content)"""
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return []
+    for key in ('items', 'data', 'content', 'results'):
+        if isinstance(payload.get(key), list):
+            return payload[key]
+    return []
+
+
+def is_active(subscription):
+    """Mesmo critério da tela: coluna status igual a Active"""
+    return str(subscription.get('status', '')).strip().lower() == 'active'
+
+
+class QuantigoApiClient:
+    """Pesquisa e desinstala subscriptions direto na API, reaproveitando o login do navegador"""
+
+    def __init__(self, session, base_url=QTGO_API_URL, timeout=20, pool_size=10):
+        self.session = session
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+    @classmethod
+    def from_driver(cls, driver, base_url=QTGO_API_URL, pool_size=10, timeout=20):
+        """
+        Cria o cliente a partir de um navegador já logado
+
+        Returns:
+            QuantigoApiClient ou None se a API não estiver acessível
+        """
+        if requests is None:
+            print("⚠️ Pacote 'requests' não instalado; usando apenas o navegador")
+            return None
+
+        token = driver.execute_script(CAPTURE_TOKEN_JS)
+        if not token:
+            print("⚠️ Token do Quantigo não encontrado no navegador; usando apenas o navegador")
+            return None
+
+        session = requests.Session()
+        # Só repete leituras: um POST de desinstalação repetido poderia duplicar a operação
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                      allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'Authorization': f"Bearer {token}",
+            'User-Agent': driver.execute_script("return navigator.userAgent;"),
+        })
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        client = cls(session, base_url=base_url, timeout=timeout, pool_size=pool_size)
+        try:
+            client.get(SUBSCRIPTIONS_PATH, {'pageSize': 1})
+        except QuantigoApiError as e:
+            print(f"⚠️ API do Quantigo indisponível, usando apenas o navegador: {e}")
+            session.close()
+            return None
+
+        print("⚡ API do Quantigo ativa")
+        return client
+
+    def request(self, method, path, **kwargs):
+        """Executa uma chamada na API e converte falhas em QuantigoApiError"""
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise QuantigoApiError(f"{method} {path}: {e}")
+
+        if response.status_code >= 400:
+            raise QuantigoApiError(f"{method} {path}: HTTP {response.status_code}")
+        return response
+
+    def get(self, path, params=None):
+        """GET que retorna o JSON da resposta"""
+        response = self.request('GET', path, params=params)
+        # Caminho errado ou sessão expirada costumam voltar 200 com o index.html do SPA ou a tela de login
+        content_type = response.headers.get('Content-Type', '')
+        if 'json' not in content_type.lower():
+            raise QuantigoApiError(f"GET {path}: resposta não é JSON ({content_type or 'sem Content-Type'})")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise QuantigoApiError(f"GET {path}: JSON inválido ({e})")
+
+    def search(self, chassis):
+        """
+        Pesquisa as subscriptions de um chassi (equivale ao campo Search da tela)
+
+        Returns:
+            list: subscriptions retornadas pela pesquisa
+        """
+        payload = self.get(SUBSCRIPTIONS_PATH, {'search': str(chassis).strip(), 'pageSize': SEARCH_PAGE_SIZE})
+        return subscription_items(payload)
+
+    def search_many(self, chassis_list):
+        """
+        Pesquisa vários chassis em paralelo sobre o pool de conexões
+
+        Returns:
+            dict: chassi -> lista de subscriptions ativas, ou QuantigoApiError se a pesquisa falhou
+        """
+        def lookup(chassis):
+            try:
+                return chassis, [s for s in self.search(chassis) if is_active(s)]
+            except QuantigoApiError as e:
+                return chassis, e
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            return dict(executor.map(lookup, chassis_list))
+
+    def deinstall(self, subscription, location=DEINSTALLATION_LOCATION):
+        """Desinstala a subscription com o mesmo location do modal"""
+        path = DEINSTALLATION_PATH.format(id=subscription['id'])
+        self.request('POST', path, json={'location': location})
+
+    def close(self):
+        """Fecha as conexões do pool"""
+        self.session.close()
@@ -0,0 +1,226 @@
+import os
+import csv
+import json
+import math
+import time
+import threading
+import functools
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_DIR = 'telemetry'
+
+# Também grava as métricas no formato texto do Prometheus (para o textfile collector do node_exporter)
+EXPORT_PROMETHEUS = False
+
+PERCENTILES = (50, 95, 99)
+
+# Limites (segundos) dos baldes do histograma exportado para o Prometheus
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Colunas do CSV (uma linha por passo)
+SUMMARY_FIELDS = ['step', 'count', 'errors', 'retries', 'fallbacks', 'total_s', 'mean_s', 'p50_s', 'p95_s', 'p99_s', 'max_s']
+
+
+def percentile(sorted_samples, pct):
+    """Percentil pelo método nearest-rank (amostras já ordenadas)"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class MetricsRegistry:
+    """Tempos, falhas, retentativas e seletores alternativos de cada passo da execução"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = {}
+
+    def record(self, step, seconds, ok=True, retries=0, fallbacks=0):
+        """Registra uma execução do passo"""
+        with self.lock:
+            entry = self.steps.setdefault(step, {'samples': [], 'errors': 0, 'retries': 0, 'fallbacks': 0})
+            entry['samples'].append(seconds)
+            entry['errors'] += 0 if ok else 1
+            entry['retries'] += retries
+            entry['fallbacks'] += fallbacks
+
+    def reset(self):
+        with self.lock:
+            self.steps = {}
+
+    def summary(self):
+        """Uma linha por passo com contadores e percentis, do maior p95 para o menor"""
+        with self.lock:
+            steps = {step: dict(entry, samples=sorted(entry['samples'])) for step, entry in self.steps.items()}
+
+        rows = []
+        for step, entry in steps.items():
+            samples = entry['samples']
+            total = sum(samples)
+            row = {
+                'step': step,
+                'count': len(samples),
+                'errors': entry['errors'],
+                'retries': entry['retries'],
+                'fallbacks': entry['fallbacks'],
+                'total_s': round(total, 3),
+                'mean_s': round(total / len(samples), 3) if samples else 0.0,
+                'max_s': round(samples[-1], 3) if samples else 0.0,
+            }
+            for pct in PERCENTILES:
+                row[f'p{pct}_s'] = round(percentile(samples, pct), 3)
+            rows.append(row)
+        return sorted(rows, key=lambda row: row['p95_s'], reverse=True)
+
+    def prometheus_text(self, run):
+        """Métricas no formato de exposição texto do Prometheus"""
+        with self.lock:
+            steps = {step: dict(entry, samples=list(entry['samples'])) for step, entry in self.steps.items()}
+
+        lines = [
+            '# HELP scope_step_duration_seconds Tempo de cada passo da automação',
+            '# TYPE scope_step_duration_seconds histogram',
+        ]
+        for step, entry in sorted(steps.items()):
+            labels = f'run="{run}",step="{step}"'
+            for bucket in HISTOGRAM_BUCKETS:
+                count = sum(1 for s in entry['samples'] if s <= bucket)
+                lines.append(f'scope_step_duration_seconds_bucket{{{labels},le="{bucket}"}} {count}')
+            lines.append(f'scope_step_duration_seconds_bucket{{{labels},le="+Inf"}} {len(entry["samples"])}')
+            lines.append(f'scope_step_duration_seconds_sum{{{labels}}} {sum(entry["samples"]):.6f}')
+            lines.append(f'scope_step_duration_seconds_count{{{labels}}} {len(entry["samples"])}')
+
+        for counter, help_text in (('errors', 'Execuções do passo que falharam'),
+                                   ('retries', 'Retentativas dentro do passo'),
+                                   ('fallbacks', 'Seletores alternativos usados no passo')):
+            lines.append(f'# HELP scope_step_{counter}_total {help_text}')
+            lines.append(f'# TYPE scope_step_{counter}_total counter')
+            for step, entry in sorted(steps.items()):
+                lines.append(f'scope_step_{counter}_total{{run="{run}",step="{step}"}} {entry[counter]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, run, directory=TELEMETRY_DIR, prometheus=EXPORT_PROMETHEUS):
+        """
+        Grava as métricas da execução em JSON e CSV (e Prometheus, se pedido) e zera o registro
+
+        Args:
+            run (str): nome da automação (prefixo dos arquivos)
+
+        Returns:
+            list: arquivos gravados
+        """
+        rows = self.summary()
+        if not rows:
+            return []
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(directory, f"{run}_{stamp}")
+        files = []
+        try:
+            os.makedirs(directory, exist_ok=True)
+
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump({'run': run, 'exported_at': datetime.now().isoformat(timespec='seconds'), 'steps': rows},
+                          f, ensure_ascii=False, indent=2)
+            files.append(base + '.json')
+
+            with open(base + '.csv', 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            files.append(base + '.csv')
+
+            if prometheus:
+                with open(base + '.prom', 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text(run))
+                files.append(base + '.prom')
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar a telemetria de {run}: {e}")
+
+        for row in rows[:5]:
+            logger.info(f"Passo '{row['step']}': {row['count']}x p50={row['p50_s']}s p95={row['p95_s']}s "
+                        f"p99={row['p99_s']}s erros={row['errors']} retentativas={row['retries']} "
+                        f"alternativos={row['fallbacks']}")
+        if files:
+            logger.info(f"Telemetria salva em: {', '.join(files)}")
+        self.reset()
+        return files
+
+
+metrics = MetricsRegistry()
+
+# Passos em andamento em cada thread (o mais interno recebe retentativas e seletores alternativos)
+_active = threading.local()
+
+
+def _stack():
+    if not hasattr(_active, 'steps'):
+        _active.steps = []
+    return _active.steps
+
+
+@contextmanager
+def measure(step):
+    """
+    Mede o bloco como um passo; exceções contam como falha e seguem adiante
+
+    Yields:
+        dict: estado do passo ('ok' pode ser marcado False pelo bloco)
+    """
+    frame = {'ok': True, 'retries': 0, 'fallbacks': 0}
+    stack = _stack()
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield frame
+    except BaseException:
+        frame['ok'] = False
+        raise
+    finally:
+        stack.pop()
+        metrics.record(step, time.perf_counter() - start, frame['ok'], frame['retries'], frame['fallbacks'])
+
+
+def timed(step=None):
+    """
+    Decorador que mede o método como um passo (retorno False conta como falha)
+
+    Args:
+        step (str): nome do passo (padrão: Classe.método)
+    """
+    def decorator(func):
+        name = step or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(name) as frame:
+                result = func(*args, **kwargs)
+                if result is False:
+                    frame['ok'] = False
+                return result
+        return wrapper
+    return decorator
+
+
+def note_retry(count=1):
+    """Conta uma retentativa no passo em andamento (sem passo ativo, nada é registrado)"""
+    stack = _stack()
+    if stack:
+        stack[-1]['retries'] += count
+
+
+def note_fallback(count=1):
+    """Conta um seletor alternativo usado no passo em andamento"""
+    stack = _stack()
+    if stack:
+        stack[-1]['fallbacks'] += count
+
+
+def export_metrics(run):
+    """Grava as métricas da execução (chamado no encerramento de cada automação)"""
+    return metrics.export(run)
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from urllib.parse import urlparse
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = 'sessions'
+
+# Origem da chave de cifragem, em ordem: variável de ambiente, cofre de credenciais do sistema
+# (pacote 'keyring': Windows Credential Manager, Keychain, Secret Service) e, por último, o arquivo
+VAULT_KEY_ENV = 'SCOPE_SESSION_KEY'
+VAULT_KEYRING_SERVICE = 'ScopeAutomations'
+VAULT_KEYRING_USER = 'session-vault'
+
+# Arquivo da chave, só usado sem variável de ambiente nem keyring. Fica ao lado das sessões
+# cifradas: quem copia a pasta leva as duas. Com False o cofre é desativado nesse caso.
+VAULT_KEY_FILE = os.path.join(SESSION_DIR, 'vault.key')
+VAULT_KEY_FILE_FALLBACK = True
+
+# Tempo máximo de reaproveitamento de uma sessão salva (segundos)
+DEFAULT_MAX_AGE = 12 * 3600
+
+CAPTURE_STORAGE_JS = """
+function dump(store) {
+    var data = {};
+    for (var i = 0; i < store.length; i++) { data[store.key(i)] = store.getItem(store.key(i)); }
+    return data;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+RESTORE_STORAGE_JS = """
+var state = arguments[0];
+Object.keys(state.local).forEach(function (k) { window.localStorage.setItem(k, state.local[k]); });
+Object.keys(state.session).forEach(function (k) { window.sessionStorage.setItem(k, state.session[k]); });
+"""
+
+CLEAR_STORAGE_JS = "window.localStorage.clear(); window.sessionStorage.clear();"
+
+# Campos aceitos pelo Network.setCookie do Chrome
+CDP_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+def origin_of(url):
+    """Origem (esquema + host) da URL, onde o storage do SPA é gravado"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+def snapshot_session(driver):
+    """Cookies de todos os domínios e storage da página atual do navegador logado"""
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+    except Exception:
+        cookies = driver.get_cookies()
+    state = driver.execute_script(CAPTURE_STORAGE_JS)
+    state.update({'origin': origin_of(driver.current_url), 'cookies': cookies})
+    return state
+
+
+def apply_session(driver, state):
+    """Grava cookies e storage de um snapshot_session em outro navegador (não valida o login)"""
+    # Storage e cookies sem CDP só podem ser gravados estando na origem do sistema
+    driver.get(state['origin'])
+    try:
+        cookies = [
+            {k: v for k, v in c.items() if k in CDP_COOKIE_FIELDS and not (k == 'expires' and v <= 0)}
+            for c in state['cookies']
+        ]
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+    except Exception:
+        for cookie in state['cookies']:
+            cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'secure', 'httpOnly', 'expiry')}
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # Cookies de outros domínios não se aplicam a esta origem
+                continue
+    driver.execute_script(RESTORE_STORAGE_JS, state)
+
+
+class SessionVault:
+    """Guarda cookies e storage de sessões logadas por site e cliente, cifrados em disco"""
+
+    def __init__(self, directory=SESSION_DIR, key_file=VAULT_KEY_FILE, max_age=DEFAULT_MAX_AGE):
+        """
+        Args:
+            directory (str): pasta onde as sessões cifradas são gravadas
+            key_file (str): arquivo da chave Fernet (criado no primeiro uso, sem env nem keyring)
+            max_age (int): segundos até uma sessão salva ser descartada
+        """
+        self.directory = directory
+        self.key_file = key_file
+        self.max_age = max_age
+        self.cipher = None
+
+        if Fernet is None:
+            logger.warning("Pacote 'cryptography' não instalado; sessões não serão salvas")
+            return
+        try:
+            self.cipher = Fernet(self.load_key())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cofre de sessões desativado: {e}")
+
+    @property
+    def enabled(self):
+        return self.cipher is not None
+
+    def load_key(self):
+        """
+        Chave da variável de ambiente, do keyring do sistema ou, por último, do arquivo de chave
+
+        Raises:
+            OSError: sem nenhuma origem de chave disponível
+        """
+        key = os.environ.get(VAULT_KEY_ENV)
+        if key:
+            return key.encode()
+
+        key = self.load_keyring_key()
+        if key:
+            return key
+
+        if not VAULT_KEY_FILE_FALLBACK:
+            raise OSError(f"defina {VAULT_KEY_ENV} ou instale o pacote 'keyring'")
+        logger.warning(
+            f"Chave do cofre em arquivo ({self.key_file}), ao lado das sessões; "
+            f"prefira {VAULT_KEY_ENV} ou o pacote 'keyring'"
+        )
+        return self.load_key_file()
+
+    def load_keyring_key(self):
+        """Chave guardada no cofre de credenciais do sistema (gerada se ausente), ou None"""
+        if keyring is None:
+            return None
+        try:
+            key = keyring.get_password(VAULT_KEYRING_SERVICE, VAULT_KEYRING_USER)
+            if not key:
+                key = Fernet.generate_key().decode()
+                keyring.set_password(VAULT_KEYRING_SERVICE, VAULT_KEYRING_USER, key)
+            return key.encode()
+        except Exception as e:
+            # Sem backend (ex.: Linux sem Secret Service)
+            logger.warning(f"Keyring do sistema indisponível para a chave do cofre: {e}")
+            return None
+
+    def load_key_file(self):
+        """Chave do arquivo, criado só para o usuário atual (0600) se ausente"""
+        if os.path.exists(self.key_file):
+            if os.name == 'posix' and os.stat(self.key_file).st_mode & 0o077:
+                logger.warning(f"Arquivo de chave {self.key_file} legível por outros usuários; restringindo para 0600")
+                os.chmod(self.key_file, 0o600)
+            with open(self.key_file, 'rb') as f:
+                return f.read().strip()
+        os.makedirs(os.path.dirname(self.key_file) or '.', exist_ok=True)
+        key = Fernet.generate_key()
+        fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return key
+
+    def path(self, site, client):
+        """Arquivo da sessão (nome derivado do site e cliente, sem expor o cliente)"""
+        digest = hashlib.sha1(f"{site}:{client}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{site}_{digest}.bin")
+
+    def capture(self, driver, site, client):
+        """Salva a sessão do navegador logado (cookies de todos os domínios e storage da página atual)"""
+        if not self.enabled:
+            return False
+        try:
+            state = snapshot_session(driver)
+            state.update({
+                'saved_at': time.time(),
+                'expires_at': time.time() + self.max_age,
+            })
+
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(site, client)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(self.cipher.encrypt(json.dumps(state).encode('utf-8')))
+            os.replace(path + '.tmp', path)
+            logger.info(f"Sessão salva: {site}/{client}")
+            return True
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar a sessão {site}/{client}: {e}")
+            return False
+
+    def load(self, site, client):
+        """Sessão salva ainda dentro da validade, ou None"""
+        if not self.enabled:
+            return None
+        path = self.path(site, client)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = json.loads(self.cipher.decrypt(f.read()))
+        except (OSError, ValueError, InvalidToken) as e:
+            logger.warning(f"Sessão salva ilegível descartada ({site}/{client}): {e}")
+            self.forget(site, client)
+            return None
+        if state.get('expires_at', 0) < time.time():
+            self.forget(site, client)
+            return None
+        return state
+
+    def restore(self, driver, site, client):
+        """
+        Aplica a sessão salva no navegador (não valida o login)
+
+        Returns:
+            bool: True se havia sessão salva e ela foi aplicada
+        """
+        state = self.load(site, client)
+        if not state:
+            return False
+
+        apply_session(driver, state)
+        logger.info(f"Sessão salva aplicada: {site}/{client}")
+        return True
+
+    def forget(self, site, client):
+        """Descarta a sessão salva (expirada ou recusada pelo sistema)"""
+        try:
+            os.remove(self.path(site, client))
+        except OSError:
+            pass
+
+    def clear_browser(self, driver):
+        """Limpa cookies e storage do navegador sem logout, preservando a sessão salva no servidor"""
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception:
+            driver.delete_all_cookies()
+        try:
+            driver.execute_script(CLEAR_STORAGE_JS)
+        except Exception:
+            pass
+
+
+_vault = None
+_vault_lock = threading.Lock()
+
+
+def open_vault():
+    """Cofre de sessões compartilhado pelas automações e seus workers (desativado sem 'cryptography')"""
+    global _vault
+    with _vault_lock:
+        if _vault is None:
+            _vault = SessionVault()
+        return _vault
@@ -1,18 +1,60 @@
 import pandas as pd
-import json
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 import logging
 
+from page_readiness import PageReadiness
+from worker_pool import WorkerPool, merge_reports
+from checkpoint_journal import open_journal
+from client_contexts import ClientContexts
+from driver_factory import create_chrome, handoff_to_headless, THROUGHPUT_PROFILE
+from mzone_transport import MzoneHttpTransport, SeleniumVehicleTransport, TransportError
+from session_vault import open_vault
+from sheet_ingest import load_vehicle_sheet, load_credentials, report_rejected, vehicle_records
+from run_telemetry import timed, export_metrics
+from batch_mode import ask, setting, wait_for_login, batch_requested
+
+# Navegadores simultâneos no modo paralelo quando o usuário não informa
+DEFAULT_POOL_SIZE = 3
+
+# Edita veículos direto na API do mzoneweb quando possível (navegador vira fallback)
+USE_HTTP_TRANSPORT = True
+
+MZONE_URL = "https://live.mzoneweb.net/mzonex/"
+
+# Escala da página (a grade de veículos cabe inteira na tela)
+PAGE_SCALE = 0.8
+
+# Nome do site no cofre de sessões (sessões salvas por cliente)
+SESSION_SITE = "mzone"
+
+# Navegadores logados mantidos abertos no modo sequencial (um por cliente, o mais antigo é fechado)
+MAX_CLIENT_BROWSERS = 3
+
+# Atributos que formam o contexto de um cliente (valor de um contexto vazio)
+CLIENT_CONTEXT_ATTRIBUTES = {
+    'driver': None,
+    'wait': None,
+    'readiness': None,
+    'transports': list,
+    'vehicles_page_initialized': False,
+}
+
 class VehicleAutomation:
+    # Título exibido e nome do diário de checkpoint (o pipeline setup + odômetro usa os seus)
+    TITLE = "AUTOMAÇÃO  SETUP"
+    JOURNAL_NAME = 'setup'
+
     def __init__(self):
         self.driver = None
         self.wait = None
+        self.readiness = None
+        self.journal = None
+        self.transports = []
+        self.vault = open_vault()
         self.credentials = {}
         self.vehicles_data = pd.DataFrame()
         self.report = {
@@ -33,58 +75,45 @@ class VehicleAutomation:
         )
         self.logger = logging.getLogger(__name__)
 
-    def setup_driver(self):
-        """Configura o driver do Chrome"""
+    def setup_driver(self, headless=False):
+        """Configura o driver do Chrome (headless usa o perfil de vazão)"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--force-device-scale-factor=0.8")
-            chrome_options.add_argument("--disable-notifications")
-            chrome_options.add_argument("--disable-translate")
-            
-            prefs = {
-                "profile.default_content_setting_values": {"notifications": 2},
-                "credentials_enable_service": False,
-                "profile.password_manager_enabled": False
-            }
-            chrome_options.add_experimental_option("prefs", prefs)
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 15)
-            
-            self.driver.execute_script("document.body.style.zoom='80%'")
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
+            self.attach_driver(create_chrome(headless=headless, scale=PAGE_SCALE))
             print("🌐 Chrome configurado com sucesso")
             return True
         except Exception as e:
             print(f"❌ Erro ao configurar driver: {str(e)}")
             return False
 
+    def attach_driver(self, driver):
+        """Passa a usar o navegador informado (esperas e detector de página pronta ligados a ele)"""
+        self.driver = driver
+        self.wait = WebDriverWait(self.driver, 15)
+        self.readiness = PageReadiness(self.driver, timeout=15)
+        self.readiness.install()
+
+    def continue_headless(self):
+        """Depois do login manual, segue o trabalho em navegador do perfil de vazão"""
+        driver = handoff_to_headless(
+            self.driver, MZONE_URL, scale=PAGE_SCALE,
+            ready=lambda d: WebDriverWait(d, 15).until(EC.url_contains("workspace/map"))
+        )
+        if driver is not self.driver:
+            self.attach_driver(driver)
+
     def load_excel_data(self):
-        """Carrega e valida os dados da planilha Excel"""
+        """Carrega, normaliza e valida a planilha antes de abrir o navegador (linhas inválidas são rejeitadas)"""
         try:
-            self.vehicles_data = pd.read_excel('veiculos_setup.xlsx')
-            
-            required_columns = ['ID', 'CHASSI', 'DESCRIÇÃO', 'PLACA', 'GRUPO DE VEICULOS', 'CLIENTE', 'ODOMETRO']
-            missing_columns = [col for col in required_columns if col not in self.vehicles_data.columns]
+            # Clientes sem credenciais continuam na fila: usam login manual
+            self.vehicles_data, rejected = load_vehicle_sheet(
+                'veiculos_setup.xlsx', self.credentials, allow_unknown_clients=True
+            )
+            report_rejected(rejected, 'rejeitados_setup')
             
-            if missing_columns:
-                self.logger.error(f"Colunas faltantes na planilha: {missing_columns}")
+            if self.vehicles_data.empty:
+                self.logger.error("Nenhum veículo válido na planilha")
                 return False
             
-            # Remove linhas com dados obrigatórios vazios
-            self.vehicles_data = self.vehicles_data.dropna(subset=['ID', 'CHASSI', 'CLIENTE'])
-            
-            # Preenche placas vazias com chassi
-            mask_placa_vazia = self.vehicles_data['PLACA'].isna() | (self.vehicles_data['PLACA'] == '')
-            self.vehicles_data.loc[mask_placa_vazia, 'PLACA'] = self.vehicles_data.loc[mask_placa_vazia, 'CHASSI']
-            
-            self.vehicles_data = self.vehicles_data.sort_values('CLIENTE')
-            
             self.logger.info(f"Planilha carregada: {len(self.vehicles_data)} veículos")
             return True
             
@@ -98,16 +127,7 @@ class VehicleAutomation:
     def load_credentials(self):
         """Carrega as credenciais fixas"""
         try:
-            with open('credentials.json', 'r', encoding='utf-8') as file:
-                credentials_data = json.load(file)
-            
-            self.credentials = {}
-            for cliente in credentials_data['clientes']:
-                self.credentials[cliente['nome']] = {
-                    'user': cliente['user'],
-                    'senha': cliente['senha']
-                }
-            
+            self.credentials = load_credentials()
             self.logger.info(f"Credenciais carregadas: {len(self.credentials)} clientes")
             return True
             
@@ -117,6 +137,12 @@ class VehicleAutomation:
 
     def ask_login_method(self):
         """Pergunta ao usuário sobre o método de login"""
+        # Sem interação: 'login_manual' do batch.json (padrão: automático pelo credentials.json)
+        if batch_requested():
+            manual = bool(setting('login_manual', False))
+            print(f"🤖 Modo batch: login {'manual' if manual else 'automático'}")
+            return manual
+        
         while True:
             print("\n" + "="*50)
             print("MÉTODO DE LOGIN")
@@ -133,28 +159,50 @@ class VehicleAutomation:
                 print("Opção inválida! Digite 1 ou 2.")
 
     def wait_for_loading(self):
-        """Aguarda loadings do sistema finalizarem"""
-        try:
-            time.sleep(2)
-            loading_selectors = [
-                "//div[contains(@class, 'loading')]",
-                "//div[contains(@class, 'spinner')]", 
-                "//div[contains(@class, 'loader')]"
-            ]
-            
-            for selector in loading_selectors:
-                try:
-                    WebDriverWait(self.driver, 3).until_not(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                except:
-                    pass
-            time.sleep(1)
-        except Exception:
-            time.sleep(3)
+        """Aguarda a página ficar pronta (requisições, Angular e DOM estáveis)"""
+        if not self.readiness.wait():
+            self.logger.warning("Página não estabilizou dentro do tempo limite")
     
+    def restore_saved_session(self, client):
+        """
+        Reaproveita a sessão salva do cliente, validada com uma abertura do mzoneweb
+        
+        Returns:
+            bool: True se o sistema aceitou a sessão salva
+        """
+        if not self.vault.restore(self.driver, SESSION_SITE, client):
+            return False
+        
+        self.driver.get(MZONE_URL)
+        try:
+            WebDriverWait(self.driver, 10).until(lambda driver: "workspace/map" in driver.current_url)
+        except TimeoutException:
+            print(f"⚠️ Sessão salva expirada para cliente: {client}")
+            self.vault.forget(SESSION_SITE, client)
+            self.vault.clear_browser(self.driver)
+            return False
+        
+        self.wait_for_loading()
+        print(f"♻️ Sessão salva reaproveitada: {client}")
+        return True
+
+    def end_client_session(self, client):
+        """Guarda a sessão do cliente e limpa o navegador; sem o cofre, faz logout"""
+        if not self.vault.enabled:
+            self.logout()
+            return
+        # Logout invalidaria a sessão no servidor; limpar o navegador basta para trocar de cliente
+        if "mzonex" in self.driver.current_url:
+            self.vault.capture(self.driver, SESSION_SITE, client)
+        self.vault.clear_browser(self.driver)
+        self.vehicles_page_initialized = False
+
+    @timed()
     def login_automatic(self, client):
         """Realiza login automático"""
+        if self.restore_saved_session(client):
+            return True
+        
         if client not in self.credentials:
             print(f"❌ Credenciais não encontradas para cliente: {client}")
             return False
@@ -162,7 +210,7 @@ class VehicleAutomation:
         try:
             print(f"🔐 Login automático para cliente: {client}")
             
-            self.driver.get("https://live.mzoneweb.net/mzonex/")
+            self.driver.get(MZONE_URL)
             self.wait_for_loading()
             
             username_field = self.wait.until(EC.presence_of_element_located((By.ID, "Username")))
@@ -182,6 +230,7 @@ class VehicleAutomation:
                 )
                 self.wait_for_loading()
                 print(f"✅ Login automático bem-sucedido: {client}")
+                self.vault.capture(self.driver, SESSION_SITE, client)
                 return True
             except TimeoutException:
                 print(f"❌ Login falhou para cliente: {client}")
@@ -193,25 +242,33 @@ class VehicleAutomation:
 
     def login_manual(self, client):
         """Aguarda login manual do usuário"""
+        if self.restore_saved_session(client):
+            return True
+        
         try:
-            self.driver.get("https://live.mzoneweb.net/mzonex/")
+            self.driver.get(MZONE_URL)
             time.sleep(2)
             
             print(f"\n{'='*60}")
             print(f"LOGIN MANUAL NECESSÁRIO PARA CLIENTE: {client}")
             print(f"{'='*60}")
-            print("Realize o login manualmente e pressione ENTER...")
-            
-            input()
+            if batch_requested():
+                print("Realize o login manualmente; a automação continua sozinha quando o mapa abrir...")
+            else:
+                print("Realize o login manualmente e pressione ENTER...")
             
-            current_url = self.driver.current_url
-            if "workspace/map" in current_url:
+            if wait_for_login(self.driver, lambda d: "workspace/map" in d.current_url, ""):
                 print(f"✅ Login manual bem-sucedido: {client}")
+                self.vault.capture(self.driver, SESSION_SITE, client)
                 return True
+            elif batch_requested():
+                print(f"❌ Login manual não concluído: {client}")
+                return False
             else:
                 while True:
                     resposta = input("O login foi realizado com sucesso? (s/n): ").lower().strip()
                     if resposta in ['s', 'sim', 'y', 'yes']:
+                        self.vault.capture(self.driver, SESSION_SITE, client)
                         return True
                     elif resposta in ['n', 'não', 'nao', 'no']:
                         return False
@@ -239,6 +296,7 @@ class VehicleAutomation:
             print(f"❌ Erro no logout: {str(e)}")
             return False
     
+    @timed()
     def navigate_to_vehicles(self):
         """Navega para a seção de veículos"""
         try:
@@ -277,6 +335,7 @@ class VehicleAutomation:
             print(f"❌ Erro ao navegar para veículos: {str(e)}")
             return False
 
+    @timed()
     def search_vehicle_by_id(self, vehicle_id):
         """Busca veículo pelo ID"""
         try:
@@ -293,7 +352,6 @@ class VehicleAutomation:
             search_field.send_keys(str(vehicle_id))
             
             self.wait_for_loading()
-            time.sleep(3)
             
             result_xpath = f"//div[@class='wj-row']//div[contains(text(), '{vehicle_id}')]"
             
@@ -311,6 +369,7 @@ class VehicleAutomation:
             print(f"❌ Erro ao buscar veículo: {str(e)}")
             return False
 
+    @timed()
     def click_edit_vehicle(self, vehicle_id):
         """Clica no botão de editar veículo"""
         try:
@@ -354,13 +413,13 @@ class VehicleAutomation:
                 print("❌ Falha ao fechar modal")
                 return False
 
+    @timed()
     def fill_vehicle_form(self, vehicle_data):
         """Preenche o formulário de edição do veículo com tratamento de erro melhorado"""
         try:
             print(f"📝 Preenchendo formulário para ID: {vehicle_data['ID']}")
             
             self.wait_for_loading()
-            time.sleep(2)
             
             # Tenta preencher cada campo individualmente
             try:
@@ -486,7 +545,7 @@ class VehicleAutomation:
             )
             group_button.click()
             
-            time.sleep(1)
+            self.wait_for_loading()
             
             search_group_field = self.wait.until(
                 EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Buscar' and @class='form-input ng-untouched ng-pristine ng-valid']"))
@@ -496,7 +555,7 @@ class VehicleAutomation:
             time.sleep(0.5)
             search_group_field.send_keys(str(group_name))
             
-            time.sleep(3)
+            self.wait_for_loading()
             
             return self.select_group_checkbox(group_name)
             
@@ -538,6 +597,7 @@ class VehicleAutomation:
             print(f"❌ Erro ao selecionar checkbox: {str(e)}")
             return False
 
+    @timed()
     def save_vehicle_form(self):
         """Salva o formulário"""
         try:
@@ -548,7 +608,6 @@ class VehicleAutomation:
             save_button.click()
             
             self.wait_for_loading()
-            time.sleep(2)
             
             # Verifica se o modal foi fechado
             try:
@@ -564,6 +623,35 @@ class VehicleAutomation:
             print(f"❌ Erro ao salvar: {str(e)}")
             return False
 
+    def setup_transports(self, vehicles=()):
+        """
+        Monta a lista de transportes após o login: API primeiro, navegador como fallback
+        
+        Args:
+            vehicles (list): veículos (dicionários) do cliente logado
+        """
+        self.close_transports()
+        
+        if USE_HTTP_TRANSPORT:
+            http_transport = MzoneHttpTransport.from_driver(self.driver)
+            if http_transport:
+                self.prepare_http_transport(http_transport, vehicles)
+                self.transports.append(http_transport)
+        
+        self.transports.append(SeleniumVehicleTransport(self))
+        print(f"🔌 Transportes ativos: {', '.join(t.name for t in self.transports)}")
+
+    def prepare_http_transport(self, transport, vehicles):
+        """Consultas em massa feitas uma vez por cliente, antes dos veículos (o setup não precisa de nenhuma)"""
+
+    def close_transports(self):
+        """Encerra as sessões HTTP dos transportes"""
+        for transport in self.transports:
+            if hasattr(transport, 'close'):
+                transport.close()
+        self.transports = []
+
+    @timed()
     def process_vehicle(self, vehicle_data):
         """Processa um veículo individual"""
         try:
@@ -572,38 +660,27 @@ class VehicleAutomation:
             
             print(f"\n🔧 PROCESSANDO VEÍCULO ID: {vehicle_id} | Cliente: {client}")
             
-            if not self.navigate_to_vehicles():
-                self.report['errors'].append({
-                    'cliente': client,
-                    'id': vehicle_id,
-                    'erro': 'Erro ao navegar para veículos'
-                })
-                return
+            transports = self.transports or [SeleniumVehicleTransport(self)]
+            status, erro = 'error', 'Nenhum transporte disponível'
             
-            if not self.search_vehicle_by_id(vehicle_id):
-                self.report['not_found'].append({
-                    'cliente': client,
-                    'id': vehicle_id,
-                    'chassi': vehicle_data.get('CHASSI', 'N/A'),
-                    'placa': vehicle_data.get('PLACA', 'N/A'),
-                    'odometro': vehicle_data.get('ODOMETRO', 'N/A')
-                })
-                return
+            for transport in transports:
+                try:
+                    status, erro = transport.update_vehicle(vehicle_data)
+                    break
+                except TransportError as e:
+                    print(f"⚠️ Transporte '{transport.name}' falhou ({e}), tentando o próximo...")
             
-            if not self.click_edit_vehicle(vehicle_id):
-                self.report['errors'].append({
-                    'cliente': client,
-                    'id': vehicle_id,
-                    'erro': 'Erro ao abrir modal de edição'
-                })
+            if status == 'not_found':
+                self.mark_not_found(vehicle_data)
                 return
             
-            if not self.fill_vehicle_form(vehicle_data):
+            if status == 'error':
                 self.report['errors'].append({
                     'cliente': client,
                     'id': vehicle_id,
-                    'erro': 'Erro ao preencher formulário'
+                    'erro': erro
                 })
+                self.record_checkpoint(vehicle_data, 'error', erro=erro)
                 return
             
             self.report['success'].append({
@@ -613,6 +690,12 @@ class VehicleAutomation:
                 'placa': vehicle_data.get('PLACA', 'N/A'),
                 'odometro': vehicle_data.get('ODOMETRO', 'N/A')
             })
+            self.record_checkpoint(
+                vehicle_data, 'success',
+                chassi=vehicle_data.get('CHASSI', 'N/A'),
+                placa=vehicle_data.get('PLACA', 'N/A'),
+                odometro=vehicle_data.get('ODOMETRO', 'N/A')
+            )
             print(f"✅ Veículo processado com sucesso: {vehicle_id}")
             
         except Exception as e:
@@ -621,8 +704,51 @@ class VehicleAutomation:
                 'id': vehicle_data['ID'],
                 'erro': str(e)
             })
+            self.record_checkpoint(vehicle_data, 'error', erro=str(e))
             print(f"❌ Erro inesperado: {str(e)}")
 
+    def mark_not_found(self, vehicle_data):
+        """Registra o veículo como não encontrado no relatório e no checkpoint"""
+        self.report['not_found'].append({
+            'cliente': vehicle_data['CLIENTE'],
+            'id': vehicle_data['ID'],
+            'chassi': vehicle_data.get('CHASSI', 'N/A'),
+            'placa': vehicle_data.get('PLACA', 'N/A'),
+            'odometro': vehicle_data.get('ODOMETRO', 'N/A')
+        })
+        self.record_checkpoint(vehicle_data, 'not_found')
+
+    def checkpoint_key(self, client, vehicle_id):
+        """Chave do veículo no diário de checkpoint"""
+        return f"{client}:{vehicle_id}"
+
+    def record_checkpoint(self, vehicle_data, status, **data):
+        """Registra o resultado do veículo no diário de checkpoint"""
+        if self.journal:
+            key = self.checkpoint_key(vehicle_data['CLIENTE'], vehicle_data['ID'])
+            self.journal.record(key, status, cliente=vehicle_data['CLIENTE'], id=vehicle_data['ID'], **data)
+
+    def skip_completed_vehicles(self):
+        """Remove da fila os veículos já concluídos em uma execução anterior"""
+        keys = [self.checkpoint_key(c, i) for c, i in zip(self.vehicles_data['CLIENTE'], self.vehicles_data['ID'])]
+        done_mask = [self.journal.is_done(key) for key in keys]
+        skipped = sum(done_mask)
+        
+        if skipped:
+            self.vehicles_data = self.vehicles_data[[not done for done in done_mask]]
+            # Sucessos anteriores continuam no relatório (lista de odômetro)
+            sheet_keys = set(keys)
+            for key, entry in self.journal.entries.items():
+                if key in sheet_keys and entry['status'] == 'success':
+                    self.report['success'].append({
+                        'cliente': entry['cliente'],
+                        'id': entry['id'],
+                        'chassi': entry.get('chassi', 'N/A'),
+                        'placa': entry.get('placa', 'N/A'),
+                        'odometro': entry.get('odometro', 'N/A')
+                    })
+            print(f"⏭️ {skipped} veículos já concluídos foram pulados")
+
     def generate_final_report(self):
         """Gera o relatório final e prepara próxima automação"""
         print("\n" + "="*80)
@@ -682,65 +808,185 @@ class VehicleAutomation:
         print("AUTOMAÇÃO FINALIZADA")
         print("="*80)
 
-    def run_automation(self):
-        """Executa o fluxo principal da automação"""
-        try:
-            print("🚀" + "="*58 + "🚀")
-            print("🤖        AUTOMAÇÃO  SETUP       🤖")
-            print("🚀" + "="*58 + "🚀")
-            
-            if not self.load_excel_data():
-                return False
+    def ask_execution_mode(self):
+        """Pergunta quantos navegadores devem trabalhar em paralelo"""
+        # Sem interação: 'navegadores' do batch.json (1 é sequencial)
+        if batch_requested():
+            workers = ask('navegadores', "Quantidade de navegadores simultâneos: ", DEFAULT_POOL_SIZE)
+            return int(workers) if workers.isdigit() and int(workers) > 0 else DEFAULT_POOL_SIZE
+        
+        while True:
+            print("\n" + "="*50)
+            print("MODO DE EXECUÇÃO")
+            print("="*50)
+            print("1 - Sequencial (um navegador)")
+            print("2 - Paralelo (um navegador headless por cliente)")
+            print("="*50)
             
-            if not self.load_credentials():
-                return False
+            choice = input("Escolha uma opção (1 ou 2): ").strip()
             
-            if not self.setup_driver():
-                return False
+            if choice == '1':
+                return 1
+            elif choice == '2':
+                workers = input(f"Quantidade de navegadores simultâneos [{DEFAULT_POOL_SIZE}]: ").strip()
+                if not workers:
+                    return DEFAULT_POOL_SIZE
+                if workers.isdigit() and int(workers) > 0:
+                    return int(workers)
+                print("Quantidade inválida!")
+            else:
+                print("Opção inválida! Digite 1 ou 2.")
+
+    def mark_client_errors(self, report, client, vehicles, erro):
+        """Marca todos os veículos de um cliente como erro"""
+        for v in vehicles:
+            report['errors'].append({
+                'cliente': client,
+                'id': v['ID'],
+                'erro': erro
+            })
+
+    def run_client_worker(self, client, vehicles):
+        """Processa os veículos de um cliente em um navegador próprio (modo paralelo)"""
+        worker = type(self)()
+        worker.credentials = self.credentials
+        worker.journal = self.journal
+        
+        if not worker.setup_driver(headless=True):
+            self.mark_client_errors(worker.report, client, vehicles, 'Erro ao iniciar navegador')
+            return worker.report
+        
+        try:
+            print(f"\n👤 [WORKER] CLIENTE: {client} ({len(vehicles)} veículos)")
             
-            use_manual_login = self.ask_login_method()
+            if not worker.login_automatic(client):
+                self.mark_client_errors(worker.report, client, vehicles, 'Falha no login')
+                return worker.report
             
-            current_client = None
-            total_vehicles = len(self.vehicles_data)
-            processed_count = 0
+            worker.setup_transports(vehicles)
+            for vehicle in vehicles:
+                worker.process_vehicle(vehicle)
             
-            for index, vehicle in self.vehicles_data.iterrows():
+            worker.end_client_session(client)
+            return worker.report
+        finally:
+            worker.close_transports()
+            worker.driver.quit()
+
+    def release_client(self, client):
+        """Encerra o navegador de um cliente (sessão guardada no cofre, ou logout)"""
+        if self.driver is None:
+            return
+        try:
+            self.end_client_session(client)
+        finally:
+            self.close_transports()
+            self.driver.quit()
+
+    def run_sequential(self, vehicles_data, use_manual_login):
+        """Processa os veículos mantendo um navegador logado por cliente, sem logout a cada troca"""
+        contexts = ClientContexts(self, CLIENT_CONTEXT_ATTRIBUTES, self.release_client, MAX_CLIENT_BROWSERS)
+        failed_clients = set()
+        total_vehicles = len(vehicles_data)
+        processed_count = 0
+        
+        try:
+            for vehicle in vehicle_records(vehicles_data):
                 client = vehicle['CLIENTE']
                 processed_count += 1
                 
                 print(f"\n🔢 Progresso: {processed_count}/{total_vehicles}")
                 
-                # Mudança de cliente
-                if current_client != client:
-                    if current_client is not None:
-                        self.logout()
-                    
-                    current_client = client
-                    self.vehicles_page_initialized = False
-                    
+                if client in failed_clients:
+                    continue
+                
+                # Mudança de cliente: volta ao navegador dele se ainda estiver aberto
+                if contexts.current != client:
                     print(f"\n👤 CLIENTE: {client}")
                     
-                    if str(client).upper() == 'MANUAL' or use_manual_login or client not in self.credentials:
-                        login_success = self.login_manual(client)
-                    else:
-                        login_success = self.login_automatic(client)
-                    
-                    if not login_success:
-                        print(f"❌ Login falhou: {client}")
-                        # Marca todos os veículos deste cliente como erro
-                        client_vehicles = self.vehicles_data[self.vehicles_data['CLIENTE'] == client]
-                        for _, v in client_vehicles.iterrows():
-                            self.report['errors'].append({
-                                'cliente': client,
-                                'id': v['ID'],
-                                'erro': 'Falha no login'
-                            })
-                        continue
+                    if not contexts.switch(client):
+                        manual = str(client).upper() == 'MANUAL' or use_manual_login or client not in self.credentials
+                        # Só o login manual precisa de janela; o restante roda no perfil de vazão
+                        if self.driver is None and not self.setup_driver(headless=THROUGHPUT_PROFILE and not manual):
+                            login_success = False
+                        elif manual:
+                            login_success = self.login_manual(client)
+                            if login_success:
+                                self.continue_headless()
+                        else:
+                            login_success = self.login_automatic(client)
+                        
+                        if not login_success:
+                            print(f"❌ Login falhou: {client}")
+                            # Marca todos os veículos deste cliente como erro
+                            client_vehicles = vehicles_data[vehicles_data['CLIENTE'] == client]
+                            self.mark_client_errors(self.report, client, vehicle_records(client_vehicles), 'Falha no login')
+                            failed_clients.add(client)
+                            contexts.discard_current()
+                            continue
+                        
+                        self.setup_transports(vehicle_records(vehicles_data[vehicles_data['CLIENTE'] == client]))
                 
                 self.process_vehicle(vehicle)
+        finally:
+            contexts.close()
+
+    def run_parallel(self, pool_size):
+        """Distribui os clientes entre navegadores headless e une os relatórios"""
+        is_manual = (
+            (self.vehicles_data['CLIENTE'].str.upper() == 'MANUAL')
+            | ~self.vehicles_data['CLIENTE'].isin(list(self.credentials))
+        )
+        automatic_data = self.vehicles_data[~is_manual]
+        manual_data = self.vehicles_data[is_manual]
+        
+        partitions = {
+            client: vehicle_records(group)
+            for client, group in automatic_data.groupby('CLIENTE', sort=False)
+        }
+        
+        print(f"\n⚡ Modo paralelo: {len(partitions)} clientes em até {pool_size} navegadores")
+        
+        results = WorkerPool(pool_size).run(partitions, self.run_client_worker)
+        
+        reports = [self.report]
+        for client, report, error in results:
+            if error is not None:
+                report = {key: [] for key in self.report}
+                self.mark_client_errors(report, client, partitions[client], f'Falha no worker: {error}')
+            reports.append(report)
+        self.report = merge_reports(reports)
+        
+        # Clientes de login manual precisam de um navegador visível e do usuário
+        if not manual_data.empty:
+            print(f"\n🔐 {manual_data['CLIENTE'].nunique()} cliente(s) exigem login manual")
+            self.run_sequential(manual_data, use_manual_login=True)
+
+    def run_automation(self):
+        """Executa o fluxo principal da automação"""
+        try:
+            print("🚀" + "="*58 + "🚀")
+            print(f"🤖        {self.TITLE}       🤖")
+            print("🚀" + "="*58 + "🚀")
             
-            if current_client is not None:
-                self.logout()
+            # Credenciais antes da planilha: os clientes são validados na leitura
+            if not self.load_credentials():
+                return False
+            
+            if not self.load_excel_data():
+                return False
+            
+            self.journal = open_journal(self.JOURNAL_NAME)
+            self.skip_completed_vehicles()
+            
+            use_manual_login = self.ask_login_method()
+            pool_size = 1 if use_manual_login else self.ask_execution_mode()
+            
+            if pool_size > 1:
+                self.run_parallel(pool_size)
+            else:
+                # O navegador de cada cliente é aberto no primeiro veículo dele
+                self.run_sequential(self.vehicles_data, use_manual_login)
             
             self.generate_final_report()
             return True
@@ -749,12 +995,15 @@ class VehicleAutomation:
             print(f"❌ Erro no fluxo principal: {str(e)}")
             return False
         finally:
+            self.close_transports()
+            if self.journal:
+                self.journal.close()
+            export_metrics(self.JOURNAL_NAME)
             if self.driver:
                 print("🔒 Fechando navegador...")
                 self.driver.quit()
 
 
-
 def main():
     """Função principal da automação"""
     automation = VehicleAutomation()
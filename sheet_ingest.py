@@ -0,0 +1,223 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+logger = logging.getLogger(__name__)
+
+# Colunas da planilha de veículos (setup, odômetro e pipeline)
+VEHICLE_COLUMNS = ['ID', 'CHASSI', 'DESCRIÇÃO', 'PLACA', 'GRUPO DE VEICULOS', 'CLIENTE', 'ODOMETRO']
+
+# Colunas sem as quais a linha não pode ser processada
+VEHICLE_KEY_COLUMNS = ['ID', 'CHASSI', 'CLIENTE']
+
+# Chassi no padrão VIN: 17 caracteres, sem I, O e Q
+VIN_PATTERN = r'^[A-HJ-NPR-Z0-9]{17}$'
+
+# Rejeita chassis fora do padrão VIN (False apenas avisa e mantém a linha)
+STRICT_VIN = True
+
+# Cliente que sempre usa login manual, mesmo sem credenciais
+MANUAL_CLIENT = 'MANUAL'
+
+
+class SheetError(Exception):
+    """Planilha ilegível ou sem as colunas obrigatórias"""
+
+
+def excel_engine():
+    """Engine de leitura mais rápida disponível (calamine, em Rust), ou None para o padrão do pandas"""
+    return 'calamine' if python_calamine is not None else None
+
+
+def read_excel(path, columns=None, **kwargs):
+    """
+    Lê a planilha trazendo só as colunas pedidas, com a engine mais rápida disponível
+
+    Args:
+        path (str): arquivo Excel
+        columns (list): nomes das colunas a ler (None lê todas)
+        **kwargs: demais argumentos do pd.read_excel
+
+    Returns:
+        DataFrame com os valores brutos (dtype object)
+    """
+    if columns is not None:
+        wanted = set(columns)
+        kwargs['usecols'] = lambda name: str(name).strip() in wanted
+    kwargs.setdefault('dtype', object)
+
+    engine = excel_engine()
+    if engine:
+        try:
+            return pd.read_excel(path, engine=engine, **kwargs)
+        except (ImportError, ValueError) as e:
+            # pandas anterior ao 2.2 não conhece a engine calamine
+            logger.debug(f"Engine {engine} indisponível, usando a padrão: {e}")
+    return pd.read_excel(path, **kwargs)
+
+
+def normalize_text(series):
+    """Texto sem espaços nas pontas; vazio vira None"""
+    text = series.astype('string').fillna('').str.strip()
+    return text.astype(object).mask(text == '', None)
+
+
+def normalize_code(series):
+    """Códigos numéricos (ID, odômetro) como texto, sem o '.0' que o Excel acrescenta"""
+    text = series.astype('string').fillna('').str.strip().str.replace(r'\.0+$', '', regex=True)
+    return text.astype(object).mask(text == '', None)
+
+
+def normalize_chassis(series):
+    """Chassi em maiúsculas e sem espaços; vazio vira None"""
+    text = series.astype('string').fillna('').str.upper().str.replace(r'\s+', '', regex=True)
+    return text.astype(object).mask(text == '', None)
+
+
+def valid_vin(series):
+    """Máscara dos chassis no padrão VIN de 17 caracteres"""
+    return series.astype('string').str.fullmatch(VIN_PATTERN).fillna(False).astype(bool)
+
+
+def load_credentials(path='credentials.json'):
+    """
+    Lê as credenciais por cliente
+
+    Returns:
+        dict: nome do cliente -> {'user', 'senha'}
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        credentials_data = json.load(file)
+    return {
+        cliente['nome']: {'user': cliente['user'], 'senha': cliente['senha']}
+        for cliente in credentials_data['clientes']
+    }
+
+
+def load_vehicle_sheet(path, credentials=None, allow_unknown_clients=False, strict_vin=STRICT_VIN):
+    """
+    Carrega, normaliza e valida a planilha de veículos antes de abrir o navegador
+
+    Args:
+        path (str): planilha com as colunas de VEHICLE_COLUMNS
+        credentials (dict): credenciais por cliente; None não valida os clientes
+        allow_unknown_clients (bool): mantém clientes sem credenciais (login manual)
+        strict_vin (bool): rejeita chassis fora do padrão VIN
+
+    Returns:
+        tuple: (veículos válidos ordenados por cliente, linhas rejeitadas com a coluna MOTIVO)
+    """
+    df = read_excel(path, VEHICLE_COLUMNS)
+    df.columns = [str(col).strip() for col in df.columns]
+
+    missing_columns = [col for col in VEHICLE_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise SheetError(f"Colunas faltantes na planilha: {missing_columns}")
+
+    # Linha do Excel (cabeçalho na linha 1) para o usuário localizar as rejeitadas
+    df.insert(0, 'LINHA', df.index + 2)
+    df['ID'] = normalize_code(df['ID'])
+    df['ODOMETRO'] = normalize_code(df['ODOMETRO'])
+    df['CHASSI'] = normalize_chassis(df['CHASSI'])
+    for col in ('DESCRIÇÃO', 'PLACA', 'GRUPO DE VEICULOS', 'CLIENTE'):
+        df[col] = normalize_text(df[col])
+
+    # Placa vazia recebe o chassi
+    df['PLACA'] = df['PLACA'].fillna(df['CHASSI'])
+
+    # Primeiro motivo encontrado por linha, na ordem de gravidade
+    reason = pd.Series(None, index=df.index, dtype=object)
+
+    def reject(mask, motivo):
+        reason.loc[mask & reason.isna()] = motivo
+
+    reject(df[VEHICLE_KEY_COLUMNS].isna().any(axis=1), 'Dados obrigatórios vazios (ID, CHASSI ou CLIENTE)')
+
+    bad_vin = df['CHASSI'].notna() & ~valid_vin(df['CHASSI'])
+    if strict_vin:
+        reject(bad_vin, 'Chassi fora do padrão VIN (17 caracteres)')
+    elif bad_vin.any():
+        logger.warning(f"{int(bad_vin.sum())} chassis fora do padrão VIN mantidos na fila")
+
+    if credentials is not None and not allow_unknown_clients:
+        known = df['CLIENTE'].isin(list(credentials)) | (df['CLIENTE'].astype('string').str.upper() == MANUAL_CLIENT)
+        reject(df['CLIENTE'].notna() & ~known.fillna(False).astype(bool), 'Cliente sem credenciais no credentials.json')
+
+    reject(df.duplicated(subset=['CLIENTE', 'ID'], keep='first'), 'ID duplicado na planilha')
+    reject(df['CHASSI'].notna() & df.duplicated(subset=['CHASSI'], keep='first'), 'Chassi duplicado na planilha')
+
+    if credentials is not None and allow_unknown_clients:
+        unknown = sorted(set(df.loc[reason.isna(), 'CLIENTE'].dropna()) - set(credentials) - {MANUAL_CLIENT})
+        if unknown:
+            logger.warning(f"Clientes sem credenciais (login manual): {unknown}")
+
+    rejected = df[reason.notna()].assign(MOTIVO=reason[reason.notna()])
+    valid = df[reason.isna()].sort_values('CLIENTE', kind='stable').drop(columns='LINHA')
+    return valid, rejected
+
+
+def read_code_column(path, column=0):
+    """
+    Lê uma coluna de códigos (chassis ou IDs) normalizada e sem repetições, na ordem da planilha
+
+    Args:
+        path (str): arquivo Excel
+        column: nome da coluna ou posição (0 = primeira)
+
+    Returns:
+        list: códigos como texto
+    """
+    if isinstance(column, int):
+        df = read_excel(path, usecols=[column])
+    else:
+        df = read_excel(path, [str(column).strip()])
+        if len(df.columns) == 0:
+            raise SheetError(f"Coluna '{column}' não encontrada em {path}")
+
+    codes = normalize_code(df.iloc[:, 0]).dropna()
+    duplicates = int(codes.duplicated().sum())
+    if duplicates:
+        logger.info(f"{duplicates} códigos repetidos ignorados em {path}")
+    return codes.drop_duplicates().tolist()
+
+
+def sheet_columns(path):
+    """Nomes das colunas da planilha (lê apenas o cabeçalho)"""
+    return list(read_excel(path, nrows=0).columns)
+
+
+def vehicle_records(df):
+    """Linhas da planilha como dicionários (mais leves que as Series do iterrows)"""
+    return df.to_dict('records')
+
+
+def report_rejected(rejected, prefix='rejeitados'):
+    """
+    Exibe o resumo das linhas rejeitadas e as salva em Excel para correção
+
+    Returns:
+        str ou None: arquivo gerado
+    """
+    if rejected.empty:
+        return None
+
+    print(f"\n🚫 {len(rejected)} linha(s) rejeitada(s) antes de abrir o navegador:")
+    for motivo, count in rejected['MOTIVO'].value_counts().items():
+        print(f"   • {motivo}: {count}")
+
+    filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    try:
+        rejected.to_excel(filename, index=False)
+        print(f"💾 Linhas rejeitadas salvas em: {os.path.abspath(filename)}")
+        return filename
+    except Exception as e:
+        print(f"⚠️ Erro ao salvar linhas rejeitadas: {str(e)}")
+        return None
@@ -0,0 +1,76 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Serializa a tabela inteira em uma única chamada: textos das células, colunas
+# nomeadas (classes cdk-column-* do Angular Material) e elementos de ação da linha.
+# Elementos retornados pelo script chegam ao Python como WebElement.
+TABLE_SNAPSHOT_JS = """
+var root = arguments[0] ? document.querySelector(arguments[0]) : document;
+var rowSelector = arguments[1];
+var actionSelector = arguments[2];
+
+if (!root) { return null; }
+
+function isVisible(el) {
+    return el.offsetParent !== null && el.getClientRects().length > 0;
+}
+
+function isEnabled(el) {
+    return !el.disabled && !el.hasAttribute('disabled') && !el.classList.contains('aspNetDisabled');
+}
+
+var rows = [];
+var nodes = root.querySelectorAll(rowSelector);
+for (var i = 0; i < nodes.length; i++) {
+    var row = nodes[i];
+    var cells = [];
+    var columns = {};
+    var tds = row.querySelectorAll('td');
+    for (var j = 0; j < tds.length; j++) {
+        var text = (tds[j].innerText || tds[j].textContent || '').trim();
+        cells.push(text);
+        var match = /cdk-column-([\\w-]+)/.exec(tds[j].className || '');
+        if (match) { columns[match[1]] = text; }
+    }
+
+    var actions = [];
+    if (actionSelector) {
+        var found = row.querySelectorAll(actionSelector);
+        for (var k = 0; k < found.length; k++) {
+            var el = found[k];
+            actions.push({
+                element: el,
+                id: el.id || null,
+                text: (el.innerText || el.textContent || '').trim(),
+                href: el.getAttribute('href'),
+                visible: isVisible(el),
+                enabled: isEnabled(el)
+            });
+        }
+    }
+
+    rows.push({element: row, index: i, cells: cells, columns: columns, actions: actions});
+}
+return rows;
+"""
+
+
+def snapshot_table(driver, table_selector, row_selector='tr', action_selector=None):
+    """
+    Lê a tabela em uma única chamada ao navegador
+
+    Args:
+        driver: instância do WebDriver
+        table_selector (str): seletor CSS da tabela (None para procurar as linhas no documento todo)
+        row_selector (str): seletor CSS das linhas, relativo à tabela
+        action_selector (str): seletor CSS dos links/botões de ação dentro de cada linha
+
+    Returns:
+        list: uma entrada por linha com 'element', 'index', 'cells', 'columns' e 'actions',
+        ou None se a tabela não existe
+    """
+    rows = driver.execute_script(TABLE_SNAPSHOT_JS, table_selector, row_selector, action_selector)
+    if rows is None:
+        logger.debug(f"Tabela '{table_selector}' não encontrada")
+    return rows
@@ -9,10 +9,13 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 import logging
 
+from page_readiness import PageReadiness
+
 class VehicleAutomation:
     def __init__(self):
         self.driver = None
         self.wait = None
+        self.readiness = None
         self.credentials = {}
         self.vehicles_data = pd.DataFrame()
         self.report = {
@@ -73,6 +76,8 @@ class VehicleAutomation:
             
             self.driver = webdriver.Chrome(options=chrome_options)
             self.wait = WebDriverWait(self.driver, 15)
+            self.readiness = PageReadiness(self.driver, timeout=15)
+            self.readiness.install()
             
             self.driver.execute_script("document.body.style.zoom='80%'")
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -194,30 +199,9 @@ class VehicleAutomation:
                 print("Opção inválida! Digite 1 ou 2.")
 
     def wait_for_loading(self):
-        """Aguarda loadings do sistema .NET finalizarem"""
-        try:
-            time.sleep(2)
-            
-            loading_selectors = [
-                "//div[contains(@class, 'loading')]",
-                "//div[contains(@class, 'spinner')]", 
-                "//div[contains(@class, 'loader')]",
-                "//*[contains(@class, 'loading')]"
-            ]
-            
-            for selector in loading_selectors:
-                try:
-                    WebDriverWait(self.driver, 3).until_not(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                except:
-                    pass
-            
-            time.sleep(1)
-            
-        except Exception as e:
-            self.logger.warning(f"Aviso no wait_for_loading: {str(e)}")
-            time.sleep(3)
+        """Aguarda a página ficar pronta (requisições, Angular e DOM estáveis)"""
+        if not self.readiness.wait():
+            self.logger.warning("Página não estabilizou dentro do tempo limite")
     
     def login_automatic(self, client):
         """Realiza login automático usando as credenciais"""
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+# Os módulos da automação ficam na raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeServer:
+    """
+    Servidor HTTP local para os testes; cada requisição é respondida por route(request)
+
+    request é um dicionário com method, path, query, headers, body (bytes) e form
+    (corpo urlencoded já decodificado); route devolve (status, content_type, corpo).
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def handle_any(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                request = {
+                    'method': self.command,
+                    'path': parts.path,
+                    'query': {k: v[0] for k, v in parse_qs(parts.query).items()},
+                    'headers': dict(self.headers),
+                    'body': body,
+                    'form': {k: v[0] for k, v in parse_qs(body.decode('utf-8', 'replace')).items()},
+                }
+                server.requests.append(request)
+                status, content_type, payload = server.route(request)
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload)
+                if isinstance(payload, str):
+                    payload = payload.encode('utf-8')
+                self.send_response(status)
+                if content_type:
+                    self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = handle_any
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_server():
+    """Fábrica de servidores locais (encerrados ao fim do teste)"""
+    servers = []
+
+    def start(route):
+        server = FakeServer(route)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,160 @@
+import itertools
+
+import pytest
+import requests
+
+pytest.importorskip('lxml')
+
+from billing_webforms import (
+    BillingWebFormsClient, BillingHttpError, SEARCH_FIELD_ID, TERMINATION_DATE_ID, TERMINATE_BUTTON_ID,
+)
+from billing_automation import ScopeBillingAutomation
+
+PREFIX = 'ctl00$ContentPlaceHolder1$'
+SEARCH_BUTTON = PREFIX + 'cmd_Search'
+TERMINATE_BUTTON = PREFIX + 'cmd_Terminate'
+TERMINATION_DATE = PREFIX + 'txt_TerminationDate'
+
+
+def link_target(position):
+    return f"{PREFIX}gv_SearchResults$ctl{position + 2:02d}$lb_ContractTermination"
+
+
+class FakeContractsPage:
+    """
+    ContractMaintenance.aspx simulada: cada resposta emite um novo __VIEWSTATE e a
+    postback só é aceita com o ViewState e os controles da última página servida
+    """
+
+    def __init__(self, contracts):
+        # equipamento -> lista de [contrato, status]; a posição define o id da linha
+        self.contracts = contracts
+        self.counter = itertools.count(1)
+        self.viewstate = None
+        self.page = None
+        self.equipment = None
+        self.opened = None
+        self.terminated = []
+        self.rejected = 0
+
+    def form(self, body):
+        self.viewstate = f"vs{next(self.counter)}"
+        return (
+            f'<html><body><form method="post" action="./ContractMaintenance.aspx">'
+            f'<input type="hidden" name="__EVENTTARGET" value="" />'
+            f'<input type="hidden" name="__EVENTARGUMENT" value="" />'
+            f'<input type="hidden" name="__VIEWSTATE" value="{self.viewstate}" />'
+            f'<input type="text" id="{SEARCH_FIELD_ID}" name="{PREFIX}txt_BillableEntityDescription" value="" />'
+            f'<input type="submit" name="{SEARCH_BUTTON}" value="Search" />'
+            f'{body}</form></body></html>'
+        )
+
+    def results(self):
+        rows = ['<tr><th>Contrato</th><th>Descrição</th><th>Status</th><th></th></tr>']
+        for position, (contract, status) in enumerate(self.contracts.get(self.equipment, [])):
+            target = link_target(position)
+            rows.append(
+                f'<tr><td>{contract}</td><td>Rastreador</td><td>{status}</td>'
+                f'<td><a id="{target.replace("$", "_")}" href="javascript:__doPostBack(\'{target}\',\'\')">Termination</a></td></tr>'
+            )
+        self.page = 'results'
+        return self.form(f'<table id="ctl00_ContentPlaceHolder1_gv_SearchResults">{"".join(rows)}</table>')
+
+    def route(self, request):
+        if request['method'] == 'GET':
+            self.page = 'search'
+            return 200, 'text/html', self.form('')
+
+        form = request['form']
+        if form.get('__VIEWSTATE') != self.viewstate:
+            self.rejected += 1
+            return 500, 'text/html', '<html>Validation of viewstate MAC failed</html>'
+
+        if SEARCH_BUTTON in form:
+            self.equipment = form[PREFIX + 'txt_BillableEntityDescription']
+            return 200, 'text/html', self.results()
+
+        target = form.get('__EVENTTARGET', '')
+        if target.endswith('lb_ContractTermination'):
+            positions = [p for p in range(len(self.contracts.get(self.equipment, []))) if link_target(p) == target]
+            if self.page != 'results' or not positions:
+                # Event validation: o link não existe na página que originou a postback
+                self.rejected += 1
+                return 500, 'text/html', '<html>Invalid postback or callback argument</html>'
+            self.opened = positions[0]
+            self.page = 'termination'
+            return 200, 'text/html', self.form(
+                f'<input type="text" id="{TERMINATION_DATE_ID}" name="{TERMINATION_DATE}" value="" />'
+                f'<input type="submit" id="{TERMINATE_BUTTON_ID}" name="{TERMINATE_BUTTON}" value="Terminate" />'
+            )
+
+        if TERMINATE_BUTTON in form and self.page == 'termination':
+            contract = self.contracts[self.equipment][self.opened]
+            contract[1] = 'TERMINATED'
+            self.terminated.append((contract[0], form[TERMINATION_DATE]))
+            # A confirmação sai da tabela de resultados
+            self.page = 'confirmation'
+            return 200, 'text/html', self.form('<span>Contrato cancelado</span>')
+
+        self.rejected += 1
+        return 500, 'text/html', '<html>Postback inesperada</html>'
+
+
+def make_page():
+    return FakeContractsPage({
+        'EQ1': [['C1', 'ACTIVE'], ['C0', 'TERMINATED'], ['C2', 'ACTIVE']],
+        'EQ2': [['C3', 'TERMINATED']],
+    })
+
+
+def make_client(server):
+    return BillingWebFormsClient(requests.Session(), server.url + 'ContractMaintenance.aspx', timeout=5)
+
+
+def test_search_lists_only_active_contracts(fake_server):
+    page = make_page()
+    client = make_client(fake_server(page.route))
+
+    client.search('EQ1')
+    contracts = client.active_contracts()
+
+    assert [c['postback'] for c in contracts] == [link_target(0), link_target(2)]
+    client.search('EQ2')
+    assert client.active_contracts() == []
+
+
+def test_terminate_posts_the_date_and_leaves_the_table(fake_server):
+    page = make_page()
+    client = make_client(fake_server(page.route))
+
+    client.search('EQ1')
+    client.terminate(client.active_contracts()[0], '17/10/2026')
+
+    assert page.terminated == [('C1', '17/10/2026')]
+    assert client.page.get_element_by_id('ctl00_ContentPlaceHolder1_gv_SearchResults', None) is None
+
+
+def test_postback_from_stale_page_is_an_http_error(fake_server):
+    page = make_page()
+    client = make_client(fake_server(page.route))
+
+    client.search('EQ1')
+    first, second = client.active_contracts()
+    client.terminate(first, '17/10/2026')
+
+    # A confirmação não tem mais o link do segundo contrato
+    with pytest.raises(BillingHttpError, match='HTTP 500'):
+        client.terminate(second, '17/10/2026')
+    assert page.terminated == [('C1', '17/10/2026')]
+
+
+def test_terminate_all_http_searches_again_after_each_confirmation(fake_server):
+    page = make_page()
+    automation = ScopeBillingAutomation()
+    automation.http = make_client(fake_server(page.route))
+    automation.termination_date = '17/10/2026'
+
+    assert automation.terminate_all_http('EQ1') == (2, 0)
+    assert page.terminated == [('C1', '17/10/2026'), ('C2', '17/10/2026')]
+    assert page.rejected == 0
+    assert automation.terminate_all_http('EQ2') == (0, 0)
@@ -0,0 +1,105 @@
+import socket
+
+import pytest
+import requests
+
+from mzone_transport import MzoneHttpTransport, TransportError, UncertainWriteError
+
+LOGIN_PAGE = '<html><form id="login"></form></html>'
+
+
+def mzone_route(request):
+    if request['path'] == '/api/VehicleGroups':
+        return 200, 'application/json', {'value': [{'id': 'g1'}]}
+    if request['path'] == '/api/VehicleGroups(g1)/Vehicles':
+        return 200, 'application/json', {'value': [{'id': 'v1'}]}
+    if request['path'] == '/api/Vehicles' and 'unit_Id' in request['query'].get('$select', ''):
+        return 200, 'application/json', {'value': [
+            {'id': 'v1', 'description': 'Caminhão', 'unit_Id': 'u1', 'unit_Description': '1001'},
+            {'id': 'v2', 'description': '1002', 'unit_Id': 'u2', 'unit_Description': 'X'},
+        ]}
+    if request['path'] == '/api/Vehicles' and '$filter' not in request['query']:
+        return 200, 'application/json; odata.metadata=minimal', {'value': [{'id': 'v1'}]}
+    if request['path'] == '/api/Vehicles':
+        return 200, 'application/json', {'value': [{'id': 'v1', 'vin': 'AAA'}, {'id': 'v2', 'vin': 'bbb '}]}
+    if request['path'] == '/api/$batch':
+        return 200, 'application/json', {'responses': [{'id': '0', 'status': 204}, {'id': '1', 'status': 409}]}
+    if request['path'] == '/falha/$batch':
+        return 502, 'text/html', '<html>Bad Gateway</html>'
+    # Sessão expirada: o gateway devolve a tela de login com 200
+    return 200, 'text/html', LOGIN_PAGE
+
+
+class FakeDriver:
+    def execute_script(self, script):
+        return 'Mozilla/5.0' if 'userAgent' in script else None
+
+    def get_cookies(self):
+        return []
+
+
+def make_transport(server, path='api/'):
+    return MzoneHttpTransport(requests.Session(), base_url=server.url + path, timeout=5)
+
+
+def test_get_and_batch_decode_json(fake_server):
+    server = fake_server(mzone_route)
+    transport = make_transport(server)
+
+    assert transport.get('Vehicles') == {'value': [{'id': 'v1'}]}
+    assert transport.add_group_members('g1', ['a', 'b']) == {'a': True, 'b': True}
+
+
+def test_html_probe_returns_none_from_driver(fake_server):
+    server = fake_server(mzone_route)
+
+    assert MzoneHttpTransport.from_driver(FakeDriver(), base_url=server.url + 'login/') is None
+    assert MzoneHttpTransport.from_driver(FakeDriver(), base_url=server.url + 'api/') is not None
+
+
+def test_html_read_is_a_transport_error(fake_server):
+    server = fake_server(mzone_route)
+    transport = make_transport(server, path='login/')
+
+    with pytest.raises(TransportError, match='não é JSON') as error:
+        transport.get('Vehicles')
+    assert not isinstance(error.value, UncertainWriteError)
+
+
+def test_unreadable_write_is_uncertain(fake_server):
+    server = fake_server(mzone_route)
+
+    with pytest.raises(UncertainWriteError, match='não é JSON'):
+        make_transport(server, path='login/').batch([{'method': 'POST', 'url': 'x'}])
+    with pytest.raises(UncertainWriteError, match='HTTP 502'):
+        make_transport(server, path='falha/').batch([{'method': 'POST', 'url': 'x'}])
+
+
+def test_group_snapshot_reads_group_vehicles_and_members(fake_server):
+    server = fake_server(mzone_route)
+    transport = make_transport(server)
+
+    assert transport.group_snapshot('Frota', ['aaa', 'BBB', 'CCC']) == ('g1', {'AAA': 'v1', 'BBB': 'v2'}, {'v1'})
+    assert transport.group_membership('Frota', ['aaa', 'BBB', 'CCC']) == {'AAA': True, 'BBB': False}
+
+
+def test_find_units_resolves_in_bulk_and_remembers_misses(fake_server):
+    server = fake_server(mzone_route)
+    transport = make_transport(server)
+
+    assert transport.find_units(['1001', '1002', '1003']) == {'1001': 'u1', '1002': 'u2'}
+    lookups = len(server.requests)
+    assert transport.find_units(['1001']) == {'1001': 'u1'}
+    assert transport.find_units(['1003']) == {}
+    assert len(server.requests) == lookups
+
+
+def test_refused_connection_is_not_uncertain():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    transport = MzoneHttpTransport(requests.Session(), base_url=f"http://127.0.0.1:{port}/api/", timeout=5)
+
+    with pytest.raises(TransportError) as error:
+        transport.request('POST', 'Units(u1)/OdometerAdjustments', json={})
+    assert not isinstance(error.value, UncertainWriteError)
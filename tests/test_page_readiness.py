@@ -0,0 +1,33 @@
+from page_readiness import PageReadiness
+
+
+class FakeDriver:
+    """Página que devolve sempre o mesmo estado de prontidão"""
+
+    def __init__(self, **state):
+        self.state = {
+            'installed': True, 'pending': 0, 'quietMs': 0, 'documentReady': True,
+            'angularStable': True, 'spinnerVisible': False,
+        }
+        self.state.update(state)
+
+    def execute_script(self, script):
+        return dict(self.state)
+
+
+def test_quiet_dom_is_ready_at_once():
+    readiness = PageReadiness(FakeDriver(quietMs=500), timeout=1, poll_interval=0.01)
+
+    assert readiness.wait()
+
+
+def test_constant_redraws_stop_waiting_at_the_cap():
+    readiness = PageReadiness(FakeDriver(), timeout=5, max_quiet_wait_ms=50, poll_interval=0.01)
+
+    assert readiness.wait()
+
+
+def test_pending_requests_are_never_capped():
+    readiness = PageReadiness(FakeDriver(pending=1, quietMs=5000), timeout=0.2, max_quiet_wait_ms=10, poll_interval=0.01)
+
+    assert not readiness.wait()
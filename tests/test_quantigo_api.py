@@ -0,0 +1,85 @@
+import json
+
+import pytest
+import requests
+
+from quantigo_api import QuantigoApiClient, QuantigoApiError, DEINSTALLATION_LOCATION
+
+SUBSCRIPTIONS = {
+    'ABC123': [
+        {'id': 11, 'status': 'Active'},
+        {'id': 12, 'status': 'Inactive'},
+    ],
+}
+
+
+def quantigo_route(request):
+    if request['method'] == 'GET' and request['path'] == '/api/subscriptions':
+        items = SUBSCRIPTIONS.get(request['query'].get('search', ''), [])
+        return 200, 'application/json', {'items': items}
+    if request['method'] == 'POST' and request['path'].endswith('/deinstallation'):
+        return 204, None, b''
+    if request['path'] == '/api/quebrado':
+        return 503, 'application/json', {}
+    # Fallback do SPA: qualquer outro caminho devolve o index.html
+    return 200, 'text/html', '<!doctype html><app-root></app-root>'
+
+
+class FakeDriver:
+    """Navegador logado: só o que from_driver lê"""
+
+    def execute_script(self, script):
+        return 'Mozilla/5.0' if 'userAgent' in script else 'eyJ0.eyJ1.sig'
+
+    def get_cookies(self):
+        return []
+
+
+def make_client(server, path='api/'):
+    return QuantigoApiClient(requests.Session(), base_url=server.url + path, timeout=5)
+
+
+def test_search_returns_subscriptions(fake_server):
+    server = fake_server(quantigo_route)
+    client = make_client(server)
+
+    assert [s['id'] for s in client.search(' ABC123 ')] == [11, 12]
+    assert server.requests[-1]['query']['search'] == 'ABC123'
+    assert client.search_many(['ABC123', 'XYZ']) == {'ABC123': [{'id': 11, 'status': 'Active'}], 'XYZ': []}
+
+
+def test_deinstall_posts_location(fake_server):
+    server = fake_server(quantigo_route)
+    client = make_client(server)
+
+    client.deinstall({'id': 11})
+
+    request = server.requests[-1]
+    assert request['method'] == 'POST'
+    assert request['path'] == '/api/subscriptions/11/deinstallation'
+    assert json.loads(request['body']) == {'location': DEINSTALLATION_LOCATION}
+
+
+def test_html_response_is_an_api_error(fake_server):
+    server = fake_server(quantigo_route)
+    client = make_client(server, path='spa/')
+
+    with pytest.raises(QuantigoApiError, match='não é JSON'):
+        client.search('ABC123')
+
+
+def test_server_error_is_an_api_error(fake_server):
+    server = fake_server(quantigo_route)
+    client = make_client(server)
+
+    with pytest.raises(QuantigoApiError, match='HTTP 503'):
+        client.get('quebrado')
+    with pytest.raises(QuantigoApiError, match='HTTP 503'):
+        client.request('POST', 'quebrado', json={})
+
+
+def test_from_driver_falls_back_when_api_serves_html(fake_server):
+    server = fake_server(quantigo_route)
+
+    assert QuantigoApiClient.from_driver(FakeDriver(), base_url=server.url + 'spa/') is None
+    assert QuantigoApiClient.from_driver(FakeDriver(), base_url=server.url + 'api/') is not None
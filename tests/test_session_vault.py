@@ -0,0 +1,56 @@
+import os
+import stat
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+import session_vault
+from session_vault import SessionVault, VAULT_KEY_ENV
+
+
+class FakeKeyring:
+    def __init__(self):
+        self.passwords = {}
+
+    def get_password(self, service, user):
+        return self.passwords.get((service, user))
+
+    def set_password(self, service, user, password):
+        self.passwords[(service, user)] = password
+
+
+@pytest.fixture
+def no_env_key(monkeypatch):
+    monkeypatch.delenv(VAULT_KEY_ENV, raising=False)
+
+
+def test_key_goes_to_the_keyring_not_to_disk(tmp_path, monkeypatch, no_env_key):
+    fake = FakeKeyring()
+    monkeypatch.setattr(session_vault, 'keyring', fake)
+    key_file = tmp_path / 'vault.key'
+
+    first = SessionVault(directory=str(tmp_path), key_file=str(key_file))
+    second = SessionVault(directory=str(tmp_path), key_file=str(key_file))
+
+    assert first.enabled and len(fake.passwords) == 1
+    assert first.load_key() == second.load_key()
+    assert not key_file.exists()
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='permissões POSIX')
+def test_key_file_fallback_is_private(tmp_path, monkeypatch, no_env_key):
+    monkeypatch.setattr(session_vault, 'keyring', None)
+    key_file = tmp_path / 'sessions' / 'vault.key'
+
+    assert SessionVault(directory=str(tmp_path), key_file=str(key_file)).enabled
+    assert stat.S_IMODE(key_file.stat().st_mode) == 0o600
+
+
+def test_without_fallback_the_vault_is_disabled(tmp_path, monkeypatch, no_env_key):
+    monkeypatch.setattr(session_vault, 'keyring', None)
+    monkeypatch.setattr(session_vault, 'VAULT_KEY_FILE_FALLBACK', False)
+    key_file = tmp_path / 'vault.key'
+
+    assert not SessionVault(directory=str(tmp_path), key_file=str(key_file)).enabled
+    assert not key_file.exists()
@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Índices da grade "Todos os Veículos" gravados por cliente
+VEHICLE_INDEX_DIR = os.path.join('checkpoints', 'vehicle_index')
+
+# Validade do índice gravado em disco (segundos)
+DEFAULT_INDEX_TTL = 6 * 3600
+
+# Partes de uma célula com menos caracteres não viram chave (evita chaves genéricas)
+MIN_TOKEN_LENGTH = 3
+
+# Lê todas as linhas da grade Wijmo direto da CollectionView (inclusive as fora da tela
+# e as escondidas pelo filtro da pesquisa). Usa a grade com mais itens da página.
+GRID_SNAPSHOT_JS = """
+function controlOf(host) {
+    if (window.wijmo && wijmo.Control && wijmo.Control.getControl) {
+        var control = wijmo.Control.getControl(host);
+        if (control) { return control; }
+    }
+    return host['wj-Control'] || null;
+}
+
+function valueOf(item, path) {
+    var parts = path.split('.');
+    var value = item;
+    for (var i = 0; i < parts.length; i++) {
+        if (value === null || value === undefined) { return ''; }
+        value = value[parts[i]];
+    }
+    return (value === null || value === undefined) ? '' : String(value);
+}
+
+var best = null;
+var hosts = document.querySelectorAll('.wj-flexgrid');
+for (var h = 0; h < hosts.length; h++) {
+    var grid = controlOf(hosts[h]);
+    if (!grid || !grid.columns || !grid.collectionView) { continue; }
+    var items = grid.collectionView.sourceCollection || grid.collectionView.items || [];
+    if (best && items.length <= best.items.length) { continue; }
+
+    var columns = [];
+    for (var c = 0; c < grid.columns.length; c++) {
+        var col = grid.columns[c];
+        if (col.binding) { columns.push({binding: col.binding, header: col.header || col.binding}); }
+    }
+    best = {grid: grid, items: items, columns: columns};
+}
+if (!best) { return null; }
+
+var rows = [];
+for (var r = 0; r < best.items.length; r++) {
+    var row = [];
+    for (var k = 0; k < best.columns.length; k++) { row.push(valueOf(best.items[r], best.columns[k].binding)); }
+    rows.push(row);
+}
+return {columns: best.columns.map(function (c) { return c.header; }), rows: rows};
+"""
+
+
+def normalize_key(value):
+    """Chave de busca: texto em maiúsculas, sem espaços nas pontas"""
+    if value is None:
+        return ''
+    return str(value).strip().upper()
+
+
+def cell_keys(value):
+    """Chaves de uma célula: o texto inteiro e cada parte alfanumérica (ex.: '123 - Caminhão')"""
+    key = normalize_key(value)
+    if not key:
+        return set()
+    keys = {key}
+    keys.update(token for token in re.split(r'[^0-9A-Z]+', key) if len(token) >= MIN_TOKEN_LENGTH)
+    return keys
+
+
+class VehicleIndex:
+    """
+    Linhas da grade de veículos de um cliente indexadas pelo texto das células
+
+    ID, chassi e placa viram chaves de um dicionário, então cada consulta é O(1)
+    e os veículos ausentes são conhecidos antes de qualquer pesquisa na tela.
+    """
+
+    def __init__(self, columns, rows, built_at=None, source='grid'):
+        """
+        Args:
+            columns (list): cabeçalhos das colunas da grade
+            rows (list): valores das células (texto), uma lista por linha
+            built_at (float): horário da leitura da grade
+            source (str): 'grid' (lido agora) ou 'cache' (lido do disco)
+        """
+        self.columns = columns
+        self.rows = rows
+        self.built_at = built_at or time.time()
+        self.source = source
+        self.keys = {}
+        for position, row in enumerate(rows):
+            for value in row:
+                for key in cell_keys(value):
+                    self.keys.setdefault(key, set()).add(position)
+
+    @classmethod
+    def from_grid(cls, driver):
+        """
+        Lê a grade "Todos os Veículos" já aberta na tela
+
+        Returns:
+            VehicleIndex ou None se a grade não expõe os dados (a pesquisa na tela continua valendo)
+        """
+        try:
+            data = driver.execute_script(GRID_SNAPSHOT_JS)
+        except Exception as e:
+            logger.warning(f"Grade de veículos não lida: {e}")
+            return None
+        if not data or not data.get('rows'):
+            logger.warning("Grade de veículos sem dados acessíveis; índice desativado")
+            return None
+        return cls(data['columns'], data['rows'])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['columns'], data['rows'], built_at=data['built_at'], source='cache')
+
+    def to_dict(self):
+        return {'built_at': self.built_at, 'columns': self.columns, 'rows': self.rows}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def positions(self, term):
+        """Linhas que contêm o termo em alguma célula"""
+        return self.keys.get(normalize_key(term), set())
+
+    def contains(self, term):
+        return bool(self.positions(term))
+
+    def row(self, term):
+        """
+        Linha da grade do termo como dicionário cabeçalho -> valor
+
+        Returns:
+            dict ou None se o termo está ausente ou em mais de uma linha
+        """
+        found = self.positions(term)
+        if len(found) != 1:
+            return None
+        return dict(zip(self.columns, self.rows[next(iter(found))]))
+
+    def search_term(self, vehicle, columns=('ID', 'CHASSI')):
+        """Primeiro valor do veículo (na ordem das colunas) que aparece na grade, ou None"""
+        for column in columns:
+            value = vehicle.get(column)
+            if value is not None and self.contains(value):
+                return value
+        return None
+
+    def missing(self, vehicles, columns=('ID', 'CHASSI')):
+        """Veículos (dicionários) sem nenhum dos valores das colunas na grade"""
+        return [vehicle for vehicle in vehicles if self.search_term(vehicle, columns) is None]
+
+
+class VehicleIndexCache:
+    """Guarda o índice de cada cliente em disco por um tempo limitado"""
+
+    def __init__(self, directory=VEHICLE_INDEX_DIR, ttl=DEFAULT_INDEX_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, client):
+        """Arquivo do índice (nome derivado do cliente, sem expô-lo)"""
+        digest = hashlib.sha1(str(client).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, client):
+        """Índice gravado ainda dentro da validade, ou None"""
+        path = self.path(client)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = VehicleIndex.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Índice de veículos ilegível descartado ({client}): {e}")
+            self.forget(client)
+            return None
+        if time.time() - index.built_at > self.ttl:
+            self.forget(client)
+            return None
+        return index
+
+    def save(self, client, index):
+        """Grava o índice de forma atômica"""
+        path = self.path(client)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(index.to_dict(), f, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o índice de veículos ({client}): {e}")
+
+    def forget(self, client):
+        try:
+            os.remove(self.path(client))
+        except OSError:
+            pass
+
+
+def build_vehicle_index(driver, client, vehicles, open_grid, cache=None, columns=('ID', 'CHASSI')):
+    """
+    Índice de veículos do cliente: do disco quando todos os veículos da fila estão nele,
+    senão lido da grade (abrir a grade só é necessário nesse caso)
+
+    Args:
+        driver: navegador logado no cliente
+        vehicles (list): veículos da fila (dicionários) do cliente
+        open_grid (callable): open_grid() -> bool abre a grade "Todos os Veículos"
+        cache (VehicleIndexCache): índices em disco (None não usa disco)
+        columns: colunas do veículo procuradas na grade
+
+    Returns:
+        tuple: (índice ou None, veículos ausentes da grade)
+    """
+    index = cache.load(client) if cache else None
+    if index is not None and not index.missing(vehicles, columns):
+        logger.info(f"Índice de veículos do disco: {client} ({len(index)} veículos)")
+        return index, []
+
+    # Sem índice válido, ou o gravado não tem algum veículo: a grade atual decide
+    if not open_grid():
+        return None, []
+    index = VehicleIndex.from_grid(driver)
+    if index is None:
+        return None, []
+    if cache:
+        cache.save(client, index)
+    logger.info(f"Índice de veículos lido da grade: {client} ({len(index)} veículos)")
+    return index, index.missing(vehicles, columns)
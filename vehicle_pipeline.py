@@ -0,0 +1,260 @@
+import pandas as pd
+from datetime import datetime
+
+from mzone_transport import TransportError, UncertainWriteError
+from odometer_setup import OdometerUpdateAutomation
+from run_telemetry import timed
+from setup_automation import VehicleAutomation
+
+
+class VehiclePipelineAutomation(VehicleAutomation, OdometerUpdateAutomation):
+    """
+    Setup e ajuste de odômetro em uma única passada por veículo
+
+    Usa o login, os contextos por cliente e os transportes do setup e os passos
+    do modal de odômetro da automação de odômetro. Cada cliente é logado uma vez
+    e cada veículo é pesquisado uma única vez na grade.
+
+    Pelo navegador continuam sendo dois modais por veículo: o formulário de cadastro
+    (lápis, salvo com "Salvar") e o editor com o Controlador de unidade (três pontos,
+    ajuste gravado com "Definir"). São telas diferentes do mzoneweb; quando a API está
+    ativa, o ajuste de odômetro dispensa o segundo modal.
+    """
+
+    TITLE = "SETUP + ODÔMETRO"
+    JOURNAL_NAME = 'pipeline'
+
+    def __init__(self):
+        super().__init__()
+        self.report['odometer_errors'] = []
+
+    def prepare_http_transport(self, transport, vehicles):
+        """Resolve veículo -> unidade de todos os ajustes do cliente em poucas consultas (em vez de uma por veículo)"""
+        ids = [v['ID'] for v in vehicles if pd.notna(v.get('ODOMETRO')) and str(v.get('ODOMETRO')).strip()]
+        if not ids:
+            return
+        try:
+            units = transport.find_units(ids)
+            print(f"⚡ Unidades resolvidas pela API: {len(units)}/{len(ids)}")
+        except TransportError as e:
+            print(f"⚠️ Unidades não resolvidas em massa ({e}), cada ajuste resolve a sua")
+
+    @timed()
+    def apply_setup(self, vehicle_data):
+        """
+        Edita descrição/placa/chassi/grupo, pela API quando possível
+
+        Returns:
+            tuple: (status, erro, pesquisado) com status 'success', 'not_found' ou 'error';
+                pesquisado indica que a grade já está filtrada pelo veículo
+        """
+        vehicle_id = vehicle_data['ID']
+
+        for transport in self.transports:
+            if transport.name == 'selenium':
+                continue
+            try:
+                status, erro = transport.update_vehicle(vehicle_data)
+                return status, erro, False
+            except TransportError as e:
+                print(f"⚠️ Transporte '{transport.name}' falhou ({e}), usando o navegador...")
+
+        # Pelo navegador: a mesma pesquisa serve ao cadastro e ao odômetro
+        if not self.navigate_to_vehicles():
+            return 'error', 'Erro ao navegar para veículos', False
+        if not self.search_vehicle_by_id(vehicle_id):
+            return 'not_found', None, False
+        if not self.click_edit_vehicle(vehicle_id):
+            return 'error', 'Erro ao abrir modal de edição', True
+        if not self.fill_vehicle_form(vehicle_data):
+            return 'error', 'Erro ao preencher formulário', True
+        return 'success', None, True
+
+    @timed()
+    def adjust_odometer(self, vehicle_data, searched):
+        """
+        Inclui o ajuste de odômetro pelo Controlador de unidade
+
+        Returns:
+            str ou None: mensagem de erro, ou None se o ajuste foi salvo
+
+        Raises:
+            UncertainWriteError: a API pode ter gravado o ajuste (o modal não é usado)
+        """
+        # Pela API, uma requisição; o modal fica como fallback
+        for transport in self.transports:
+            if not hasattr(transport, 'adjust_odometer'):
+                continue
+            try:
+                transport.adjust_odometer(vehicle_data['ID'], vehicle_data['ODOMETRO'])
+                return None
+            except UncertainWriteError:
+                # Refazer pelo modal incluiria um segundo ajuste na unidade
+                raise
+            except TransportError as e:
+                print(f"⚠️ Ajuste de odômetro pela API falhou ({e}), usando o modal...")
+
+        # A grade continua filtrada pelo veículo depois do "Salvar" do cadastro; só o
+        # editor do Controlador de unidade (outro modal) precisa ser aberto
+        if not searched:
+            if not self.navigate_to_vehicles():
+                return 'Erro ao navegar para veículos'
+            if not self.search_vehicle(vehicle_data['ID'], vehicle_data['CHASSI']):
+                return 'Veículo não encontrado na grade'
+
+        if not self.edit_vehicle():
+            return 'Erro ao clicar em editar'
+
+        steps = [
+            (self.navigate_to_unit_controller, 'Erro ao navegar para Controlador de unidade'),
+            (self.navigate_to_odometer_tab, 'Erro ao navegar para aba do odômetro'),
+            (self.add_odometer_adjustment, 'Erro ao clicar em Add adjustment'),
+            (lambda: self.update_odometer(vehicle_data['ODOMETRO']), 'Erro ao atualizar valor do odômetro'),
+            (self.edit_adjustment_start_time, 'Erro ao clicar em Edit adjustment start time'),
+        ]
+        for step, erro in steps:
+            if not step():
+                self.close_modal()
+                return erro
+
+        self.scroll_down_if_needed()
+        if not self.save_changes():
+            self.close_modal()
+            return 'Erro ao salvar alterações'
+        if not self.close_modal():
+            return 'Erro ao fechar modal'
+        return None
+
+    @timed()
+    def process_vehicle(self, vehicle_data):
+        """Edita o cadastro e ajusta o odômetro do veículo"""
+        vehicle_id = vehicle_data['ID']
+        client = vehicle_data['CLIENTE']
+        odometer = vehicle_data.get('ODOMETRO')
+
+        try:
+            print(f"\n🔧 PROCESSANDO VEÍCULO ID: {vehicle_id} | Cliente: {client}")
+
+            status, erro, searched = self.apply_setup(vehicle_data)
+
+            if status == 'not_found':
+                self.mark_not_found(vehicle_data)
+                return
+
+            if status == 'error':
+                self.report['errors'].append({'cliente': client, 'id': vehicle_id, 'erro': erro})
+                self.record_checkpoint(vehicle_data, 'error', erro=erro)
+                return
+
+            odometer_error = None
+            uncertain = False
+            if pd.notna(odometer) and str(odometer).strip():
+                print(f"🔢 Ajustando odômetro para: {odometer}")
+                try:
+                    odometer_error = self.adjust_odometer(vehicle_data, searched)
+                except UncertainWriteError as e:
+                    odometer_error = f"Ajuste sem confirmação da API, conferir antes de refazer ({e})"
+                    uncertain = True
+
+            self.report['success'].append({
+                'cliente': client,
+                'id': vehicle_id,
+                'chassi': vehicle_data.get('CHASSI', 'N/A'),
+                'placa': vehicle_data.get('PLACA', 'N/A'),
+                'odometro': odometer,
+                'odometro_ajustado': odometer_error is None
+            })
+
+            if odometer_error:
+                # Cadastro salvo; o checkpoint fica como erro para o odômetro ser refeito ao retomar
+                # (exceto quando a API pode já ter gravado o ajuste)
+                print(f"⚠️ Cadastro salvo, mas o odômetro falhou: {odometer_error}")
+                self.report['odometer_errors'].append({'cliente': client, 'id': vehicle_id, 'erro': odometer_error})
+                self.record_checkpoint(vehicle_data, 'uncertain' if uncertain else 'error', erro=f"Odômetro: {odometer_error}")
+                return
+
+            self.record_checkpoint(
+                vehicle_data, 'success',
+                chassi=vehicle_data.get('CHASSI', 'N/A'),
+                placa=vehicle_data.get('PLACA', 'N/A'),
+                odometro=odometer
+            )
+            print(f"✅ Veículo processado com sucesso: {vehicle_id}")
+
+        except Exception as e:
+            self.report['errors'].append({'cliente': client, 'id': vehicle_id, 'erro': str(e)})
+            self.record_checkpoint(vehicle_data, 'error', erro=str(e))
+            print(f"❌ Erro inesperado: {str(e)}")
+            try:
+                self.close_modal()
+            except Exception:
+                pass
+
+    def generate_final_report(self):
+        """Exibe o relatório combinado (cadastro + odômetro) e salva em Excel"""
+        print("\n" + "="*80)
+        print("RELATÓRIO FINAL - SETUP + ODÔMETRO")
+        print("="*80)
+
+        success = self.report['success']
+        adjusted = [item for item in success if item.get('odometro_ajustado', True)]
+
+        print(f"\n📊 RESUMO:")
+        print(f"   ✅ Cadastros salvos: {len(success)}")
+        print(f"   🔢 Odômetros ajustados: {len(adjusted)}")
+        print(f"   ⚠️ Erros de odômetro: {len(self.report['odometer_errors'])}")
+        print(f"   ❌ Erros: {len(self.report['errors'])}")
+        print(f"   🔍 Não encontrados: {len(self.report['not_found'])}")
+
+        if success:
+            print(f"\n✅ VEÍCULOS PROCESSADOS:")
+            for item in success:
+                odometro = "ajustado" if item.get('odometro_ajustado', True) else "FALHOU"
+                print(f"   Cliente: {item['cliente']} | ID: {item['id']} | Chassi: {item['chassi']} | Odômetro: {item['odometro']} ({odometro})")
+
+        if self.report['odometer_errors']:
+            print(f"\n⚠️ ODÔMETROS NÃO AJUSTADOS:")
+            for item in self.report['odometer_errors']:
+                print(f"   Cliente: {item['cliente']} | ID: {item['id']} | Erro: {item['erro']}")
+
+        if self.report['errors']:
+            print(f"\n❌ VEÍCULOS COM ERRO:")
+            for item in self.report['errors']:
+                print(f"   Cliente: {item['cliente']} | ID: {item['id']} | Erro: {item['erro']}")
+
+        if self.report['not_found']:
+            print(f"\n🔍 VEÍCULOS NÃO ENCONTRADOS:")
+            for item in self.report['not_found']:
+                print(f"   Cliente: {item['cliente']} | ID: {item['id']}")
+
+        print("="*80)
+        self.save_pipeline_report()
+
+    def save_pipeline_report(self):
+        """Salva o relatório combinado em um arquivo Excel com uma aba por categoria"""
+        sheets = {
+            'Sucessos': self.report['success'],
+            'Erros de Odômetro': self.report['odometer_errors'],
+            'Erros': self.report['errors'],
+            'Não Encontrados': self.report['not_found'],
+        }
+        if not any(sheets.values()):
+            return
+        try:
+            filename = f"relatorio_pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+                for sheet_name, rows in sheets.items():
+                    if rows:
+                        pd.DataFrame(rows).to_excel(writer, sheet_name=sheet_name, index=False)
+            print(f"💾 Relatório salvo em: {filename}")
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar relatório: {str(e)}")
+
+
+def main():
+    """Função principal da automação"""
+    automation = VehiclePipelineAutomation()
+    automation.run_automation()
+
+if __name__ == '__main__':
+    main()
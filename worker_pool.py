@@ -0,0 +1,96 @@
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Executa partições de trabalho em paralelo, cada uma com seu próprio navegador"""
+
+    def __init__(self, pool_size):
+        """
+        Args:
+            pool_size (int): número máximo de workers simultâneos
+        """
+        self.pool_size = max(1, int(pool_size))
+
+    def run(self, partitions, worker_fn):
+        """
+        Executa worker_fn(chave, itens) para cada partição
+
+        Args:
+            partitions (dict): chave da partição -> lista de itens
+            worker_fn (callable): função executada por partição, retorna o resultado do worker
+
+        Returns:
+            list: tuplas (chave, resultado, erro) na ordem de conclusão
+        """
+        # Partições maiores primeiro para equilibrar a carga entre os workers
+        ordered = sorted(partitions.items(), key=lambda kv: len(kv[1]), reverse=True)
+        results = []
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            futures = {
+                executor.submit(worker_fn, key, items): key
+                for key, items in ordered
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results.append((key, future.result(), None))
+                    logger.info(f"Worker concluído: {key}")
+                except Exception as e:
+                    logger.error(f"Worker falhou ({key}): {e}")
+                    results.append((key, None, e))
+
+        return results
+
+    def run_queue(self, items, worker_fn):
+        """
+        Executa pool_size workers consumindo uma fila compartilhada de itens
+
+        Args:
+            items (list): itens a processar
+            worker_fn (callable): worker_fn(chave_do_worker, fila); consome com fila.get_nowait()
+                até queue.Empty e retorna o resultado do worker
+
+        Returns:
+            tuple: (lista de tuplas (chave, resultado, erro), itens que ficaram na fila)
+        """
+        work = queue.Queue()
+        for item in items:
+            work.put(item)
+
+        workers = min(self.pool_size, max(1, len(items)))
+        results = []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(worker_fn, f"worker {n + 1}", work): f"worker {n + 1}"
+                for n in range(workers)
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results.append((key, future.result(), None))
+                    logger.info(f"Worker concluído: {key}")
+                except Exception as e:
+                    logger.error(f"Worker falhou ({key}): {e}")
+                    results.append((key, None, e))
+
+        leftover = []
+        while not work.empty():
+            leftover.append(work.get_nowait())
+        return results, leftover
+
+
+def merge_reports(reports):
+    """Une relatórios no formato {categoria: [itens]} em um único dicionário"""
+    merged = {}
+    for report in reports:
+        if not report:
+            continue
+        for category, items in report.items():
+            merged.setdefault(category, []).extend(items)
+    return merged